@@ -1,28 +1,32 @@
-import google.generativeai as genai
 from datetime import datetime, timedelta
 import pandas as pd
 import json
 import os
 from dotenv import load_dotenv
-import streamlit as st
 import time
 from typing import List, Dict, Any, Optional
 from tenacity import retry, stop_after_attempt, wait_exponential, RetryError
 from utils import categorize_app, APP_CATEGORIES
 from pathlib import Path
+from lazy_imports import lazy_import
 
-# Load environment variables at module level with override
-env_path = Path('.env')
-parent_env_path = Path('..') / '.env'
+# Loaded when the first AIAnalyzer is created, not when this module is imported
+genai = lazy_import("google.generativeai")
+st = lazy_import("streamlit")
 
-if env_path.exists():
-    load_dotenv(env_path, override=True)
-    st.success("✅ Found .env file in current directory")
-elif parent_env_path.exists():
-    load_dotenv(parent_env_path, override=True)
-    st.success("✅ Found .env file in parent directory")
-else:
-    st.error("❌ No .env file found!")
+def load_env():
+    """Load environment variables from .env (current or parent directory) with override"""
+    env_path = Path('.env')
+    parent_env_path = Path('..') / '.env'
+
+    if env_path.exists():
+        load_dotenv(env_path, override=True)
+        st.success("✅ Found .env file in current directory")
+    elif parent_env_path.exists():
+        load_dotenv(parent_env_path, override=True)
+        st.success("✅ Found .env file in parent directory")
+    else:
+        st.error("❌ No .env file found!")
 
 class AIAnalyzer:
     def __init__(self, history_file="tracking_history.json"):
@@ -32,6 +36,7 @@ class AIAnalyzer:
         self.init_error = None
         
         # Load environment variables
+        load_env()
         self.api_key = os.getenv('GOOGLE_API_KEY')
         
         if not self.api_key:
@@ -123,8 +128,8 @@ class AIAnalyzer:
     def analyze_current_session(self, current_data):
         """Analyze current session using static analysis"""
         try:
-            # Prepare current session data
-            df = pd.DataFrame(current_data)
+            # Session frames are used as they are; records are converted
+            df = current_data if isinstance(current_data, pd.DataFrame) else pd.DataFrame(current_data)
             return {
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                 'insights': self._get_static_analysis(df),
@@ -197,7 +202,7 @@ class AIAnalyzer:
     def update_with_session(self, session_data):
         """Update with new session data - simplified version"""
         try:
-            df = pd.DataFrame(session_data)
+            df = session_data if isinstance(session_data, pd.DataFrame) else pd.DataFrame(session_data)
             
             # Add categories if they don't exist
             if 'Category' not in df.columns:
@@ -1,38 +1,257 @@
 import numpy as np
-import pandas as pd
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import joblib
+import hashlib
 import os
-from datetime import datetime, timedelta
-import json
+import threading
+import warnings
+import time
+from datetime import datetime
+from session_store import SessionStore
+from timeline_features import TIMELINE_FEATURE_NAMES, RollingBaseline, extract_timeline_features
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+FEATURE_CATEGORIES = ['Development', 'Office', 'Entertainment', 'Communication', 'Browsers']
+FEATURE_NAMES = [
+    'total_time', 'app_count', 'avg_time_per_app', 'time_std', 'time_max', 'time_min'
+] + [f'share_{cat}' for cat in FEATURE_CATEGORIES]
+
+FEATURE_LABELS = {
+    'total_time': 'session duration',
+    'app_count': 'number of applications',
+    'avg_time_per_app': 'time per application',
+    'time_std': 'spread of time across applications',
+    'time_max': 'longest time in one application',
+    'time_min': 'shortest time in one application',
+}
+FEATURE_LABELS.update({f'share_{cat}': f'share of {cat} apps' for cat in FEATURE_CATEGORIES})
+
+# Training-set quantiles kept with the model for explanations
+EXPLANATION_QUANTILES = [5, 25, 50, 75, 95]
+# Drivers at least this many interquartile ranges from the median are described
+EXPLANATION_MIN_CONTRIBUTION = 1.5
+
+# Timeline features further than this many standard deviations from the profile's
+# recent sessions flag the session; the baseline needs a few sessions first
+TIMELINE_Z_THRESHOLD = 3.0
+TIMELINE_MIN_SESSIONS = 5
+
+# Bump whenever _extract_features changes so cached feature matrices are rebuilt
+FEATURE_VERSION = 1
+
+def features_fingerprint(features):
+    """Hash of a feature matrix and the feature schema it was built with"""
+    digest = hashlib.sha1(f"v{FEATURE_VERSION}:{features.shape}".encode())
+    digest.update(np.ascontiguousarray(features, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+def extract_features_batch(frame):
+    """
+    Extract features for many sessions at once from a long-format frame.
+    
+    The frame has one row per application with session_id, Category and
+    Time_Minutes columns, as SessionStore.load_frame returns it.
+    
+    Produces the same values as AnomalyDetector._extract_features applied to each
+    session. Floating-point sums depend on summation order, so sessions are
+    bucketed by app count and each bucket is reduced as a 2-D array: row sums
+    use the same pairwise summation as the pandas per-session path, and the
+    standard deviation follows pandas' two-pass nanvar formula.
+    
+    Returns (session_ids, feature_matrix) with one row per session, ordered by session_id.
+    """
+    frame = frame.sort_values('session_id', kind='stable')
+    session_ids, starts, counts = np.unique(
+        frame['session_id'].to_numpy(), return_index=True, return_counts=True
+    )
+    if len(session_ids) == 0:
+        return session_ids, np.empty((0, len(FEATURE_NAMES)))
+    
+    minutes = frame['Time_Minutes'].to_numpy(dtype=np.float64)
+    categories = frame['Category'].to_numpy()
+    
+    # Session totals and sample std (NaN for single-app sessions, as in pandas)
+    total_time = np.empty(len(session_ids))
+    time_std = np.full(len(session_ids), np.nan)
+    for app_count in np.unique(counts):
+        in_bucket = counts == app_count
+        # (sessions x app_count) matrix of this bucket's minutes, one session per row
+        matrix = minutes[starts[in_bucket][:, None] + np.arange(app_count)]
+        bucket_total = matrix.sum(axis=1)
+        total_time[in_bucket] = bucket_total
+        if app_count > 1:
+            squared_deviation = (bucket_total[:, None] / app_count - matrix) ** 2
+            time_std[in_bucket] = np.sqrt(squared_deviation.sum(axis=1) / (app_count - 1))
+    
+    avg_time_per_app = total_time / counts
+    
+    # Time distribution features
+    time_max = np.maximum.reduceat(minutes, starts)
+    time_min = np.minimum.reduceat(minutes, starts)
+    
+    # Category distribution (share of apps, as value_counts(normalize=True) gives)
+    category_features = [
+        np.add.reduceat((categories == cat).astype(np.int64), starts) / counts
+        for cat in FEATURE_CATEGORIES
+    ]
+    
+    features = np.column_stack([
+        total_time,
+        counts.astype(np.float64),
+        avg_time_per_app,
+        time_std,
+        time_max,
+        time_min
+    ] + category_features)
+    
+    return session_ids, features
+
+# What _extract_features gives a session without any rows
+EMPTY_SESSION_FEATURES = np.array([0.0, 0.0, 0.0, np.nan, np.nan, np.nan] + [0.0] * len(FEATURE_CATEGORIES))
+
+def session_features(frame, session_ids):
+    """
+    Feature matrix with one row per entry of ``session_ids``, in that order.
+    
+    Sessions without rows in ``frame`` get EMPTY_SESSION_FEATURES.
+    """
+    session_ids = np.asarray(session_ids)
+    found, X = extract_features_batch(frame)
+    if len(found) == len(session_ids) and np.array_equal(found, session_ids):
+        return X
+    features = np.tile(EMPTY_SESSION_FEATURES, (len(session_ids), 1))
+    order = np.argsort(session_ids, kind='stable')
+    positions = order[np.searchsorted(session_ids, found, sorter=order)]
+    features[positions] = X
+    return features
 
 class AnomalyDetector:
-    def __init__(self, history_file="tracking_history.json"):
+    def __init__(self, history_file="tracking_history.json", feature_cache_file=None, max_sessions=100,
+                 model_file=None, background_training=True, n_jobs=-1, store_dir=None,
+                 timeline_capacity=50, store=None):
         self.history_file = history_file
+        self.max_sessions = max_sessions
+        # Sessions live in an append-only store; history_file is only read to migrate old data.
+        # A store shared with other readers (see AnomalyModelRegistry) keeps its own retention,
+        # and the detector only looks at its last max_sessions sessions.
+        if store is None:
+            store = SessionStore(store_dir or os.path.splitext(history_file)[0] + "_sessions",
+                                 max_sessions=max_sessions)
+        self.store = store
+        self.feature_cache_file = feature_cache_file or os.path.splitext(history_file)[0] + "_features.npz"
+        self.model_file = model_file or os.path.splitext(history_file)[0] + "_model.joblib"
+        # Rolling baseline of the last timeline_capacity sessions' focus timelines
+        self.timeline_file = os.path.splitext(history_file)[0] + "_timeline.npz"
+        self.timeline_baseline = RollingBaseline.load(self.timeline_file, capacity=timeline_capacity)
+        # Fitted model and scaler are loaded on first use (see _ensure_model)
         self.model = IsolationForest(contamination=0.1, random_state=42)
         self.scaler = StandardScaler()
-        self.history = self._load_history()
+        self.model_fingerprint = None
+        self.feature_quantiles = None
+        self._model_loaded = False
+        self.n_jobs = n_jobs
+        # Guards swapping the fitted (model, scaler, fingerprint) triple
+        self._model_lock = threading.Lock()
+        # Only one fit runs at a time
+        self._train_lock = threading.Lock()
+        self.session_ids, self.timestamps, self.features = self._load_history()
+        # Hash of self.features, updated with it, so checking the model's freshness stays O(1)
+        self.features_fingerprint = features_fingerprint(self.features)
+        self.feature_means = self._feature_means()
+        self.scheduler = RetrainScheduler(self) if background_training else None
         
     def _load_history(self):
-        """Load session history from JSON file"""
+        """
+        Load the session ids, timestamps (epoch seconds) and feature matrix of
+        the last max_sessions stored sessions, migrating the legacy JSON file once.
+        """
+        self.store_revision = None
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    history = json.load(f)
-                    # Convert timestamp strings back to datetime objects
-                    for session in history:
-                        session['timestamp'] = datetime.strptime(session['timestamp'], '%Y-%m-%d %H:%M:%S')
-                    return history
-            return []
+            if (os.path.exists(self.history_file) and not self.store.manifest['segments']
+                    and 'migrated_from' not in self.store.manifest):
+                self.store.import_json(self.history_file)
+            # Read before the index, so an append racing with the load is picked up by refresh()
+            revision = self.store.revision()
+            index = self.store.session_index()
+            session_ids = index['session_id'][-self.max_sessions:]
+            timestamps = index['timestamp'][-self.max_sessions:].astype(np.int64)
         except Exception as e:
             print(f"Error loading history: {e}")
-            return []
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty((0, len(FEATURE_NAMES)))
+        self.store_revision = revision
+        return session_ids, timestamps, self._load_features(session_ids, timestamps)
     
-    def _save_history(self):
-        """Save tracking history to file"""
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f)
+    def refresh(self):
+        """
+        Pick up sessions that other writers (the tracker daemon, the ingest
+        server) appended to the store since the history was loaded.
+        
+        Checking costs one manifest read; when the store changed, only the new
+        sessions' features are extracted.
+        
+        Returns:
+            bool: True if the history changed
+        """
+        try:
+            revision = self.store.revision()
+            if revision == self.store_revision:
+                return False
+            index = self.store.session_index()
+            session_ids = index['session_id'][-self.max_sessions:]
+            timestamps = index['timestamp'][-self.max_sessions:].astype(np.int64)
+            features = np.empty((len(session_ids), len(FEATURE_NAMES)))
+            known = np.isin(session_ids, self.session_ids)
+            if known.any():
+                order = np.argsort(self.session_ids)
+                positions = order[np.searchsorted(self.session_ids, session_ids[known], sorter=order)]
+                features[known] = self.features[positions]
+            features[~known] = self._prepare_training_data(session_ids[~known])
+        except Exception as e:
+            print(f"Error refreshing history: {e}")
+            return False
+        
+        new_sessions = int((~known).sum())
+        self.session_ids, self.timestamps, self.features = session_ids, timestamps, features
+        self.features_fingerprint = features_fingerprint(self.features)
+        self.store_revision = revision
+        self._save_features(self.features, self.timestamps)
+        self.feature_means = self._feature_means()
+        if self.scheduler and new_sessions:
+            self.scheduler.notify(new_sessions)
+        return True
+    
+    def _load_features(self, session_ids, timestamps):
+        """Load the cached feature matrix, rebuilding it if it is stale or missing"""
+        try:
+            if os.path.exists(self.feature_cache_file):
+                with np.load(self.feature_cache_file) as cache:
+                    if (int(cache['version']) == FEATURE_VERSION and cache['timestamps'].dtype.kind == 'i'
+                            and np.array_equal(cache['timestamps'], timestamps)):
+                        return cache['features']
+        except Exception as e:
+            print(f"Error loading feature cache: {e}")
+        
+        features = self._prepare_training_data(session_ids)
+        self._save_features(features, timestamps)
+        return features
+    
+    def _save_features(self, features, timestamps):
+        """Persist the feature matrix alongside the session timestamps it was computed from"""
+        try:
+            np.savez(
+                self.feature_cache_file,
+                features=features,
+                timestamps=timestamps,
+                version=FEATURE_VERSION
+            )
+        except Exception as e:
+            print(f"Error saving feature cache: {e}")
+    
+    def _feature_means(self):
+        if len(self.features) == 0:
+            return None
+        return np.mean(self.features, axis=0)
     
     def _extract_features(self, session_data):
         """Extract relevant features from session data"""
@@ -45,7 +264,7 @@ class AnomalyDetector:
         
         # Category distribution
         categories = session_data['Category'].value_counts(normalize=True)
-        category_features = [categories.get(cat, 0) for cat in ['Development', 'Office', 'Entertainment', 'Communication', 'Browsers']]
+        category_features = [categories.get(cat, 0) for cat in FEATURE_CATEGORIES]
         
         # Time distribution features
         time_std = session_data['Time_Minutes'].std()
@@ -64,66 +283,267 @@ class AnomalyDetector:
         
         return features
     
-    def _prepare_training_data(self):
-        """Prepare training data from history"""
-        if not self.history:
-            return None
-        
-        X = []
-        for session in self.history:
-            features = self._extract_features(session['data'])
-            X.append(features)
-        
-        return np.array(X)
+    def _prepare_training_data(self, session_ids):
+        """Extract features for the given stored sessions in one vectorized pass over their rows"""
+        if len(session_ids) == 0:
+            return np.empty((0, len(FEATURE_NAMES)))
+        # Memory-mapped columns straight from the store, without per-session objects
+        frame = self.store.load_frame(min_session_id=int(session_ids.min()))
+        frame = frame.loc[frame['session_id'].isin(session_ids), ['session_id', 'Category', 'Time_Minutes']]
+        return session_features(frame, session_ids)
     
-    def train(self):
-        """Train the anomaly detection model"""
-        X = self._prepare_training_data()
-        if X is None or len(X) < 2:
-            return False
-        
-        # Scale the features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Train the model
-        self.model.fit(X_scaled)
-        return True
+    def _load_model(self):
+        """Load the persisted model bundle, memory-mapping its arrays"""
+        try:
+            if os.path.exists(self.model_file):
+                bundle = joblib.load(self.model_file, mmap_mode='r')
+                if bundle.get('feature_version') == FEATURE_VERSION:
+                    self.model = bundle['model']
+                    self.scaler = bundle['scaler']
+                    self.model_fingerprint = bundle['fingerprint']
+                    # Bundles saved before explanations existed have no quantiles
+                    self.feature_quantiles = bundle.get('quantiles')
+        except Exception as e:
+            print(f"Error loading anomaly model: {e}")
+        self._model_loaded = True
+    
+    def _save_model(self):
+        """Persist the fitted model and scaler with the schema version and data fingerprint"""
+        bundle = {
+            'model': self.model,
+            'scaler': self.scaler,
+            'feature_version': FEATURE_VERSION,
+            'fingerprint': self.model_fingerprint,
+            'quantiles': self.feature_quantiles,
+            'trained_at': datetime.now().strftime(TIMESTAMP_FORMAT)
+        }
+        try:
+            # Write to a temporary file first so a crash never leaves a truncated model behind
+            temp_file = self.model_file + ".tmp"
+            joblib.dump(bundle, temp_file)
+            os.replace(temp_file, self.model_file)
+        except Exception as e:
+            print(f"Error saving anomaly model: {e}")
+    
+    def _ensure_model(self):
+        """Load the saved model on first use and retrain it if the training data changed"""
+        if not self._model_loaded:
+            self._load_model()
+        if self.model_fingerprint is None or self.feature_quantiles is None:
+            # Nothing to score (or explain) with yet, so this first fit has to happen inline
+            self.train(force=self.model_fingerprint is not None)
+        elif self.model_fingerprint != self.features_fingerprint:
+            # A stale model still scores fine while the new one trains
+            if self.scheduler:
+                self.scheduler.request()
+            else:
+                self.train()
+        return self.model_fingerprint is not None
+    
+    def train(self, force=False):
+        """Train the anomaly detection model, unless it was already fitted on the same data"""
+        with self._train_lock:
+            # Snapshot the matrix; update_history replaces it rather than mutating it
+            X = self.features
+            if len(X) < 2:
+                return False
+            
+            if not self._model_loaded:
+                self._load_model()
+            fingerprint = features_fingerprint(X)
+            if fingerprint == self.model_fingerprint and not force:
+                return True
+            
+            # Fit fresh estimators; the loaded ones may be read-only memory maps
+            scaler = StandardScaler()
+            model = IsolationForest(contamination=0.1, random_state=42, n_jobs=self.n_jobs)
+            model.fit(scaler.fit_transform(X))
+            # Scoring one session at a time is faster without the worker pool
+            model.set_params(n_jobs=None)
+            
+            # Quantiles of the raw features; robust z-scores are unchanged by the scaler's
+            # affine transform, so explanations can skip it
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)  # all-NaN columns
+                quantiles = np.nan_to_num(np.nanpercentile(X, EXPLANATION_QUANTILES, axis=0))
+            
+            with self._model_lock:
+                self.model, self.scaler, self.model_fingerprint = model, scaler, fingerprint
+                self.feature_quantiles = quantiles
+            self._save_model()
+            return True
     
-    def detect_anomaly(self, current_session):
-        """Detect anomalies in the current session"""
-        if not self.history:
+    def detect_anomaly(self, current_session, timeline=None):
+        """
+        Detect anomalies in the current session.
+        
+        If the session's focus timeline (a list of [app, start, end] intervals)
+        is given, its time-of-day, switching and night-time features are also
+        compared against the profile's rolling baseline.
+        """
+        if not len(self.timestamps) or not self._ensure_model():
             return False, "Insufficient historical data for anomaly detection", 0.0
         
+        # Score with a consistent model/scaler pair even if a retrain swaps them meanwhile
+        with self._model_lock:
+            model, scaler = self.model, self.scaler
+        
         # Extract features from current session
         current_features = self._extract_features(current_session)
-        current_features_scaled = self.scaler.transform([current_features])
+        current_features_scaled = scaler.transform([current_features])
         
         # Predict anomaly
-        prediction = self.model.predict(current_features_scaled)
+        prediction = model.predict(current_features_scaled)
         is_anomaly = prediction[0] == -1
         
         # Calculate anomaly score
-        anomaly_score = self.model.score_samples(current_features_scaled)[0]
+        anomaly_score = model.score_samples(current_features_scaled)[0]
         
         # Generate anomaly description
         description = self._generate_anomaly_description(current_session, current_features)
         
+        if timeline is not None:
+            timeline_descriptions = self._timeline_deviations(extract_timeline_features(timeline))
+            if timeline_descriptions:
+                is_anomaly = True
+                if description == "Unusual pattern detected":
+                    description = " | ".join(timeline_descriptions)
+                else:
+                    description = " | ".join([description] + timeline_descriptions)
+        
         return is_anomaly, description, anomaly_score
     
+    def _timeline_deviations(self, timeline_features):
+        """Describe timeline features far outside the rolling baseline"""
+        if self.timeline_baseline.count < TIMELINE_MIN_SESSIONS:
+            return []
+        
+        zscores = self.timeline_baseline.zscores(timeline_features)
+        means = self.timeline_baseline.mean()
+        descriptions = []
+        for name, value, mean, z in zip(TIMELINE_FEATURE_NAMES, timeline_features, means, zscores):
+            if abs(z) < TIMELINE_Z_THRESHOLD:
+                continue
+            if name == 'switches_per_hour':
+                descriptions.append(f"Unusual app switching: {value:.0f} switches/hour (usually {mean:.0f})")
+            elif name == 'longest_stretch_minutes':
+                descriptions.append(f"Unusual continuous stretch: {value:.0f} minutes (usually {mean:.0f})")
+            elif name == 'night_share':
+                descriptions.append(f"Unusual night-time usage: {value:.0%} of the session (usually {mean:.0%})")
+            elif z > 0:
+                hours = name.split('_')[1:]
+                descriptions.append(f"Unusual usage between {hours[0]}:00 and {hours[1]}:00: {value:.0%} of the session")
+        return descriptions
+    
+    def score_features(self, X):
+        """
+        Score a matrix of session features in one vectorized call.
+        
+        Returns (is_anomaly, scores) arrays, or None if no model can be fitted yet.
+        """
+        if not len(self.timestamps) or not self._ensure_model():
+            return None
+        with self._model_lock:
+            model, scaler = self.model, self.scaler
+        X_scaled = scaler.transform(X)
+        return model.predict(X_scaled) == -1, model.score_samples(X_scaled)
+    
+    def close(self):
+        """Stop background retraining"""
+        if self.scheduler:
+            self.scheduler.stop()
+    
+    def explain_features(self, X, top_k=3):
+        """
+        Rank the features driving each session's anomaly.
+        
+        Each feature's contribution is its distance from the training median in
+        interquartile ranges (positive when above), using the quantiles cached
+        at training time, so no history is scanned.
+        
+        Args:
+            X: Feature matrix (one row per session) or a single feature vector
+            top_k: Number of drivers to return per session
+        
+        Returns:
+            (indices, contributions): (sessions x top_k) arrays of feature
+                indices into FEATURE_NAMES and their contributions, largest first
+        """
+        quantiles = self.feature_quantiles
+        if quantiles is None:
+            return None
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        median = quantiles[2]
+        spread = quantiles[3] - quantiles[1]
+        # Fall back to the 5-95 range (then 1) for features that barely vary
+        spread = np.where(spread > 0, spread, (quantiles[4] - quantiles[0]) / 2)
+        spread = np.where(spread > 0, spread, 1.0)
+        contributions = np.nan_to_num((X - median) / spread)
+        
+        top_k = min(top_k, X.shape[1])
+        order = np.argpartition(-np.abs(contributions), top_k - 1, axis=1)[:, :top_k]
+        top = np.take_along_axis(contributions, order, axis=1)
+        ranking = np.argsort(-np.abs(top), axis=1)
+        return np.take_along_axis(order, ranking, axis=1), np.take_along_axis(top, ranking, axis=1)
+    
+    def explain(self, current_session, top_k=3):
+        """
+        Explain one session.
+        
+        Returns:
+            list: Dicts with feature, label, value, typical (training median) and
+                contribution for the top_k drivers, or [] before the model is trained
+        """
+        if not len(self.timestamps) or not self._ensure_model():
+            return []
+        features = np.asarray(self._extract_features(current_session), dtype=np.float64)
+        return self._drivers(features, top_k)
+    
+    def _drivers(self, features, top_k=3):
+        explained = self.explain_features(features, top_k)
+        if explained is None:
+            return []
+        indices, contributions = explained
+        median = self.feature_quantiles[2]
+        return [
+            {
+                'feature': FEATURE_NAMES[i],
+                'label': FEATURE_LABELS[FEATURE_NAMES[i]],
+                'value': float(features[i]),
+                'typical': float(median[i]),
+                'contribution': float(contribution)
+            }
+            for i, contribution in zip(indices[0], contributions[0])
+        ]
+    
     def _generate_anomaly_description(self, current_session, current_features):
         """Generate a human-readable description of the anomaly"""
+        drivers = self._drivers(np.asarray(current_features, dtype=np.float64))
+        if drivers:
+            descriptions = []
+            for driver in drivers:
+                if abs(driver['contribution']) < EXPLANATION_MIN_CONTRIBUTION:
+                    continue
+                direction = "high" if driver['contribution'] > 0 else "low"
+                value, typical = driver['value'], driver['typical']
+                if driver['feature'].startswith('share_'):
+                    descriptions.append(f"Unusually {direction} {driver['label']}: {value:.0%} (typically {typical:.0%})")
+                else:
+                    descriptions.append(f"Unusually {direction} {driver['label']}: {value:.1f} (typically {typical:.1f})")
+            return " | ".join(descriptions) if descriptions else "Unusual pattern detected"
+        
+        # No cached quantiles yet: fall back to the cached means
         descriptions = []
         
-        # Compare with historical averages
-        historical_data = self._prepare_training_data()
-        if historical_data is not None:
-            avg_total_time = np.mean(historical_data[:, 0])
+        # Compare with cached historical averages
+        if self.feature_means is not None:
+            avg_total_time = self.feature_means[0]
             current_total_time = current_features[0]
             
             if current_total_time > avg_total_time * 1.5:
                 descriptions.append(f"Unusually long session duration: {current_total_time:.1f} minutes")
             
-            avg_app_count = np.mean(historical_data[:, 1])
+            avg_app_count = self.feature_means[1]
             current_app_count = current_features[1]
             
             if current_app_count > avg_app_count * 1.5:
@@ -137,22 +557,106 @@ class AnomalyDetector:
         
         return " | ".join(descriptions) if descriptions else "Unusual pattern detected"
     
-    def update_history(self, session_data, timestamp):
-        """Update tracking history with new session data"""
-        # Convert timestamp to string format
-        timestamp_str = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-        
-        self.history.append({
-            'timestamp': timestamp_str,
-            'data': session_data.to_dict('records')
-        })
+    def update_history(self, session_data, timestamp, timeline=None):
+        """Update tracking history with new session data and, if given, its focus timeline"""
+        timestamp = timestamp.replace(microsecond=0)
+        # Appending costs O(session size); the store applies the max_sessions retention
+        session_id = self.store.append(session_data, timestamp)
+        if self.store_revision is not None and self.store_revision[0] == session_id:
+            # Nothing was appended elsewhere since the last load, so the arrays stay in step with
+            # the store; otherwise the next refresh() adds the other writers' sessions
+            self.store_revision = (self.store.manifest['next_session_id'], self.store.manifest['min_session_id'])
+        # The rows live in the store; only the new session needs feature extraction
+        self.session_ids = np.append(self.session_ids, session_id)[-self.max_sessions:]
+        self.timestamps = np.append(self.timestamps, int(timestamp.timestamp()))[-self.max_sessions:]
+        self.features = np.vstack([self.features, [self._extract_features(session_data)]])[-self.max_sessions:]
+        # Set after the matrix, so a reader never pairs the new hash with the old data
+        self.features_fingerprint = features_fingerprint(self.features)
         
-        # Keep only last 100 sessions
-        if len(self.history) > 100:
-            self.history = self.history[-100:]
+        self._save_features(self.features, self.timestamps)
+        self.feature_means = self._feature_means()
         
-        self._save_history()
+        if timeline is not None:
+            self.timeline_baseline.update(extract_timeline_features(timeline))
+            self.timeline_baseline.save(self.timeline_file)
         
-        # Retrain model periodically
-        if len(self.history) % 10 == 0:  # Retrain every 10 sessions
-            self.train() 
\ No newline at end of file
+        # Retrain in the background once enough new sessions have accumulated
+        if self.scheduler:
+            self.scheduler.notify()
+        elif len(self.timestamps) % 10 == 0:
+            self.train()
+
+class RetrainScheduler:
+    """
+    Retrains an AnomalyDetector on a daemon thread so saving a session never
+    waits on IsolationForest.fit.
+    
+    Retraining is debounced: it runs once ``min_new_sessions`` sessions have
+    been added, or ``max_interval`` seconds after the first unprocessed one,
+    whichever comes first. The detector swaps the fitted model in atomically.
+    """
+    
+    def __init__(self, detector, min_new_sessions=10, max_interval=900.0):
+        self.detector = detector
+        self.min_new_sessions = min_new_sessions
+        self.max_interval = max_interval
+        self.pending = 0
+        self.first_pending_at = None
+        self.last_error = None
+        self._condition = threading.Condition()
+        self._urgent = False
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="anomaly-retrain", daemon=True)
+        self._thread.start()
+    
+    def notify(self, new_sessions=1):
+        """Record newly saved sessions"""
+        with self._condition:
+            first = self.pending == 0
+            if first:
+                self.first_pending_at = time.monotonic()
+            self.pending += new_sessions
+            # The worker sleeps without a timeout while nothing is pending, so wake it
+            # on the first session too to arm the max_interval deadline
+            if first or self.pending >= self.min_new_sessions:
+                self._condition.notify()
+    
+    def request(self):
+        """Ask for a retrain as soon as possible"""
+        with self._condition:
+            self._urgent = True
+            self._condition.notify()
+    
+    def stop(self, timeout=None):
+        """Stop the worker thread, waiting for a running fit to finish"""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout)
+    
+    def _due(self):
+        if self._urgent or self.pending >= self.min_new_sessions:
+            return True
+        return self.pending > 0 and time.monotonic() - self.first_pending_at >= self.max_interval
+    
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._due():
+                    # Sleep until notified or until the oldest pending session times out
+                    timeout = None
+                    if self.pending > 0:
+                        timeout = max(self.first_pending_at + self.max_interval - time.monotonic(), 0.0)
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+                self.pending = 0
+                self.first_pending_at = None
+                self._urgent = False
+            
+            try:
+                self.detector.train()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+                print(f"Error retraining anomaly model: {e}")
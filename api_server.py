@@ -0,0 +1,353 @@
+"""
+Local JSON/HTTP API over the session store, for the web frontend and other dashboards.
+
+Usage:
+    python api_server.py --port 8765
+
+Endpoints (all GET, all take optional ?profile= and ?device=):
+    /api/profiles            Profiles and their app limits
+    /api/current             The tracker daemon's open session
+    /api/daily?days=30       Per-day totals, split by category
+    /api/apps?days=7&top=20  Per-application totals
+    /api/limits              Today's usage against each app limit
+    /api/stream              Server-sent events from the trackers (?types=focus_change,...)
+    POST /api/events         Trackers push a JSON list of events here
+
+Every response carries an ETag built from the on-disk state it was computed
+from (store manifest, tracker snapshot, profiles.json). A client repeating
+the request with If-None-Match gets a 304 without any aggregation, and
+computed bodies are kept in memory so other clients polling the same URL
+get the cached body until the data changes. File state is checked at most
+once per ``ttl`` seconds per URL.
+
+Live events are fanned out through an EventBus: every stream client has
+its own bounded buffer, so a stalled browser tab loses its oldest events
+rather than slowing the trackers or the other clients.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from aiohttp import web
+
+from event_bus import EventBus
+from session_store import MANIFEST_FILE, SessionStore
+from tracker.daemon import CURRENT_FILE
+from utils import DEFAULT_DEVICE, MODELS_DIR, PROFILES_FILE, get_display_name, load_profiles, session_store_dir
+
+logger = logging.getLogger(__name__)
+
+class UsageAPI:
+    """
+    Aggregates for the HTTP handlers, with a per-URL response cache.
+
+    Stores are found the same way the tracker daemon writes them: one
+    ``tracking_history_sessions`` store per profile under the anomaly model
+    shard of the device.
+    """
+
+    def __init__(self, base_dir=MODELS_DIR, spool_dir="tracker_spool", ttl=2.0, max_cached=1024):
+        """
+        Args:
+            base_dir: Anomaly model directory holding the per-device/profile stores
+            spool_dir: The tracker daemon's spool directory (for the open session)
+            ttl: Seconds a cached response is served without checking the files
+            max_cached: Maximum number of cached responses
+        """
+        self.base_dir = base_dir
+        self.spool_dir = spool_dir
+        self.ttl = ttl
+        self.max_cached = max_cached
+        self.stores = {}
+        self.cache = {}  # URL -> {'version', 'etag', 'body', 'checked'}
+        self.pending = {}  # URL -> future of an aggregation already running
+
+    def _store(self, profile, device):
+        key = (profile, device)
+        if key not in self.stores:
+            self.stores[key] = SessionStore(session_store_dir(profile, device, self.base_dir))
+        return self.stores[key]
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def version(self, endpoint, profile, device):
+        """The file state an endpoint's response depends on"""
+        store_dir = session_store_dir(profile, device, self.base_dir)
+        parts = [self._mtime(PROFILES_FILE)]
+        if endpoint in ('daily', 'apps', 'limits'):
+            parts.append(self._mtime(os.path.join(store_dir, MANIFEST_FILE)))
+        if endpoint in ('current', 'limits'):
+            parts.append(self._mtime(os.path.join(self.spool_dir, CURRENT_FILE)))
+        if endpoint in ('daily', 'limits'):
+            parts.append(datetime.now().date().isoformat())  # "today" moves at midnight
+        return repr(parts)
+
+    def _resolve(self, query):
+        profiles = load_profiles()
+        profile = query.get('profile') or next(
+            (key for key, value in profiles.items() if value.get('is_default')), 'kids')
+        if profile not in profiles:
+            raise web.HTTPNotFound(text=json.dumps({'error': f"Unknown profile '{profile}'"}),
+                                   content_type='application/json')
+        return profiles, profile, query.get('device') or DEFAULT_DEVICE
+
+    def _usage(self, profile, device, since=None):
+        """Application rows of the stored sessions (optionally since a datetime), with their timestamps"""
+        store = self._store(profile, device)
+        index = store.session_index()
+        rows = store.load_table()
+        if since is not None:
+            # Sessions can be appended late (the daemon's spool after direct saves), so timestamps
+            # don't grow with the session id: select the recent sessions by mask, not by bisection
+            recent = index['session_id'][index['timestamp'] >= since.timestamp()]
+            if len(recent):
+                rows = rows.filter(pc.greater_equal(rows.column('session_id'), int(recent[0])))
+                if len(recent) <= int(recent[-1]) - int(recent[0]):
+                    # Older sessions are interleaved with the recent ones
+                    rows = rows.filter(pc.is_in(rows.column('session_id'), value_set=pa.array(recent)))
+            else:
+                rows = rows.slice(0, 0)
+        frame = rows.select(['session_id', 'Application', 'Category', 'Time_Seconds']).to_pandas()
+        positions = np.searchsorted(index['session_id'], frame['session_id'].to_numpy())
+        frame['timestamp'] = index['timestamp'][positions] if len(frame) else np.array([], dtype=np.int64)
+        return frame
+
+    @staticmethod
+    def _local_dates(timestamps):
+        """Local calendar dates of epoch timestamps, converting each distinct session time once"""
+        dates = {stamp: time.strftime('%Y-%m-%d', time.localtime(stamp)) for stamp in timestamps.unique()}
+        return timestamps.map(dates)
+
+    def _current(self, profile, device):
+        try:
+            with open(os.path.join(self.spool_dir, CURRENT_FILE), 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get('profile') != profile or snapshot.get('device') != device:
+            return None
+        return snapshot
+
+    def compute(self, endpoint, query):
+        """Build the JSON-serializable body for one endpoint"""
+        profiles, profile, device = self._resolve(query)
+
+        if endpoint == 'profiles':
+            return {key: {'name': value.get('name', key),
+                          'is_default': bool(value.get('is_default')),
+                          'app_limits': [{'application': app, 'display_name': get_display_name(app),
+                                          'limit_minutes': minutes}
+                                         for app, minutes in value.get('app_limits', {}).items()]}
+                    for key, value in profiles.items()}
+
+        if endpoint == 'current':
+            snapshot = self._current(profile, device)
+            return {'profile': profile, 'device': device, 'session': snapshot}
+
+        if endpoint == 'daily':
+            days = int(query.get('days', 30))
+            since = datetime.combine(datetime.now().date() - timedelta(days=days - 1), datetime.min.time())
+            frame = self._usage(profile, device, since)
+            result = []
+            if len(frame):
+                frame['date'] = self._local_dates(frame['timestamp'])
+                frame['minutes'] = frame['Time_Seconds'] / 60
+                sessions = frame.groupby('date')['session_id'].nunique()
+                by_category = frame.pivot_table(index='date', columns='Category', values='minutes',
+                                                aggfunc='sum', fill_value=0)
+                for date, categories in by_category.iterrows():
+                    result.append({'date': date, 'total_minutes': round(float(categories.sum()), 2),
+                                   'sessions': int(sessions[date]),
+                                   'categories': {category: round(float(minutes), 2)
+                                                  for category, minutes in categories.items() if minutes}})
+            return {'profile': profile, 'device': device, 'days': result}
+
+        if endpoint == 'apps':
+            days = query.get('days')
+            since = (datetime.combine(datetime.now().date() - timedelta(days=int(days) - 1), datetime.min.time())
+                     if days else None)
+            frame = self._usage(profile, device, since)
+            totals = frame.groupby(['Application', 'Category'], sort=False).agg(
+                seconds=('Time_Seconds', 'sum'), sessions=('session_id', 'nunique')
+            ).reset_index().sort_values('seconds', ascending=False).head(int(query.get('top', 20)))
+            return {'profile': profile, 'device': device, 'apps': [
+                {'application': row.Application, 'display_name': get_display_name(row.Application),
+                 'category': row.Category, 'minutes': round(row.seconds / 60, 2), 'sessions': int(row.sessions)}
+                for row in totals.itertuples()
+            ]}
+
+        if endpoint == 'limits':
+            limits = profiles[profile].get('app_limits', {})
+            today = datetime.combine(datetime.now().date(), datetime.min.time())
+            frame = self._usage(profile, device, today)
+            seconds = frame[frame['Application'].isin(limits)].groupby('Application')['Time_Seconds'].sum()
+            seconds = {app: float(value) for app, value in seconds.items()}
+            snapshot = self._current(profile, device)
+            if snapshot:
+                for row in snapshot['data']:
+                    if row['Application'] in limits:
+                        seconds[row['Application']] = seconds.get(row['Application'], 0.0) + row['Time_Seconds']
+            return {'profile': profile, 'device': device, 'limits': [
+                {'application': app, 'display_name': get_display_name(app), 'limit_minutes': minutes,
+                 'used_minutes': round(seconds.get(app, 0.0) / 60, 2),
+                 'exceeded': seconds.get(app, 0.0) / 60 >= minutes}
+                for app, minutes in limits.items()
+            ]}
+
+        raise web.HTTPNotFound()
+
+    async def respond(self, request, endpoint):
+        """Serve an endpoint from the cache, as a 304, or by computing it in a worker thread"""
+        key = request.path_qs
+        now = time.monotonic()
+        entry = self.cache.get(key)
+        if entry is None or now - entry['checked'] >= self.ttl:
+            profile, device = request.query.get('profile'), request.query.get('device') or DEFAULT_DEVICE
+            if profile is None:
+                profile = self._resolve(request.query)[1]
+            version = self.version(endpoint, profile, device)
+            if entry is not None and entry['version'] == version:
+                entry['checked'] = now
+            else:
+                entry = await self._refresh(key, endpoint, request.query, version)
+
+        if entry['etag'] in request.headers.get('If-None-Match', ''):
+            return web.Response(status=304, headers={'ETag': entry['etag']})
+        return web.Response(body=entry['body'], content_type='application/json',
+                            headers={'ETag': entry['etag'], 'Cache-Control': 'no-cache'})
+
+    async def _refresh(self, key, endpoint, query, version):
+        # Concurrent requests for the same URL share one aggregation
+        future = self.pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self.pending[key] = loop.run_in_executor(None, self.compute, endpoint, query)
+            try:
+                body = json.dumps(await future).encode()
+            finally:
+                del self.pending[key]
+            entry = {
+                'version': version,
+                'etag': '"' + hashlib.sha1(body).hexdigest()[:20] + '"',
+                'body': body,
+                'checked': time.monotonic(),
+            }
+            if key not in self.cache and len(self.cache) >= self.max_cached:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = entry
+            return entry
+        await future
+        return self.cache[key]
+
+KEEPALIVE_SECONDS = 15.0
+MAX_EVENTS_PER_POST = 1000
+
+def create_app(api=None, allow_origin="*", bus=None):
+    """Build the aiohttp application; ``allow_origin`` is sent as the CORS origin for the frontend"""
+    api = api or UsageAPI()
+    bus = bus or EventBus()
+    cors_headers = {'Access-Control-Allow-Origin': allow_origin, 'Access-Control-Expose-Headers': 'ETag'}
+
+    @web.middleware
+    async def cors(request, handler):
+        response = await handler(request)
+        if not response.prepared:  # Streams send their headers themselves
+            response.headers.update(cors_headers)
+        return response
+
+    async def receive_events(request):
+        try:
+            events = await request.json()
+        except ValueError:
+            raise web.HTTPBadRequest(text='{"error": "Expected a JSON list of events"}', content_type='application/json')
+        if isinstance(events, dict):
+            events = [events]
+        if not isinstance(events, list) or len(events) > MAX_EVENTS_PER_POST:
+            raise web.HTTPBadRequest(text='{"error": "Expected a JSON list of events"}', content_type='application/json')
+        published = 0
+        for event in events:
+            if isinstance(event, dict) and isinstance(event.get('type'), str):
+                bus.publish(event)
+                published += 1
+        return web.json_response({'published': published})
+
+    async def stream(request):
+        profile, device = request.query.get('profile'), request.query.get('device')
+        types = set(request.query['types'].split(',')) if request.query.get('types') else None
+
+        def wanted(event):
+            return ((profile is None or event.get('profile') == profile)
+                    and (device is None or event.get('device') == device)
+                    and (types is None or event.get('type') in types))
+
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache', **cors_headers
+        })
+        await response.prepare(request)
+        subscription = bus.subscribe(wanted)
+        try:
+            await response.write(b"retry: 2000\n\n")
+            while True:
+                event = await subscription.get(timeout=KEEPALIVE_SECONDS)
+                if event is None:
+                    await response.write(b": keep-alive\n\n")
+                    continue
+                dropped = subscription.take_dropped()
+                if dropped:
+                    await response.write(f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n".encode())
+                await response.write(
+                    f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+                )
+        except ConnectionResetError:
+            pass  # The client went away
+        finally:
+            subscription.close()
+        return response
+
+    def handler(endpoint):
+        async def handle(request):
+            try:
+                return await api.respond(request, endpoint)
+            except ValueError as e:
+                raise web.HTTPBadRequest(text=json.dumps({'error': str(e)}), content_type='application/json')
+        return handle
+
+    app = web.Application(middlewares=[cors])
+    app['api'] = api
+    app['bus'] = bus
+    for endpoint in ('profiles', 'current', 'daily', 'apps', 'limits'):
+        app.router.add_get(f"/api/{endpoint}", handler(endpoint))
+    app.router.add_post("/api/events", receive_events)
+    app.router.add_get("/api/stream", stream)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve screen time usage as JSON")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--base-dir", default=MODELS_DIR)
+    parser.add_argument("--spool-dir", default="tracker_spool")
+    parser.add_argument("--ttl", type=float, default=2.0, help="Seconds between checks for new data")
+    parser.add_argument("--allow-origin", default="*", help="CORS origin allowed to call the API")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    api = UsageAPI(args.base_dir, args.spool_dir, ttl=args.ttl)
+    web.run_app(create_app(api, args.allow_origin), host=args.host, port=args.port, access_log=None)
+
+if __name__ == "__main__":
+    main()
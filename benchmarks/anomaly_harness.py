@@ -0,0 +1,219 @@
+"""
+Measure anomaly detector speed and accuracy on synthetic household traces.
+
+Usage:
+    python benchmarks/anomaly_harness.py --households 20 --weeks 6 --min-f1 0.3
+
+Every household's first --train-weeks of sessions form its history; the
+remaining weeks are scored one session at a time. For each detector the
+harness reports training time, per-session scoring latency, peak traced
+memory (measured in a separate pass on the first household, since tracing
+slows everything down) and precision/recall/F1 against the injected anomalies (overall
+and per anomaly type). With --min-precision/--min-recall/--min-f1 it
+exits non-zero when a detector falls below the gate, so it can guard
+detector changes. Everything runs offline.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add the parent directory to the Python path so we can import the detectors
+parent_dir = str(Path(__file__).parent.parent)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from anomaly_detector import AnomalyDetector
+from session_store import SessionStore
+from streaming_detector import StreamingAnomalyDetector
+from synthetic_households import ANOMALY_TYPES, ARCHETYPES, generate_households
+from timeline_features import RollingBaseline, extract_timeline_features
+from utils import categorize_app
+
+
+class IsolationForestDetector:
+    """The end-of-session AnomalyDetector, optionally with the timeline baseline."""
+
+    def __init__(self, work_dir, use_timeline=False):
+        self.work_dir = work_dir
+        self.use_timeline = use_timeline
+
+    def fit(self, sessions):
+        # Write the history the way the tracker leaves it, then time a cold start + fit
+        history_file = str(Path(self.work_dir) / "tracking_history.json")
+        SessionStore(str(Path(self.work_dir) / "tracking_history_sessions")).append_many(
+            (session['timestamp'], session['data']) for session in sessions
+        )
+        if self.use_timeline:
+            baseline = RollingBaseline()
+            for session in sessions:
+                baseline.update(extract_timeline_features(session['timeline']))
+            baseline.save(str(Path(self.work_dir) / "tracking_history_timeline.npz"))
+
+        self.detector = AnomalyDetector(history_file, max_sessions=len(sessions), background_training=False)
+        self.detector.train()
+
+    def score(self, session):
+        is_anomaly, _, _ = self.detector.detect_anomaly(
+            pd.DataFrame(session['data']),
+            timeline=session['timeline'] if self.use_timeline else None
+        )
+        return bool(is_anomaly)
+
+
+class StreamingDetector:
+    """The live StreamingAnomalyDetector replayed over each session's focus timeline."""
+
+    def __init__(self, work_dir, sample_seconds=5.0):
+        self.sample_seconds = sample_seconds
+
+    def _replay(self, session):
+        alerted = False
+        for app, start, end in session['timeline']:
+            category = categorize_app(app)
+            for timestamp in np.arange(start, end, self.sample_seconds):
+                alerted |= bool(self.detector.update(category, float(timestamp)))
+        return alerted
+
+    def fit(self, sessions):
+        self.detector = StreamingAnomalyDetector(max_sample_seconds=self.sample_seconds)
+        for session in sessions:
+            self._replay(session)
+
+    def score(self, session):
+        return self._replay(session)
+
+
+DETECTORS = {
+    'iforest': lambda work_dir: IsolationForestDetector(work_dir),
+    'iforest+timeline': lambda work_dir: IsolationForestDetector(work_dir, use_timeline=True),
+    'streaming': lambda work_dir: StreamingDetector(work_dir),
+}
+
+
+def _scores(labels, predictions):
+    labels, predictions = np.asarray(labels, bool), np.asarray(predictions, bool)
+    true_positives = int((labels & predictions).sum())
+    precision = true_positives / max(int(predictions.sum()), 1)
+    recall = true_positives / max(int(labels.sum()), 1)
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+def _split(sessions, train_weeks):
+    split = sessions[0]['timestamp'] + pd.Timedelta(weeks=train_weeks)
+    return ([session for session in sessions if session['timestamp'] < split],
+            [session for session in sessions if session['timestamp'] >= split])
+
+
+def _peak_memory(name, sessions, train_weeks):
+    """Peak bytes allocated while fitting and scoring one household."""
+    train, test = _split(sessions, train_weeks)
+    work_dir = tempfile.mkdtemp(prefix="anomaly_harness_")
+    try:
+        tracemalloc.start()
+        detector = DETECTORS[name](work_dir)
+        detector.fit(train)
+        for session in test:
+            detector.score(session)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def evaluate(name, households, train_weeks):
+    """Fit and score one detector on every household."""
+    train_seconds, latencies = [], []
+    labels, predictions, kinds = [], [], []
+    for _, sessions in households:
+        train, test = _split(sessions, train_weeks)
+        work_dir = tempfile.mkdtemp(prefix="anomaly_harness_")
+        try:
+            detector = DETECTORS[name](work_dir)
+            started = time.perf_counter()
+            detector.fit(train)
+            train_seconds.append(time.perf_counter() - started)
+
+            for session in test:
+                started = time.perf_counter()
+                predictions.append(detector.score(session))
+                latencies.append(time.perf_counter() - started)
+                labels.append(session['is_anomaly'])
+                kinds.append(session['anomaly_type'])
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    precision, recall, f1 = _scores(labels, predictions)
+    per_type = {}
+    for kind in ANOMALY_TYPES:
+        selected = [i for i, k in enumerate(kinds) if k == kind]
+        if selected:
+            per_type[kind] = float(np.mean([predictions[i] for i in selected]))
+    return {
+        'detector': name,
+        'train_s': float(np.mean(train_seconds)),
+        'score_p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'score_p95_ms': float(np.percentile(latencies, 95) * 1000),
+        'peak_mb': _peak_memory(name, households[0][1], train_weeks) / 2 ** 20,
+        'precision': precision,
+        'recall': recall,
+        'f1': f1,
+        'false_positive_rate': float(np.mean([p for p, l in zip(predictions, labels) if not l])),
+        'recall_by_type': per_type,
+        'test_sessions': len(labels),
+        'test_anomalies': int(np.sum(labels)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark anomaly detectors on synthetic households")
+    parser.add_argument("--households", type=int, default=20)
+    parser.add_argument("--weeks", type=int, default=6)
+    parser.add_argument("--train-weeks", type=int, default=4)
+    parser.add_argument("--anomaly-rate", type=float, default=0.05)
+    parser.add_argument("--archetypes", nargs="+", choices=list(ARCHETYPES))
+    parser.add_argument("--detectors", nargs="+", choices=list(DETECTORS), default=list(DETECTORS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--min-precision", type=float, default=0.0)
+    parser.add_argument("--min-recall", type=float, default=0.0)
+    parser.add_argument("--min-f1", type=float, default=0.0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+    if args.households < 1:
+        parser.error("--households must be at least 1")
+    if not 1 <= args.train_weeks < args.weeks:
+        parser.error("--train-weeks must be at least 1 and below --weeks, or no session is left to score")
+
+    households = generate_households(args.households, args.weeks, args.seed, args.anomaly_rate, args.archetypes)
+    results = [evaluate(name, households, args.train_weeks) for name in args.detectors]
+
+    print(f"{'detector':<18}{'train s':>9}{'p50 ms':>9}{'p95 ms':>9}{'peak MB':>9}"
+          f"{'prec':>7}{'recall':>8}{'F1':>7}{'FPR':>7}")
+    failed = False
+    for result in results:
+        print(f"{result['detector']:<18}{result['train_s']:>9.3f}{result['score_p50_ms']:>9.2f}"
+              f"{result['score_p95_ms']:>9.2f}{result['peak_mb']:>9.1f}{result['precision']:>7.2f}"
+              f"{result['recall']:>8.2f}{result['f1']:>7.2f}{result['false_positive_rate']:>7.2f}")
+        print(" " * 18 + "recall by type: " + ", ".join(
+            f"{kind} {value:.2f}" for kind, value in result['recall_by_type'].items()))
+        failed |= (result['precision'] < args.min_precision or result['recall'] < args.min_recall
+                   or result['f1'] < args.min_f1)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+    if failed:
+        print("FAIL: a detector fell below the precision/recall/F1 gate")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
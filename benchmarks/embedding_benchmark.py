@@ -0,0 +1,120 @@
+"""
+Compare embedding throughput, memory and accuracy across embedding runtimes.
+
+Usage:
+    python benchmarks/embedding_benchmark.py --export --runtimes torch int8 onnx-int8
+
+Each runtime is loaded in a fresh process so resident memory is comparable.
+Accuracy is the cosine similarity against the fp32 sentence-transformers vectors.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the Python path so we can import embedding_runtime
+parent_dir = str(Path(__file__).parent.parent)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+CATEGORIES = ["Development", "Office", "Entertainment", "Communication", "Browsers"]
+APPS = ["chrome.exe", "Code.exe", "spotify.exe", "discord.exe", "WINWORD.EXE", "steam.exe"]
+
+
+def make_texts(count):
+    """Weekly-summary-like texts of varying length."""
+    texts = []
+    for i in range(count):
+        apps = {APPS[(i + j) % len(APPS)]: round(10 + (i * 7 + j * 13) % 200, 1) for j in range(1 + i % 5)}
+        texts.append(
+            f"Weekly Usage Summary: Total Usage Time: {sum(apps.values()):.1f} minutes - "
+            f"Category Distribution: {{'{CATEGORIES[i % len(CATEGORIES)]}': {(i * 3) % 300}}} - "
+            f"Top Applications: {apps}"
+        )
+    return texts
+
+
+def run_single(runtime, count, parity):
+    """Measure one runtime in this process and print the result as JSON."""
+    import numpy as np
+    import psutil
+    from embedding_runtime import create_embeddings
+
+    process = psutil.Process()
+    baseline_rss = process.memory_info().rss
+    texts = make_texts(count)
+
+    started = time.perf_counter()
+    embeddings = create_embeddings(runtime)
+    load_seconds = time.perf_counter() - started
+
+    embeddings.embed_documents(texts[:8])  # warm-up
+    started = time.perf_counter()
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    encode_seconds = time.perf_counter() - started
+
+    if parity:
+        np.save(parity, vectors)
+    print(json.dumps({
+        "runtime": runtime,
+        "load_s": load_seconds,
+        "texts_per_s": count / encode_seconds,
+        "rss_mb": (process.memory_info().rss - baseline_rss) / 2 ** 20,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark embedding runtimes")
+    parser.add_argument("--runtimes", nargs="+", default=["torch", "int8", "onnx", "onnx-int8"])
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--export", action="store_true", help="Export the ONNX models first")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    parser.add_argument("--vectors-out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        run_single(args.single, args.texts, args.vectors_out)
+        return
+
+    import numpy as np
+    from embedding_runtime import export_onnx_model
+
+    if args.export:
+        export_onnx_model()
+
+    runtimes = ["torch"] + [runtime for runtime in args.runtimes if runtime != "torch"]
+    results = {}
+    out_dir = Path(parent_dir) / "benchmarks"
+    for runtime in runtimes:
+        vectors_path = out_dir / f".vectors_{runtime}.npy"
+        output = subprocess.run(
+            [sys.executable, __file__, "--single", runtime, "--texts", str(args.texts),
+             "--vectors-out", str(vectors_path)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        results[runtime] = json.loads(output.strip().splitlines()[-1])
+        results[runtime]["vectors"] = np.load(vectors_path)
+        vectors_path.unlink()
+
+    reference = results["torch"]
+    print(f"{'runtime':<11}{'load s':>8}{'texts/s':>10}{'speedup':>9}{'RSS MB':>9}{'min cos':>9}{'mean cos':>10}")
+    failed = False
+    for runtime in runtimes:
+        result = results[runtime]
+        a, b = result["vectors"], reference["vectors"]
+        cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+        failed |= bool(cosine.min() < args.min_cosine)
+        print(f"{runtime:<11}{result['load_s']:>8.2f}{result['texts_per_s']:>10.0f}"
+              f"{result['texts_per_s'] / reference['texts_per_s']:>8.2f}x{result['rss_mb']:>9.0f}"
+              f"{cosine.min():>9.4f}{cosine.mean():>10.4f}")
+
+    if failed:
+        print(f"FAIL: a runtime fell below the {args.min_cosine} cosine parity threshold")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Import-time regression check for the analyzer modules.
+
+Usage:
+    python benchmarks/import_time.py --budget-ms 1500
+
+Runs ``python -X importtime`` in a fresh interpreter for each module, prints
+the slowest imports and exits non-zero when a module exceeds the budget or
+pulls in part of the ML stack that should only load on first use.
+tests/test_import_time.py runs the same check with the default budget.
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_DIR = Path(__file__).parent.parent
+
+MODULES = ["rag_analyzer", "ai_analyzer"]
+DEFAULT_BUDGET_MS = 1500.0
+
+# Packages that must stay out of the import graph until they are actually used
+DEFERRED_PACKAGES = [
+    "sentence_transformers",
+    "torch",
+    "faiss",
+    "chromadb",
+    "langchain",
+    "google.generativeai",
+    "streamlit",
+]
+
+
+def measure(module):
+    """Return ``(total_us, {package: cumulative_us})`` for importing ``module``."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+
+    imports = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # column header
+        imports[name.strip()] = int(cumulative)
+        # Top-level imports are not indented; their cumulative times add up to the total
+        if not name[1:].startswith(" "):
+            total_us += int(cumulative)
+    return total_us, imports
+
+
+def check(module, budget_ms=DEFAULT_BUDGET_MS):
+    """
+    Import ``module`` in a fresh interpreter and list what is wrong with it.
+
+    Returns ``(total_us, imports, failures)``; failures is empty when the
+    module stays within the budget and imports no deferred package.
+    """
+    total_us, imports = measure(module)
+    failures = []
+    if total_us / 1000 > budget_ms:
+        failures.append(f"{module} took {total_us / 1000:.1f} ms")
+    eager = sorted(name for name in imports
+                   if any(name == pkg or name.startswith(pkg + ".") for pkg in DEFERRED_PACKAGES))
+    if eager:
+        failures.append(f"{module} eagerly imports {', '.join(eager[:5])}")
+    return total_us, imports, failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check analyzer import time against a budget")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        total_us, imports, module_failures = check(module, args.budget_ms)
+        print(f"{module}: {total_us / 1000:.1f} ms (budget {args.budget_ms:.0f} ms)")
+        for name, cumulative in sorted(imports.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+        failures.extend(module_failures)
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
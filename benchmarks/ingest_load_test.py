@@ -0,0 +1,218 @@
+"""
+Load test of the ingest server with many simulated tracker agents on one machine.
+
+Usage:
+    python benchmarks/ingest_load_test.py --agents 1000 --rounds 5
+
+Starts ingest_server.py on a free port with a temporary store (or targets
+--url), then runs every agent as an asyncio task that uploads ``--rounds``
+gzip'd batches in the real tracker.upload format, one per ``--interval``
+seconds with jitter. Some acknowledged batches are sent again
+(``--resend``) to simulate lost acknowledgements. Failed uploads are
+retried with backoff, like BatchUploader does.
+
+Reports upload latency, throughput, the server's group-commit counters and
+the time of a fleet summary query, and checks that the stores hold exactly
+one copy of every session.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import aiohttp
+import numpy as np
+
+# Add the parent directory to the Python path so we can import the tracker modules
+parent_dir = str(Path(__file__).parent.parent)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+from tracker.upload import encode_batch
+
+APPS = ['chrome.exe', 'code.exe', 'discord.exe', 'spotify.exe', 'WINWORD.EXE', 'steam.exe', 'teams.exe', 'firefox.exe']
+PROFILES = ['kids', 'parent']
+
+
+def make_batches(agent, rounds, sessions_per_batch, rng):
+    """The (batch id, body, sessions per profile) uploads of one agent"""
+    device = f"agent-{agent:05d}"
+    batches = []
+    for round_number in range(rounds):
+        records = []
+        for i in range(sessions_per_batch):
+            apps = rng.sample(APPS, rng.randint(1, 5))
+            records.append({
+                'timestamp': f"2026-10-{1 + round_number % 28:02d} {8 + i % 12:02d}:{rng.randint(0, 59):02d}:00",
+                'profile': rng.choice(PROFILES),
+                'data': [{'Application': app, 'Time_Seconds': rng.randint(5, 900),
+                          'Window_Titles': f"{app} window {rng.randint(0, 20)}"} for app in apps],
+            })
+        batch_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{device}/{round_number}"))
+        counts = {profile: sum(record['profile'] == profile for record in records) for profile in PROFILES}
+        batches.append((batch_id, encode_batch(batch_id, device, records), counts))
+    return device, batches
+
+
+async def post(session, url, body, latencies, counters):
+    """Upload one batch until it is acknowledged"""
+    backoff = 0.1
+    while True:
+        started = time.perf_counter()
+        try:
+            async with session.post(url, data=body, headers={
+                'Content-Type': 'application/json', 'Content-Encoding': 'gzip'
+            }) as response:
+                result = await response.json() if response.status == 200 else None
+                latencies.append(time.perf_counter() - started)
+                if result is not None:
+                    counters['duplicates' if result['duplicate'] else 'stored'] += 1
+                    return
+                counters['errors'] += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            counters['errors'] += 1
+        await asyncio.sleep(backoff * random.uniform(0.5, 1.5))
+        backoff = min(backoff * 2, 5.0)
+
+
+async def run_agent(session, url, batches, interval, resend, rng, latencies, counters):
+    # Agents come online at different times within the first interval
+    await asyncio.sleep(rng.uniform(0, interval))
+    for _, body, _ in batches:
+        await post(session, url, body, latencies, counters)
+        if rng.random() < resend:
+            await post(session, url, body, latencies, counters)
+        await asyncio.sleep(interval * rng.uniform(0.8, 1.2))
+
+
+async def run_load(url, agents, interval, resend, connections, timeout, seed):
+    latencies, counters = [], {'stored': 0, 'duplicates': 0, 'errors': 0}
+    connector = aiohttp.TCPConnector(limit=connections)
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=timeout)) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            run_agent(session, url, batches, interval, resend, random.Random(seed + i), latencies, counters)
+            for i, (_, batches) in enumerate(agents)
+        ))
+        elapsed = time.perf_counter() - started
+        async with session.get(url.rsplit('/', 1)[0] + "/stats") as response:
+            stats = await response.json()
+        fleet_started = time.perf_counter()
+        async with session.get(url.rsplit('/', 1)[0] + "/fleet", params={'top': 3}) as response:
+            fleet = await response.json()
+        fleet['seconds'] = time.perf_counter() - fleet_started
+    return elapsed, latencies, counters, stats, fleet
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_server(port, deadline=30.0):
+    started = time.time()
+    while time.time() - started < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Ingest server did not start")
+
+
+def count_stored(base_dir, agents):
+    """Sessions per (device, profile) shard as stored by the server"""
+    from session_store import SessionStore
+    from utils import session_store_dir
+    stored = {}
+    for device, _ in agents:
+        for profile in PROFILES:
+            store_dir = session_store_dir(profile, device, base_dir)
+            stored[(device, profile)] = len(SessionStore(store_dir)) if os.path.isdir(store_dir) else 0
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--agents", type=int, default=1000)
+    parser.add_argument("--rounds", type=int, default=5, help="Batches uploaded by every agent")
+    parser.add_argument("--sessions", type=int, default=8, help="Sessions per batch")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between an agent's uploads")
+    parser.add_argument("--resend", type=float, default=0.1, help="Fraction of batches sent twice")
+    parser.add_argument("--connections", type=int, default=500, help="Concurrent connections to the server")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds before an upload is retried")
+    parser.add_argument("--url", help="Target a running server instead of starting one (skips the store check)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    agents = [make_batches(agent, args.rounds, args.sessions, rng) for agent in range(args.agents)]
+    payload = sum(len(body) for _, batches in agents for _, body, _ in batches)
+    print(f"Prepared {args.agents * args.rounds} batches ({payload / 1e6:.1f} MB gzip) "
+          f"in {time.perf_counter() - started:.1f}s")
+
+    base_dir, server = None, None
+    url = args.url
+    if url is None:
+        base_dir = tempfile.mkdtemp(prefix="ingest_load_")
+        port = free_port()
+        server = subprocess.Popen([sys.executable, os.path.join(parent_dir, "ingest_server.py"), "--host", "127.0.0.1",
+                                   "--port", str(port), "--base-dir", base_dir], cwd=parent_dir,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{port}/ingest/batches"
+    try:
+        if server is not None:
+            wait_for_server(port)
+        elapsed, latencies, counters, stats, fleet = asyncio.run(run_load(
+            url, agents, args.interval, args.resend, args.connections, args.timeout, args.seed
+        ))
+        latencies = np.array(latencies) * 1000
+        sessions = args.agents * args.rounds * args.sessions
+        print(f"{args.agents} agents: {counters['stored']} batches stored, {counters['duplicates']} duplicates "
+              f"acknowledged, {counters['errors']} failed attempts in {elapsed:.1f}s")
+        print(f"Throughput: {len(latencies) / elapsed:.0f} uploads/s, {sessions / elapsed:.0f} sessions/s")
+        print(f"Latency ms: p50 {np.percentile(latencies, 50):.1f}  p95 {np.percentile(latencies, 95):.1f}  "
+              f"p99 {np.percentile(latencies, 99):.1f}  max {latencies.max():.1f}")
+        commits = max(stats['commits'], 1)
+        print(f"Server: {stats['commits']} group commits, {stats['batches'] / commits:.1f} batches per commit "
+              f"(max {stats['max_group']}), {stats['commit_seconds'] / commits * 1000:.1f} ms per commit")
+        print(f"Fleet summary over {fleet['device_days']} device-days in {fleet['seconds'] * 1000:.0f} ms: "
+              f"{fleet['sessions']} sessions, {fleet['distinct_apps']} distinct apps, "
+              f"top {[app['application'] for app in fleet['top_apps']]}, "
+              f"median session {fleet['session_minutes']['p50']:.1f} min")
+
+        if base_dir is not None:
+            expected = {}
+            for device, batches in agents:
+                for _, _, counts in batches:
+                    for profile, count in counts.items():
+                        expected[(device, profile)] = expected.get((device, profile), 0) + count
+            stored = count_stored(base_dir, agents)
+            wrong = [shard for shard in expected if stored[shard] != expected[shard]]
+            print(f"Store check: {sum(stored.values())} of {sum(expected.values())} sessions stored, "
+                  f"{len(wrong)} shards with missing or duplicate sessions")
+            if wrong:
+                print(json.dumps({f"{device}/{profile}": [stored[(device, profile)], expected[(device, profile)]]
+                                  for device, profile in wrong[:10]}))
+                sys.exit(1)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if base_dir is not None:
+            shutil.rmtree(base_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+Synthetic multi-week usage traces for households of different archetypes.
+
+Each trace is a list of sessions shaped like the ones the tracker saves:
+    {'profile', 'device', 'timestamp', 'data', 'timeline', 'is_anomaly', 'anomaly_type'}
+where 'data' holds track_screen_time's row dicts and 'timeline' the focus
+intervals. A fraction of sessions is replaced by injected anomalies
+(night binges, marathons, app storms and category shifts) so detectors can
+be scored for precision and recall.
+
+Usage:
+    python benchmarks/synthetic_households.py --households 3 --weeks 2
+"""
+import argparse
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+
+APPS = {
+    'Development': ['code.exe', 'pycharm64.exe', 'GitHubDesktop.exe'],
+    'Office': ['WINWORD.EXE', 'EXCEL.EXE', 'OUTLOOK.EXE'],
+    'Entertainment': ['spotify.exe', 'vlc.exe', 'steam.exe'],
+    'Communication': ['teams.exe', 'discord.exe', 'whatsapp.exe'],
+    'Browsers': ['chrome.exe', 'firefox.exe', 'msedge.exe'],
+}
+
+# hours: start hours sessions are drawn from; minutes: mean session length;
+# stretch: mean minutes before switching apps; categories: time weights
+ARCHETYPES = {
+    'student': {
+        'profile': 'kids', 'sessions_per_day': 3, 'hours': [15, 16, 17, 18, 19, 20],
+        'minutes': 45, 'stretch': 6, 'apps': (2, 5),
+        'categories': {'Entertainment': 3, 'Communication': 2, 'Browsers': 3, 'Office': 1},
+    },
+    'gamer_teen': {
+        'profile': 'kids', 'sessions_per_day': 2, 'hours': [16, 18, 19, 20, 21],
+        'minutes': 70, 'stretch': 15, 'apps': (1, 3),
+        'categories': {'Entertainment': 6, 'Communication': 2, 'Browsers': 1},
+    },
+    'remote_worker': {
+        'profile': 'parent', 'sessions_per_day': 4, 'hours': [8, 9, 10, 11, 13, 14, 15, 16],
+        'minutes': 60, 'stretch': 10, 'apps': (3, 6),
+        'categories': {'Development': 4, 'Office': 2, 'Communication': 3, 'Browsers': 2},
+    },
+    'retiree': {
+        'profile': 'parent', 'sessions_per_day': 2, 'hours': [7, 8, 9, 10, 19],
+        'minutes': 35, 'stretch': 8, 'apps': (1, 3),
+        'categories': {'Browsers': 4, 'Communication': 3, 'Entertainment': 2},
+    },
+}
+
+ANOMALY_TYPES = ['night_binge', 'marathon', 'app_storm', 'category_shift']
+
+
+def _timeline(rng, start, app_minutes, stretch):
+    """Interleave each app's minutes into focus intervals of about ``stretch`` minutes."""
+    chunks = []
+    for app, minutes in app_minutes.items():
+        remaining = minutes
+        while remaining > 0:
+            chunk = min(remaining, max(0.25, rng.expovariate(1 / stretch)))
+            chunks.append((app, chunk))
+            remaining -= chunk
+    rng.shuffle(chunks)
+
+    intervals, now = [], start
+    for app, minutes in chunks:
+        end = now + minutes * 60
+        if intervals and intervals[-1][0] == app:
+            intervals[-1][2] = end
+        else:
+            intervals.append([app, now, end])
+        now = end
+    return intervals
+
+
+def _rows(app_minutes):
+    rows = []
+    for app, minutes in app_minutes.items():
+        category = next(cat for cat, apps in APPS.items() if app in apps)
+        rows.append({
+            'Application': app,
+            'Time_Seconds': int(round(minutes * 60)),
+            'Display_Name': app.split('.')[0].title(),
+            'Window_Titles': '',
+            'Time_Minutes': minutes,
+            'Category': category,
+        })
+    return rows
+
+
+def _session(rng, spec, start, minutes=None, categories=None, apps=None, stretch=None):
+    categories = categories or spec['categories']
+    minutes = minutes or max(5.0, rng.gauss(spec['minutes'], spec['minutes'] / 4))
+    app_count = apps or rng.randint(*spec['apps'])
+    names = list(categories)
+    picked = rng.choices(names, weights=[categories[name] for name in names], k=app_count)
+    apps_used = list(dict.fromkeys(rng.choice(APPS[category]) for category in picked))
+    weights = [rng.random() + 0.2 for _ in apps_used]
+    app_minutes = {app: minutes * weight / sum(weights) for app, weight in zip(apps_used, weights)}
+    timeline = _timeline(rng, start.timestamp(), app_minutes, stretch or spec['stretch'])
+    return _rows(app_minutes), timeline
+
+
+def _anomaly(rng, spec, day, kind):
+    """Generate one injected anomaly of the given kind on ``day``."""
+    if kind == 'night_binge':
+        start = day + timedelta(hours=rng.choice([1, 2, 3]), minutes=rng.randint(0, 59))
+        return start, _session(rng, spec, start, minutes=spec['minutes'] * 3,
+                               categories={'Entertainment': 1}, stretch=spec['stretch'] * 4)
+    hour = rng.choice(spec['hours'])
+    start = day + timedelta(hours=hour, minutes=rng.randint(0, 59))
+    if kind == 'marathon':
+        return start, _session(rng, spec, start, minutes=spec['minutes'] * rng.uniform(4, 6),
+                               apps=1, stretch=spec['minutes'] * 6)
+    if kind == 'app_storm':
+        return start, _session(rng, spec, start, apps=15, stretch=0.3,
+                               categories={category: 1 for category in APPS})
+    # category_shift: all time in a category the archetype rarely uses
+    rare = min(APPS, key=lambda category: spec['categories'].get(category, 0))
+    return start, _session(rng, spec, start, categories={rare: 1})
+
+
+def generate_household(archetype, weeks=6, seed=0, anomaly_rate=0.05, device=None,
+                       start=datetime(2025, 1, 6)):
+    """
+    Generate a trace for one household member.
+
+    Args:
+        archetype: Key of ARCHETYPES
+        weeks: Length of the trace
+        seed: Random seed (traces are deterministic per seed)
+        anomaly_rate: Fraction of sessions replaced with injected anomalies
+        device: Device name (defaults to a name derived from the seed)
+        start: Midnight of the first day
+
+    Returns:
+        list: Sessions in chronological order
+    """
+    rng = random.Random(f"{archetype}-{seed}")
+    spec = ARCHETYPES[archetype]
+    device = device or f"pc-{seed:04d}"
+    sessions = []
+    for day_index in range(weeks * 7):
+        day = start + timedelta(days=day_index)
+        count = max(1, int(rng.gauss(spec['sessions_per_day'], 1)))
+        for hour in sorted(rng.sample(spec['hours'], min(count, len(spec['hours'])))):
+            if rng.random() < anomaly_rate:
+                kind = rng.choice(ANOMALY_TYPES)
+                timestamp, (data, timeline) = _anomaly(rng, spec, day, kind)
+            else:
+                kind = None
+                timestamp = day + timedelta(hours=hour, minutes=rng.randint(0, 59))
+                data, timeline = _session(rng, spec, timestamp)
+            sessions.append({
+                'profile': spec['profile'],
+                'device': device,
+                'timestamp': timestamp.replace(microsecond=0),
+                'data': data,
+                'timeline': timeline,
+                'is_anomaly': kind is not None,
+                'anomaly_type': kind,
+            })
+    sessions.sort(key=lambda session: session['timestamp'])
+    return sessions
+
+
+def generate_households(count, weeks=6, seed=0, anomaly_rate=0.05, archetypes=None):
+    """Generate ``count`` households, cycling through the archetypes."""
+    archetypes = archetypes or list(ARCHETYPES)
+    return [
+        (archetypes[i % len(archetypes)],
+         generate_household(archetypes[i % len(archetypes)], weeks, seed + i, anomaly_rate))
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a summary of synthetic household traces")
+    parser.add_argument("--households", type=int, default=4)
+    parser.add_argument("--weeks", type=int, default=6)
+    parser.add_argument("--anomaly-rate", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for archetype, sessions in generate_households(args.households, args.weeks, args.seed, args.anomaly_rate):
+        kinds = Counter(session['anomaly_type'] for session in sessions if session['is_anomaly'])
+        minutes = sum(row['Time_Minutes'] for session in sessions for row in session['data'])
+        print(f"{archetype:<14} {sessions[0]['device']}: {len(sessions)} sessions, "
+              f"{minutes / 60:.0f} h tracked, anomalies {dict(kinds)}")
+
+
+if __name__ == "__main__":
+    main()
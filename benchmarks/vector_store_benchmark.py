@@ -0,0 +1,149 @@
+"""
+Compare query latency and cold-load time of the FAISS and Chroma vector stores.
+
+Usage:
+    python benchmarks/vector_store_benchmark.py --sizes 10000 100000 1000000
+
+Synthetic clustered embeddings are used so the numbers measure the stores,
+not the embedding model. Every document covers one hour, so the time-range
+queries select a fixed one-week window regardless of collection size.
+"""
+import argparse
+import gc
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add the parent directory to the Python path so we can import the stores
+parent_dir = str(Path(__file__).parent.parent)
+if parent_dir not in sys.path:
+    sys.path.append(parent_dir)
+
+DIM = 384  # all-MiniLM-L6-v2
+HOUR = 3600.0
+WEEK = 7 * 24 * HOUR
+BASE_TIME = 1_700_000_000.0
+
+
+def make_vectors(count, dim, seed=0):
+    """Generate clustered, normalised vectors resembling sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((64, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, len(centers), count)]
+    vectors += 0.3 * rng.standard_normal((count, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def make_metadatas(start, count):
+    return [
+        {"period_start": BASE_TIME + (start + i) * HOUR, "period_end": BASE_TIME + (start + i + 1) * HOUR}
+        for i in range(count)
+    ]
+
+
+def percentiles(samples):
+    samples = np.asarray(samples) * 1000
+    return np.percentile(samples, 50), np.percentile(samples, 95)
+
+
+def time_queries(search, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        latencies.append(time.perf_counter() - started)
+    return percentiles(latencies)
+
+
+def bench_faiss(path, vectors, queries, k, window):
+    from faiss_store import FaissVectorStore
+
+    started = time.perf_counter()
+    store = FaissVectorStore(path)
+    batch = 50000
+    for begin in range(0, len(vectors), batch):
+        chunk = vectors[begin:begin + batch]
+        store.add_embeddings([f"doc {begin + i}" for i in range(len(chunk))], chunk,
+                             make_metadatas(begin, len(chunk)))
+    build = time.perf_counter() - started
+    del store
+    gc.collect()
+
+    started = time.perf_counter()
+    store = FaissVectorStore(path)
+    store.similarity_search_by_vector_with_score(queries[0], k)
+    cold = time.perf_counter() - started
+
+    query = time_queries(lambda q: store.similarity_search_by_vector_with_score(q, k), queries)
+    windowed = time_queries(
+        lambda q: store.similarity_search_by_vector_with_score(q, k, start=window[0], end=window[1]), queries)
+    return build, cold, query, windowed
+
+
+def bench_chroma(path, vectors, queries, k, window):
+    import chromadb
+
+    started = time.perf_counter()
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_or_create_collection("benchmark", metadata={"hnsw:space": "l2"})
+    batch = getattr(client, "max_batch_size", 5000)
+    for begin in range(0, len(vectors), batch):
+        chunk = vectors[begin:begin + batch]
+        collection.add(
+            ids=[str(begin + i) for i in range(len(chunk))],
+            embeddings=chunk.tolist(),
+            documents=[f"doc {begin + i}" for i in range(len(chunk))],
+            metadatas=make_metadatas(begin, len(chunk)),
+        )
+    build = time.perf_counter() - started
+    del collection, client
+    gc.collect()
+
+    started = time.perf_counter()
+    client = chromadb.PersistentClient(path=path)
+    collection = client.get_collection("benchmark")
+    collection.query(query_embeddings=[queries[0].tolist()], n_results=k)
+    cold = time.perf_counter() - started
+
+    where = {"$and": [{"period_end": {"$gte": window[0]}}, {"period_start": {"$lte": window[1]}}]}
+    query = time_queries(lambda q: collection.query(query_embeddings=[q.tolist()], n_results=k), queries)
+    windowed = time_queries(
+        lambda q: collection.query(query_embeddings=[q.tolist()], n_results=k, where=where), queries)
+    return build, cold, query, windowed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--backends", nargs="+", default=["faiss", "chroma"], choices=["faiss", "chroma"])
+    args = parser.parse_args()
+
+    benches = {"faiss": bench_faiss, "chroma": bench_chroma}
+    print(f"{'backend':<8}{'vectors':>10}{'build s':>10}{'cold ms':>10}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'win p50':>9}{'win p95':>9}")
+
+    for size in args.sizes:
+        vectors = make_vectors(size, DIM)
+        queries = make_vectors(args.queries, DIM, seed=1)
+        # Query the most recent week, like generate_weekly_insights does
+        window = (BASE_TIME + size * HOUR - WEEK, BASE_TIME + size * HOUR)
+
+        for backend in args.backends:
+            path = tempfile.mkdtemp(prefix=f"{backend}_bench_")
+            try:
+                build, cold, query, windowed = benches[backend](path, vectors, queries, args.k, window)
+            finally:
+                shutil.rmtree(path, ignore_errors=True)
+            print(f"{backend:<8}{size:>10}{build:>10.1f}{cold * 1000:>10.1f}"
+                  f"{query[0]:>9.2f}{query[1]:>9.2f}{windowed[0]:>9.2f}{windowed[1]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
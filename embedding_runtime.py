@@ -0,0 +1,209 @@
+import os
+from typing import List, Dict, Any
+import numpy as np
+from langchain.embeddings.base import Embeddings
+import logging
+
+logger = logging.getLogger(__name__)
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_MODEL_DIR = "models/all-MiniLM-L6-v2-onnx"
+FP32_ONNX_FILE = "model.onnx"
+INT8_ONNX_FILE = "model_int8.onnx"
+
+# Sample texts for the parity check, shaped like the summaries RAGAnalyzer stores
+PARITY_TEXTS = [
+    "Weekly Usage Summary: Total Usage Time: 412.5 minutes",
+    "Category Distribution: {'Browsers': 180.0, 'Development': 150.5, 'Entertainment': 82.0}",
+    "Top Applications: {'chrome.exe': 180.0, 'Code.exe': 150.5, 'spotify.exe': 82.0}",
+    "Unusually long session duration in the Entertainment category late at night",
+    "Productivity vs. distraction analysis for the kids profile",
+    "Take regular breaks and follow the 20-20-20 rule",
+]
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    all-MiniLM-L6-v2 run through ONNX Runtime on the CPU.
+
+    Uses the int8-quantized export by default. Texts are sorted by length
+    before batching to minimize padding, then mean-pooled and normalized
+    exactly like the sentence-transformers pipeline.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, model_file: str = INT8_ONNX_FILE,
+                 batch_size: int = 64, max_length: int = 256, threads: int = 0):
+        """
+        Load an exported model created by ``export_onnx_model``.
+
+        Args:
+            model_dir: Directory containing the ONNX files and tokenizer.json
+            model_file: ONNX file to load (int8 or fp32 export)
+            batch_size: Texts encoded per forward pass
+            max_length: Max tokens per text (the model was trained with 256)
+            threads: Intra-op threads (0 lets ONNX Runtime decide)
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+        self.batch_size = batch_size
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = np.argsort([len(text) for text in texts])
+        vectors = None
+        for begin in range(0, len(texts), self.batch_size):
+            batch = order[begin:begin + self.batch_size]
+            encoded = self._encode_batch([texts[i] for i in batch])
+            if vectors is None:
+                vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+            vectors[batch] = encoded
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class QuantizedTorchEmbeddings(Embeddings):
+    """all-MiniLM-L6-v2 with its Linear layers dynamically quantized to int8 in PyTorch."""
+
+    def __init__(self, model_name: str = MODEL_NAME, batch_size: int = 64):
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        model = SentenceTransformer(model_name, device="cpu")
+        self.model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.batch_size = batch_size
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.encode(texts, batch_size=self.batch_size, convert_to_numpy=True).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+EMBEDDING_RUNTIMES = ("torch", "int8", "onnx", "onnx-int8")
+
+
+def create_embeddings(runtime: str = None, model_name: str = MODEL_NAME,
+                      onnx_model_dir: str = ONNX_MODEL_DIR) -> Embeddings:
+    """
+    Create the embedding model for the requested runtime.
+
+    Args:
+        runtime: "torch" (fp32 sentence-transformers), "int8" (quantized
+            PyTorch), "onnx" (fp32 ONNX export) or "onnx-int8" (quantized
+            ONNX export); defaults to the RAG_EMBEDDING_RUNTIME environment
+            variable, then "torch"
+        model_name: Hugging Face model for the PyTorch runtimes
+        onnx_model_dir: Directory produced by ``export_onnx_model``
+
+    Returns:
+        Embeddings: A langchain-compatible embeddings object
+    """
+    runtime = runtime or os.getenv("RAG_EMBEDDING_RUNTIME", "torch")
+    if runtime not in EMBEDDING_RUNTIMES:
+        raise ValueError(f"Unknown embedding runtime '{runtime}'. Choose from: {', '.join(EMBEDDING_RUNTIMES)}")
+    logger.info(f"Using {runtime} embedding runtime")
+
+    if runtime == "int8":
+        return QuantizedTorchEmbeddings(model_name)
+    if runtime == "onnx":
+        return OnnxEmbeddings(onnx_model_dir, model_file=FP32_ONNX_FILE)
+    if runtime == "onnx-int8":
+        return OnnxEmbeddings(onnx_model_dir, model_file=INT8_ONNX_FILE)
+
+    from langchain.embeddings import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+def export_onnx_model(model_name: str = MODEL_NAME, output_dir: str = ONNX_MODEL_DIR, quantize: bool = True):
+    """
+    Export the transformer to ONNX (and optionally an int8 copy) for OnnxEmbeddings.
+
+    Args:
+        model_name: Hugging Face model to export
+        output_dir: Directory for the ONNX files and tokenizer.json
+        quantize: Also write a dynamically quantized int8 model
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(output_dir)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    names = ["input_ids", "attention_mask", "token_type_ids"]
+    dummy = tokenizer(["export the embedding model"], return_tensors="pt")
+    fp32_path = os.path.join(output_dir, FP32_ONNX_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(dummy[name] for name in names),
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in names + ["last_hidden_state"]},
+            opset_version=14,
+        )
+    logger.info(f"Exported {model_name} to {fp32_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(output_dir, INT8_ONNX_FILE)
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        logger.info(f"Wrote int8 model to {int8_path}")
+
+
+def check_embedding_parity(candidate: Embeddings, reference: Embeddings, texts: List[str] = None,
+                           min_cosine: float = 0.99) -> Dict[str, Any]:
+    """
+    Compare a candidate runtime's vectors against the fp32 reference.
+
+    Args:
+        candidate: Embeddings under test (e.g. the int8 ONNX runtime)
+        reference: The fp32 sentence-transformers embeddings
+        texts: Texts to embed with both (defaults to PARITY_TEXTS)
+        min_cosine: Minimum per-text cosine similarity to pass
+
+    Returns:
+        Dict: mean and min cosine similarity and whether the check passed
+    """
+    texts = texts or PARITY_TEXTS
+    a = np.asarray(candidate.embed_documents(texts), dtype=np.float64)
+    b = np.asarray(reference.embed_documents(texts), dtype=np.float64)
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    return {
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "passed": bool(cosine.min() >= min_cosine),
+    }
@@ -0,0 +1,75 @@
+import asyncio
+import itertools
+from collections import deque
+
+class Subscription:
+    """
+    One subscriber's view of the bus.
+
+    Events wait in a bounded deque; when a slow subscriber lets it fill up,
+    the oldest events are dropped (and counted) instead of blocking the
+    publisher or growing memory.
+    """
+
+    def __init__(self, bus, max_buffer, predicate):
+        self.bus = bus
+        self.buffer = deque(maxlen=max_buffer)
+        self.predicate = predicate
+        self.dropped = 0
+        self._ready = asyncio.Event()
+
+    def put(self, event):
+        if self.predicate is not None and not self.predicate(event):
+            return
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append(event)
+        self._ready.set()
+
+    async def get(self, timeout=None):
+        """Next event, or None after ``timeout`` seconds without one"""
+        while not self.buffer:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self.buffer.popleft()
+
+    def take_dropped(self):
+        """Number of events dropped since the last call"""
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    def close(self):
+        self.bus.unsubscribe(self)
+
+class EventBus:
+    """
+    In-process publish/subscribe for live tracker events.
+
+    Publishing is O(subscribers) and never waits: each subscriber has its own
+    bounded buffer with drop-oldest backpressure. Every event gets an
+    increasing ``id`` so clients can tell when they missed some. Must be
+    used from the event loop thread.
+    """
+
+    def __init__(self, max_buffer=256):
+        self.max_buffer = max_buffer
+        self.subscribers = set()
+        self._ids = itertools.count(1)
+
+    def subscribe(self, predicate=None, max_buffer=None):
+        """Start receiving events for which ``predicate(event)`` is true (all if None)"""
+        subscription = Subscription(self, max_buffer or self.max_buffer, predicate)
+        self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        self.subscribers.discard(subscription)
+
+    def publish(self, event):
+        event = {**event, 'id': next(self._ids)}
+        for subscription in self.subscribers:
+            subscription.put(event)
+        return event['id']
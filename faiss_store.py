@@ -0,0 +1,460 @@
+import os
+import json
+import math
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+import numpy as np
+import faiss
+from langchain.docstore.document import Document
+from langchain.embeddings.base import Embeddings
+from langchain.vectorstores.base import VectorStore
+import logging
+
+logger = logging.getLogger(__name__)
+
+SETTINGS_FILE = "store.json"
+VECTORS_FILE = "vectors.f32"
+START_FILE = "period_start.f64"
+END_FILE = "period_end.f64"
+INDEX_FILE = "index.faiss"
+METADATA_FILE = "metadata.jsonl"
+OFFSETS_FILE = "metadata.idx"
+PARTITION_FILE = "partition.u32"
+
+
+def _to_epoch(value) -> float:
+    """Convert a timestamp-like metadata value to epoch seconds (NaN if missing)."""
+    if value is None:
+        return math.nan
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+class FaissVectorStore(VectorStore):
+    """
+    Vector store backed by an in-process FAISS index persisted as memory-mapped files.
+
+    Collections below ``flat_threshold`` vectors use an exact flat index; larger
+    collections switch to an HNSW (default) or IVF index. The raw vectors, the
+    time range of every document and a JSONL metadata sidecar are kept next to
+    the index so a cold start only maps files instead of parsing them. The
+    ``partition_key`` metadata field (the profile by default) is also stored
+    as a compact code per document so filters on it prefilter the search.
+
+    Layout of ``persist_directory``:
+        vectors.f32       raw float32 embeddings, one row per document
+        period_start.f64  start of the period each document covers (epoch seconds)
+        period_end.f64    end of the period each document covers (epoch seconds)
+        index.faiss       ANN index over the vectors
+        metadata.jsonl    text and metadata of every document
+        metadata.idx      uint64 byte offsets into metadata.jsonl
+        partition.u32     partition code per document (0 when the key is missing)
+        store.json        dimension, index settings and partition codes
+    """
+
+    def __init__(self, persist_directory: str = "faiss_store",
+                 embedding_function: Optional[Embeddings] = None,
+                 flat_threshold: int = 50000, ann_index: str = "hnsw",
+                 exact_search_limit: int = 20000, partition_key: str = "profile"):
+        """
+        Open (or create) a FAISS vector store.
+
+        Args:
+            persist_directory: Directory holding the index and sidecar files
+            embedding_function: Embeddings used by the text-based APIs
+            flat_threshold: Collection size above which an ANN index is built
+            ann_index: ANN index type above the threshold ("hnsw" or "ivf")
+            exact_search_limit: Max prefiltered candidates scored exactly with NumPy
+            partition_key: Metadata field stored for prefiltering (e.g. the profile)
+        """
+        if ann_index not in ("hnsw", "ivf"):
+            raise ValueError(f"Unsupported ANN index type: {ann_index}")
+
+        self.persist_directory = persist_directory
+        self.embedding_function = embedding_function
+        self.flat_threshold = flat_threshold
+        self.ann_index = ann_index
+        self.exact_search_limit = exact_search_limit
+        self.partition_key = partition_key
+
+        self.dim = None
+        self.index_kind = None
+        self.start_sorted = True
+        self.end_sorted = True
+        self._partitions = {}
+        self._index = None
+        self._index_mmapped = False
+        self._vectors = None
+        self._period_start = None
+        self._period_end = None
+        self._offsets = None
+        self._partition = None
+
+        os.makedirs(persist_directory, exist_ok=True)
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.persist_directory, name)
+
+    @property
+    def embeddings(self) -> Optional[Embeddings]:
+        return self.embedding_function
+
+    @property
+    def count(self) -> int:
+        """Number of documents in the store."""
+        return 0 if self._offsets is None else len(self._offsets)
+
+    def _load(self):
+        """Map the persisted files; nothing is parsed or copied into memory."""
+        settings_path = self._path(SETTINGS_FILE)
+        if not os.path.exists(settings_path):
+            return
+
+        with open(settings_path, "r") as f:
+            settings = json.load(f)
+        self.dim = settings["dim"]
+        self.index_kind = settings["index_kind"]
+        self.start_sorted = settings.get("start_sorted", True)
+        self.end_sorted = settings.get("end_sorted", True)
+        self._partitions = settings.get("partitions", {})
+
+        self._map_files()
+        if self.count == 0:
+            return
+
+        try:
+            self._index = faiss.read_index(self._path(INDEX_FILE), faiss.IO_FLAG_MMAP)
+            self._index_mmapped = True
+        except RuntimeError:
+            self._index = faiss.read_index(self._path(INDEX_FILE))
+            self._index_mmapped = False
+
+    def _map_files(self):
+        """Memory-map the vector, period and offset files."""
+        offsets_path = self._path(OFFSETS_FILE)
+        count = os.path.getsize(offsets_path) // 8 if os.path.exists(offsets_path) else 0
+        if count == 0:
+            return
+
+        self._offsets = np.memmap(self._path(OFFSETS_FILE), dtype=np.uint64, mode="r", shape=(count,))
+        self._vectors = np.memmap(self._path(VECTORS_FILE), dtype=np.float32, mode="r",
+                                  shape=(count, self.dim))
+        self._period_start = np.memmap(self._path(START_FILE), dtype=np.float64, mode="r", shape=(count,))
+        self._period_end = np.memmap(self._path(END_FILE), dtype=np.float64, mode="r", shape=(count,))
+
+        partition_path = self._path(PARTITION_FILE)
+        if os.path.exists(partition_path) and os.path.getsize(partition_path) >= count * 4:
+            self._partition = np.memmap(partition_path, dtype=np.uint32, mode="r", shape=(count,))
+        else:
+            self._partition = np.zeros(count, dtype=np.uint32)
+
+    def _release(self):
+        """Drop the file mappings before the underlying files are appended to."""
+        self._offsets = None
+        self._vectors = None
+        self._period_start = None
+        self._period_end = None
+        self._partition = None
+
+    def _save_settings(self):
+        settings = {
+            "dim": self.dim,
+            "index_kind": self.index_kind,
+            "start_sorted": self.start_sorted,
+            "end_sorted": self.end_sorted,
+            "partitions": self._partitions,
+        }
+        tmp_path = self._path(SETTINGS_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(settings, f)
+        os.replace(tmp_path, self._path(SETTINGS_FILE))
+
+    def _target_kind(self, count: int) -> str:
+        return "flat" if count < self.flat_threshold else self.ann_index
+
+    def _build_index(self, kind: str):
+        """Build an index of the given kind over every stored vector."""
+        count = self.count
+        if kind == "flat":
+            index = faiss.IndexFlatL2(self.dim)
+        elif kind == "hnsw":
+            index = faiss.IndexHNSWFlat(self.dim, 32)
+            index.hnsw.efConstruction = 80
+        else:
+            nlist = max(1, int(4 * math.sqrt(count)))
+            quantizer = faiss.IndexFlatL2(self.dim)
+            index = faiss.IndexIVFFlat(quantizer, self.dim, nlist)
+            sample_size = min(count, nlist * 64)
+            sample = np.random.default_rng(0).choice(count, size=sample_size, replace=False)
+            index.train(np.ascontiguousarray(self._vectors[np.sort(sample)]))
+            index.nprobe = max(1, nlist // 16)
+
+        for begin in range(0, count, 65536):
+            index.add(np.ascontiguousarray(self._vectors[begin:begin + 65536]))
+        return index
+
+    def _update_index(self, vectors: np.ndarray):
+        """Add new vectors to the index, rebuilding it when the index kind changes."""
+        kind = self._target_kind(self.count)
+        if self._index is None or kind != self.index_kind:
+            logger.info(f"Building {kind} FAISS index over {self.count} vectors")
+            self._index = self._build_index(kind)
+            self.index_kind = kind
+        else:
+            if self._index_mmapped:
+                self._index = faiss.read_index(self._path(INDEX_FILE))
+            self._index.add(vectors)
+
+        self._index_mmapped = False
+        faiss.write_index(self._index, self._path(INDEX_FILE))
+
+    def add_embeddings(self, texts: Iterable[str], embeddings: Iterable[List[float]],
+                       metadatas: Optional[List[Dict[str, Any]]] = None) -> List[str]:
+        """
+        Add precomputed embeddings to the store.
+
+        Args:
+            texts: Document texts
+            embeddings: One embedding per text
+            metadatas: Optional metadata per text; ``period_start``/``period_end``
+                (or ``timestamp``) are indexed for time-range prefiltering and
+                ``partition_key`` for partition prefiltering
+
+        Returns:
+            List[str]: Ids of the added documents
+        """
+        texts = list(texts)
+        vectors = np.ascontiguousarray(np.asarray(embeddings, dtype=np.float32))
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError("Expected one embedding per text")
+        if not texts:
+            return []
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self.dim}")
+
+        if metadatas is None:
+            metadatas = [{} for _ in texts]
+
+        period_start = np.empty(len(texts), dtype=np.float64)
+        period_end = np.empty(len(texts), dtype=np.float64)
+        for i, metadata in enumerate(metadatas):
+            period_start[i] = _to_epoch(metadata.get("period_start", metadata.get("timestamp")))
+            period_end[i] = _to_epoch(metadata.get("period_end", metadata.get("timestamp")))
+        partition = np.array([self._partition_code(metadata.get(self.partition_key), create=True)
+                              for metadata in metadatas], dtype=np.uint32)
+
+        # Keep track of whether the periods arrive in order so range lookups can bisect
+        first_id = self.count
+        last_start = self._period_start[-1] if first_id else -math.inf
+        last_end = self._period_end[-1] if first_id else -math.inf
+        self.start_sorted = self.start_sorted and bool(np.all(np.diff(period_start, prepend=last_start) >= 0))
+        self.end_sorted = self.end_sorted and bool(np.all(np.diff(period_end, prepend=last_end) >= 0))
+
+        self._release()
+        offsets = []
+        with open(self._path(METADATA_FILE), "ab") as f:
+            position = f.tell()
+            for text, metadata in zip(texts, metadatas):
+                line = json.dumps({"text": text, "metadata": metadata}, default=str).encode("utf-8") + b"\n"
+                offsets.append(position)
+                f.write(line)
+                position += len(line)
+        with open(self._path(VECTORS_FILE), "ab") as f:
+            f.write(vectors.tobytes())
+        with open(self._path(START_FILE), "ab") as f:
+            f.write(period_start.tobytes())
+        with open(self._path(END_FILE), "ab") as f:
+            f.write(period_end.tobytes())
+        with open(self._path(PARTITION_FILE), "ab") as f:
+            # Stores created before partitions were tracked have no codes yet
+            missing = first_id - f.tell() // 4
+            if missing > 0:
+                f.write(np.zeros(missing, dtype=np.uint32).tobytes())
+            f.write(partition.tobytes())
+        # The offsets file defines the document count, so it is written last
+        with open(self._path(OFFSETS_FILE), "ab") as f:
+            f.write(np.asarray(offsets, dtype=np.uint64).tobytes())
+
+        self._map_files()
+        self._update_index(vectors)
+        self._save_settings()
+
+        return [str(i) for i in range(first_id, first_id + len(texts))]
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[dict]] = None,
+                  **kwargs: Any) -> List[str]:
+        """Embed and add texts to the store."""
+        if self.embedding_function is None:
+            raise ValueError("An embedding function is required to add texts")
+        texts = list(texts)
+        embeddings = self.embedding_function.embed_documents(texts)
+        return self.add_embeddings(texts, embeddings, metadatas)
+
+    def _partition_code(self, value, create: bool = False) -> Optional[int]:
+        """Code of a partition value; 0 stands for documents without one."""
+        if value is None:
+            return 0
+        value = str(value)
+        if value not in self._partitions:
+            if not create:
+                return None
+            self._partitions[value] = len(self._partitions) + 1
+        return self._partitions[value]
+
+    def _time_candidates(self, start, end) -> Optional[np.ndarray]:
+        """Ids of documents whose period overlaps [start, end], or None for no prefilter."""
+        if start is None and end is None:
+            return None
+
+        low = -math.inf if start is None else _to_epoch(start)
+        high = math.inf if end is None else _to_epoch(end)
+
+        # Documents are normally appended in time order, so bisect instead of scanning
+        first = 0
+        last = self.count
+        if self.end_sorted:
+            first = int(np.searchsorted(self._period_end, low, side="left"))
+        if self.start_sorted:
+            last = int(np.searchsorted(self._period_start, high, side="right"))
+        if first >= last:
+            return np.empty(0, dtype=np.int64)
+        if self.start_sorted and self.end_sorted:
+            return np.arange(first, last, dtype=np.int64)
+
+        mask = (self._period_end[first:last] >= low) & (self._period_start[first:last] <= high)
+        return first + np.flatnonzero(mask).astype(np.int64)
+
+    def _candidates(self, start, end, partition) -> Optional[np.ndarray]:
+        """Ids matching the time range and partition, or None when nothing is filtered."""
+        candidates = self._time_candidates(start, end)
+        if partition is None:
+            return candidates
+
+        code = self._partition_code(partition)
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+        if candidates is None:
+            return np.flatnonzero(self._partition == code).astype(np.int64)
+        if len(candidates) and candidates[-1] - candidates[0] + 1 == len(candidates):
+            mask = self._partition[candidates[0]:candidates[-1] + 1] == code
+            return candidates[0] + np.flatnonzero(mask).astype(np.int64)
+        return candidates[self._partition[candidates] == code]
+
+    def _exact_search(self, query: np.ndarray, candidates: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score prefiltered candidates exactly with NumPy."""
+        if candidates[-1] - candidates[0] + 1 == len(candidates):
+            subset = self._vectors[candidates[0]:candidates[-1] + 1]
+        else:
+            subset = self._vectors[candidates]
+        diff = subset - query
+        distances = np.einsum("ij,ij->i", diff, diff)
+
+        if len(distances) > k:
+            top = np.argpartition(distances, k - 1)[:k]
+        else:
+            top = np.arange(len(distances))
+        order = top[np.argsort(distances[top])]
+        return candidates[order], distances[order]
+
+    def _search_parameters(self, selector, k: int):
+        if self.index_kind == "hnsw":
+            return faiss.SearchParametersHNSW(sel=selector, efSearch=max(64, 2 * k))
+        if self.index_kind == "ivf":
+            return faiss.SearchParametersIVF(sel=selector, nprobe=self._index.nprobe)
+        return faiss.SearchParameters(sel=selector)
+
+    def _index_search(self, query: np.ndarray, k: int,
+                      candidates: Optional[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+        """Search the FAISS index, restricted to ``candidates`` when given."""
+        selector = None
+        if candidates is not None:
+            if candidates[-1] - candidates[0] + 1 == len(candidates):
+                selector = faiss.IDSelectorRange(int(candidates[0]), int(candidates[-1]) + 1)
+            else:
+                selector = faiss.IDSelectorBatch(candidates)
+        distances, ids = self._index.search(query.reshape(1, -1), k, params=self._search_parameters(selector, k))
+        return ids[0], distances[0]
+
+    def _document(self, doc_id: int) -> Document:
+        """Read one document from the metadata sidecar."""
+        with open(self._path(METADATA_FILE), "rb") as f:
+            f.seek(int(self._offsets[doc_id]))
+            record = json.loads(f.readline())
+        return Document(page_content=record["text"], metadata=record["metadata"])
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Dict[str, Any]] = None,
+                                               start=None, end=None) -> List[Tuple[Document, float]]:
+        """
+        Find the documents closest to an embedding.
+
+        Args:
+            embedding: Query embedding
+            k: Number of documents to return
+            filter: Metadata values the returned documents must match; the
+                ``partition_key`` field is applied before the vector search
+            start: Only consider documents whose period ends at or after this time
+            end: Only consider documents whose period starts at or before this time
+
+        Returns:
+            List[Tuple[Document, float]]: Documents with their L2 distance, closest first
+        """
+        if self.count == 0:
+            return []
+
+        filter = dict(filter or {})
+        partition = filter.pop(self.partition_key, None)
+        query = np.asarray(embedding, dtype=np.float32)
+        fetch_k = min(self.count, k * 4 if filter else k)
+        candidates = self._candidates(start, end, partition)
+
+        if candidates is None:
+            ids, distances = self._index_search(query, fetch_k, None)
+        elif len(candidates) == 0:
+            return []
+        elif len(candidates) <= self.exact_search_limit:
+            ids, distances = self._exact_search(query, candidates, fetch_k)
+        else:
+            ids, distances = self._index_search(query, fetch_k, candidates)
+
+        results = []
+        for doc_id, distance in zip(ids, distances):
+            if doc_id < 0:
+                continue
+            doc = self._document(int(doc_id))
+            if filter and any(doc.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            results.append((doc, float(distance)))
+            if len(results) == k:
+                break
+        return results
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     **kwargs: Any) -> List[Tuple[Document, float]]:
+        if self.embedding_function is None:
+            raise ValueError("An embedding function is required to search by text")
+        embedding = self.embedding_function.embed_query(query)
+        return self.similarity_search_by_vector_with_score(embedding, k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        return self._euclidean_relevance_score_fn
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings,
+                   metadatas: Optional[List[dict]] = None, **kwargs: Any) -> "FaissVectorStore":
+        store = cls(embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas)
+        return store
@@ -0,0 +1,315 @@
+"""
+Central ingest endpoint for tracker agents on many devices.
+
+Usage:
+    python ingest_server.py --port 8766
+    python -m tracker run --profile kids --ingest-url http://<server>:8766/ingest/batches
+
+Endpoints:
+    POST /ingest/batches   One gzip'd JSON batch from tracker.upload
+    GET  /ingest/fleet     Fleet-wide summary merged from the usage sketches
+                           (?since=&until= days as YYYY-MM-DD, ?profile=, ?device=, ?top=)
+    GET  /ingest/stats     Counters for monitoring and load tests
+
+Uploads are queued and written by a single writer thread in group commits:
+all batches that arrived while the previous commit ran are appended with
+one SessionStore.append_many per (profile, device) shard, i.e. one segment
+and one manifest update per shard per commit however many agents uploaded.
+A batch is acknowledged only after its commit. The (batch, profile) pairs
+written are recorded in a ledger, so a retried upload is acknowledged
+without storing its sessions twice.
+
+Every stored session also updates its shard's per-day UsageSketch (through
+the stores' on_append hook), so the fleet summary merges a few KB per
+device and day instead of scanning the stored sessions.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from session_store import SessionStore
+from sketches import SketchStore
+from tracker.upload import unpack_session
+from utils import MODELS_DIR, session_store_dir
+
+logger = logging.getLogger(__name__)
+
+LEDGER_FILE = "ingested_batches.log"
+MAX_BATCH_BYTES = 32 * 1024 * 1024  # Size limit of one batch after aiohttp decoded the gzip body
+MAX_GROUP_BATCHES = 2000  # Batches per group commit
+
+class BatchLedger:
+    """
+    Keys of the batches already stored, kept in memory and appended to a log.
+
+    Only the newest ``max_ids`` keys are remembered; agents retry within
+    minutes, so that window is plenty. The log is rewritten with just those
+    keys once it holds twice as many.
+    """
+
+    def __init__(self, path, max_ids=1_000_000):
+        self.path = path
+        self.max_ids = max_ids
+        self.keys = OrderedDict()
+        self.logged = 0
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self._remember(line.strip())
+                    self.logged += 1
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def _remember(self, key):
+        if key:
+            self.keys[key] = None
+            if len(self.keys) > self.max_ids:
+                self.keys.popitem(last=False)
+
+    def add_many(self, keys):
+        keys = [key for key in keys if key not in self.keys]
+        if not keys:
+            return
+        for key in keys:
+            self._remember(key)
+        if self.logged + len(keys) > 2 * self.max_ids:
+            with open(self.path + ".tmp", 'w', encoding='utf-8') as f:
+                f.writelines(key + "\n" for key in self.keys)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(self.path + ".tmp", self.path)
+            self.logged = len(self.keys)
+            return
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.writelines(key + "\n" for key in keys)
+            f.flush()
+            os.fsync(f.fileno())
+        self.logged += len(keys)
+
+def parse_batch(body):
+    """
+    Parse and validate one upload.
+
+    Raises:
+        ValueError: If the body isn't a well-formed batch
+    """
+    batch = json.loads(body)
+    if not (isinstance(batch, dict) and isinstance(batch.get('batch_id'), str) and batch['batch_id']
+            and isinstance(batch.get('device'), str) and batch['device'] and isinstance(batch.get('sessions'), list)):
+        raise ValueError("Expected a batch with batch_id, device and sessions")
+    for session in batch['sessions']:
+        if not (isinstance(session, dict) and isinstance(session.get('timestamp'), str)
+                and isinstance(session.get('profile'), str) and session['profile']
+                and isinstance(session.get('apps'), list)):
+            raise ValueError("Malformed session")
+        for app in session['apps']:
+            if not (isinstance(app, list) and len(app) == 3 and isinstance(app[0], str)
+                    and isinstance(app[1], (int, float)) and isinstance(app[2], list)):
+                raise ValueError("Malformed application entry")
+    return batch
+
+class IngestWriter:
+    """Group-commits uploaded batches into the per-(profile, device) session stores."""
+
+    def __init__(self, base_dir=MODELS_DIR, max_group=MAX_GROUP_BATCHES, max_open_stores=4096):
+        """
+        Args:
+            base_dir: Root of the session store shards
+            max_group: Batches written in one commit at most
+            max_open_stores: SessionStores kept open between commits
+        """
+        self.base_dir = base_dir
+        self.max_group = max_group
+        self.max_open_stores = max_open_stores
+        os.makedirs(base_dir, exist_ok=True)
+        self.ledger = BatchLedger(os.path.join(base_dir, LEDGER_FILE))
+        self.sketches = SketchStore(base_dir)
+        self.stores = OrderedDict()
+        self.inflight = {}  # batch_id -> future of the commit that stores it
+        self.queue = None
+        self.task = None
+        # One writer thread, so the stores and the ledger are only touched from it
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-writer")
+        self.stats = {'batches': 0, 'duplicates': 0, 'sessions': 0, 'commits': 0, 'commit_seconds': 0.0,
+                      'max_group': 0, 'errors': 0}
+
+    async def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown(wait=True)
+
+    def _keys(self, batch):
+        return {f"{batch['batch_id']} {session['profile']}" for session in batch['sessions']}
+
+    async def submit(self, batch):
+        """
+        Store one batch, returning once it is committed.
+
+        Returns:
+            dict: {'batch_id', 'stored' (sessions written), 'duplicate'}
+        """
+        batch_id = batch['batch_id']
+        if self._keys(batch) <= self.ledger.keys.keys():
+            self.stats['duplicates'] += 1
+            return {'batch_id': batch_id, 'stored': 0, 'duplicate': True}
+        future = self.inflight.get(batch_id)
+        if future is not None:
+            # The same batch is already waiting for a commit (an agent retried after a timeout)
+            self.stats['duplicates'] += 1
+            await asyncio.shield(future)
+            return {'batch_id': batch_id, 'stored': 0, 'duplicate': True}
+
+        future = self.inflight[batch_id] = asyncio.get_running_loop().create_future()
+        await self.queue.put((batch, future))
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if self.inflight.get(batch_id) is future:
+                del self.inflight[batch_id]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            group = [await self.queue.get()]
+            while len(group) < self.max_group and not self.queue.empty():
+                group.append(self.queue.get_nowait())
+            try:
+                results = await loop.run_in_executor(self.executor, self._commit, [batch for batch, _ in group])
+            except Exception as e:
+                logger.exception("Group commit failed")
+                results = [e] * len(group)
+            for (_, future), result in zip(group, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    self.stats['errors'] += 1
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def _store(self, store_dir, profile, device):
+        store = self.stores.pop(store_dir, None)
+        if store is None:
+            store = SessionStore(store_dir, on_append=self.sketches.recorder(profile, device))
+        self.stores[store_dir] = store
+        if len(self.stores) > self.max_open_stores:
+            self.stores.popitem(last=False)
+        return store
+
+    def _commit(self, batches):
+        """Write a group of batches; returns each batch's result or exception (runs in the writer thread)"""
+        started = time.perf_counter()
+        # (profile, device) -> [(batch index, ledger key, sessions)]
+        shards = defaultdict(list)
+        for i, batch in enumerate(batches):
+            by_profile = defaultdict(list)
+            for session in batch['sessions']:
+                by_profile[session['profile']].append(session)
+            for profile, sessions in by_profile.items():
+                key = f"{batch['batch_id']} {profile}"
+                if key not in self.ledger:
+                    shards[(profile, batch['device'])].append((i, key, sessions))
+
+        stored = [0] * len(batches)
+        failed = {}
+        written_keys = []
+        for (profile, device), parts in shards.items():
+            store_dir = session_store_dir(profile, device, self.base_dir)
+            rows = [(session['timestamp'], unpack_session(session)) for _, _, sessions in parts for session in sessions]
+            try:
+                self._store(store_dir, profile, device).append_many(rows)
+            except Exception as e:
+                logger.error(f"Could not store sessions in {store_dir}: {e}")
+                self.stores.pop(store_dir, None)
+                for i, _, _ in parts:
+                    failed[i] = e
+                continue
+            for i, key, sessions in parts:
+                stored[i] += len(sessions)
+                written_keys.append(key)
+        self.ledger.add_many(written_keys)
+
+        self.stats['commits'] += 1
+        self.stats['commit_seconds'] += time.perf_counter() - started
+        self.stats['max_group'] = max(self.stats['max_group'], len(batches))
+        self.stats['batches'] += len(batches) - len(failed)
+        self.stats['sessions'] += sum(stored)
+        return [failed.get(i) or {'batch_id': batch['batch_id'], 'stored': stored[i], 'duplicate': False}
+                for i, batch in enumerate(batches)]
+
+def create_app(writer=None):
+    """Build the aiohttp application around an IngestWriter"""
+    writer = writer or IngestWriter()
+
+    async def receive_batch(request):
+        try:
+            # aiohttp decodes the gzip Content-Encoding, enforcing client_max_size on the decoded size
+            batch = parse_batch(await request.read())
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=json.dumps({'error': str(e)}), content_type='application/json')
+        try:
+            return web.json_response(await writer.submit(batch))
+        except Exception as e:
+            # The agent keeps the batch and retries
+            raise web.HTTPServiceUnavailable(text=json.dumps({'error': str(e)}), content_type='application/json')
+
+    async def fleet(request):
+        query = request.query
+        try:
+            top = int(query.get('top', 10))
+        except ValueError:
+            raise web.HTTPBadRequest(text='{"error": "top must be an integer"}', content_type='application/json')
+        summary = await asyncio.get_running_loop().run_in_executor(None, lambda: writer.sketches.fleet_summary(
+            since=query.get('since'), until=query.get('until'), profile=query.get('profile'),
+            device=query.get('device'), top=top
+        ))
+        return web.json_response(summary)
+
+    async def stats(request):
+        return web.json_response({**writer.stats, 'queued': writer.queue.qsize(), 'open_stores': len(writer.stores)})
+
+    async def on_startup(app):
+        await writer.start()
+
+    async def on_cleanup(app):
+        await writer.stop()
+
+    app = web.Application(client_max_size=MAX_BATCH_BYTES)
+    app['writer'] = writer
+    app.router.add_post("/ingest/batches", receive_batch)
+    app.router.add_get("/ingest/fleet", fleet)
+    app.router.add_get("/ingest/stats", stats)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Receive session batches from tracker agents")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--base-dir", default=MODELS_DIR, help="Root of the session store shards")
+    parser.add_argument("--backlog", type=int, default=1024, help="Listen backlog for many agents connecting at once")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    web.run_app(create_app(IngestWriter(args.base_dir)), host=args.host, port=args.port,
+                backlog=args.backlog, access_log=None)
+
+if __name__ == "__main__":
+    main()
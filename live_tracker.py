@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import defaultdict, deque
+
+from timeline_features import add_focus_sample
+from tracker.events import FOCUS_CHANGE, LIMIT_EXCEEDED, SESSION_END
+from tracker.notify import send_desktop_notification, send_limit_email
+from tracker.sampler import sample_focus
+from utils import NOTIFICATION_COOLDOWN, NOTIFICATION_THRESHOLD, categorize_app, get_display_name
+
+class LiveTracker:
+    """
+    The Streamlit app's tracking loop, run in a background thread.
+
+    The page starts a tracker and then only reads ``snapshot()`` from a
+    periodically refreshing fragment, so widget interactions and reruns
+    never wait on sampling and sampling never pauses for a rerun. When the
+    duration is up (or ``stop`` is called) ``usage()`` returns the session's
+    per-app seconds and window titles. Each sample is credited with the
+    wall-clock time since the previous one, as the tracker daemon does, so
+    both write the same seconds to the shared session store.
+    """
+
+    def __init__(self, duration, profile=None, profile_key=None, streaming_detector=None, baseline_file=None,
+                 exceeded_limits=None, email_config=None, events=None, interval=0.5, sampler=sample_focus):
+        """
+        Args:
+            duration: Seconds to track
+            profile: The profile dict whose app limits are enforced
+            profile_key: Key of the profile (sent with live events)
+            streaming_detector: StreamingAnomalyDetector fed with every sample
+            baseline_file: Where to save the streaming detector's baseline at the end
+            exceeded_limits: Set of apps already notified about (shared across sessions)
+            email_config: SMTP settings for limit emails (None disables them)
+            events: EventPublisher for live events, shared across sessions (None disables them)
+            interval: Seconds between samples
+            sampler: Callable returning the (application, window title) in focus
+        """
+        self.duration = duration
+        self.profile = profile
+        self.profile_key = profile_key
+        self.streaming_detector = streaming_detector
+        self.baseline_file = baseline_file
+        self.exceeded_limits = exceeded_limits if exceeded_limits is not None else set()
+        self.email_config = email_config
+        self.events = events
+        self.interval = interval
+        self.sampler = sampler
+
+        self.screen_time = defaultdict(float)
+        self.window_titles = defaultdict(set)
+        self.timeline = []  # Focus intervals as [app, start, end]
+        self.alerts = []
+        self.notices = deque(maxlen=20)  # (level, message) for the live panel
+        self.status = "Starting..."
+        self.last_notification = {}
+        self.start_time = None
+        self.end_time = None
+        self.error = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.start_time = time.time()
+        self._thread = threading.Thread(target=self._run, name="live-tracker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Finish the session early"""
+        self._stop.set()
+
+    @property
+    def done(self):
+        return self._thread is not None and not self._thread.is_alive()
+
+    def join(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _notice(self, level, message):
+        with self._lock:
+            self.notices.append((level, message))
+
+    def _notify(self, app_name, usage_time, is_limit_reached=False):
+        """Desktop notification with a per-app cooldown"""
+        now = time.time()
+        if now - self.last_notification.get(app_name, 0) <= NOTIFICATION_COOLDOWN:
+            return
+        if is_limit_reached:
+            message = f"⚠️ Time limit reached for {app_name}! Please close the application."
+        else:
+            message = (f"You've been using {app_name} for {usage_time:.1f} sec.\n"
+                       f"Time for a quick break! 🎯")
+        send_desktop_notification("⏰ Smart Screen Time Alert", message)
+        self.last_notification[app_name] = now
+
+    def _run(self):
+        events = self.events
+        focused_app = None
+        last = self.start_time
+        try:
+            while time.time() - self.start_time < self.duration and not self._stop.is_set():
+                active_app, window_title = self.sampler()
+                now = time.time()
+                # Count at most a few intervals if the machine slept or the loop stalled
+                elapsed = min(now - last, 4 * self.interval)
+                last = now
+                if active_app != focused_app:
+                    focused_app = active_app
+                    if events:
+                        events.publish(FOCUS_CHANGE, profile=self.profile_key, application=active_app,
+                                       window_title=window_title,
+                                       display_name=get_display_name(active_app) if active_app else None,
+                                       category=categorize_app(active_app) if active_app else None)
+                if active_app:
+                    self._sample(active_app, window_title, elapsed, events)
+                self._stop.wait(self.interval)
+        except Exception as e:
+            self.error = str(e)
+            self._notice('error', f"Error during tracking: {str(e)}")
+        finally:
+            self.end_time = time.time()
+            if self.streaming_detector is not None and self.baseline_file:
+                self.streaming_detector.save(self.baseline_file)
+            if events:
+                if self.screen_time:
+                    top_apps = sorted(self.screen_time, key=self.screen_time.get, reverse=True)[:3]
+                    events.publish(SESSION_END, profile=self.profile_key, started=self.start_time,
+                                   total_minutes=sum(self.screen_time.values()) / 60,
+                                   top_apps=[get_display_name(app) for app in top_apps])
+
+    def _sample(self, active_app, window_title, elapsed, events):
+        display_name = get_display_name(active_app)
+        with self._lock:
+            self.screen_time[active_app] += elapsed
+            if window_title:
+                self.window_titles[active_app].add(window_title)
+            add_focus_sample(self.timeline, active_app, time.time())
+            self.status = f"Currently tracking: {display_name} - {window_title}"
+
+        # Feed the sample to the online detector so unusual usage is flagged while it happens
+        if self.streaming_detector is not None:
+            for alert in self.streaming_detector.update(categorize_app(active_app)):
+                with self._lock:
+                    self.alerts.append(alert)
+                self._notice('warning', f"🔍 {alert['message']}")
+
+        # Check app limits if a profile is provided
+        if self.profile and active_app in self.profile["app_limits"]:
+            limit_minutes = self.profile["app_limits"][active_app]
+            current_minutes = self.screen_time[active_app] / 60
+            if current_minutes >= limit_minutes and active_app not in self.exceeded_limits:
+                self.exceeded_limits.add(active_app)
+                self._notice('warning', f"⚠️ Time limit exceeded for {display_name}!")
+                self._notify(display_name, current_minutes, is_limit_reached=True)
+                if events:
+                    events.publish(LIMIT_EXCEEDED, profile=self.profile_key, application=active_app,
+                                   display_name=display_name,
+                                   used_minutes=current_minutes, limit_minutes=limit_minutes)
+                if self.email_config:
+                    # SMTP can take seconds; keep sampling meanwhile
+                    threading.Thread(target=send_limit_email, daemon=True, args=(
+                        display_name, current_minutes, self.profile["name"], self.email_config
+                    )).start()
+                    self._notice('info', f"📧 Sending email notification for {display_name}...")
+
+        if self.screen_time[active_app] >= NOTIFICATION_THRESHOLD:
+            self._notify(display_name, self.screen_time[active_app])
+
+    def snapshot(self):
+        """Progress, status, recent notices and the running per-app totals, for the live panel"""
+        elapsed = (self.end_time or time.time()) - self.start_time if self.start_time else 0.0
+        with self._lock:
+            usage = sorted(self.screen_time.items(), key=lambda item: item[1], reverse=True)
+            return {
+                'running': self._thread is not None and not self.done,
+                'done': self.done,
+                'elapsed': elapsed,
+                'progress': min(elapsed / self.duration, 1.0) if self.duration else 1.0,
+                'status': self.status,
+                'notices': list(self.notices),
+                'alerts': list(self.alerts),
+                'usage': [(get_display_name(app), seconds / 60) for app, seconds in usage],
+            }
+
+    def usage(self):
+        """Copies of the per-app seconds and window titles, for SessionFrames.add"""
+        with self._lock:
+            return dict(self.screen_time), {app: set(titles) for app, titles in self.window_titles.items()}
@@ -0,0 +1,171 @@
+import os
+import hashlib
+from abc import ABC, abstractmethod
+from typing import List, Any, Optional
+from langchain.llms.base import LLM
+from langchain.schema import Generation, LLMResult
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackend(ABC):
+    """Text generation backend used by RAGAnalyzer."""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(self, prompts: List[str]) -> List[str]:
+        """
+        Generate one completion per prompt.
+
+        Args:
+            prompts: Prompts to complete
+
+        Returns:
+            List[str]: Completions, in the same order as the prompts
+        """
+
+    def as_langchain_llm(self) -> LLM:
+        """Wrap the backend so it can be used in langchain chains."""
+        return BackendLLM(backend=self)
+
+
+class BackendLLM(LLM):
+    """Langchain LLM that forwards whole prompt batches to an LLMBackend."""
+
+    backend: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return f"backend-{self.backend.name}"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        return self.backend.generate([prompt])[0]
+
+    def _generate(self, prompts: List[str], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> LLMResult:
+        texts = self.backend.generate(prompts)
+        return LLMResult(generations=[[Generation(text=text)] for text in texts])
+
+
+class HubLLMBackend(LLMBackend):
+    """Remote Hugging Face Hub inference endpoint (one request per prompt)."""
+
+    name = "hub"
+
+    def __init__(self, repo_id: str = "google/flan-t5-large", model_kwargs: dict = None):
+        from langchain.llms import HuggingFaceHub
+
+        self.llm = HuggingFaceHub(
+            repo_id=repo_id,
+            model_kwargs=model_kwargs or {"temperature": 0.7, "max_length": 512}
+        )
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        return [self.llm(prompt) for prompt in prompts]
+
+    def as_langchain_llm(self) -> LLM:
+        return self.llm
+
+
+class LocalSeq2SeqBackend(LLMBackend):
+    """
+    Quantized seq2seq model run on the CPU with CTranslate2.
+
+    Prompts are tokenized together and decoded in batches, so insights for
+    many profiles share forward passes. Convert the model once with:
+
+        ct2-transformers-converter --model google/flan-t5-large \\
+            --output_dir models/flan-t5-large-ct2 --quantization int8
+    """
+
+    name = "local"
+
+    def __init__(self, model_dir: str = "models/flan-t5-large-ct2",
+                 tokenizer_name: str = "google/flan-t5-large", compute_type: str = "int8",
+                 max_batch_size: int = 16, max_decoding_length: int = 256, threads: int = 0):
+        """
+        Load the converted model and its tokenizer.
+
+        Args:
+            model_dir: Directory produced by ct2-transformers-converter
+            tokenizer_name: Hugging Face tokenizer matching the model
+            compute_type: CTranslate2 compute type (int8, int8_float32, float32)
+            max_batch_size: Max prompts decoded in one forward pass
+            max_decoding_length: Max generated tokens per prompt
+            threads: Intra-op threads (0 uses all cores)
+        """
+        import ctranslate2
+        from transformers import AutoTokenizer
+
+        self.translator = ctranslate2.Translator(
+            model_dir, device="cpu", compute_type=compute_type, intra_threads=threads
+        )
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+        self.max_batch_size = max_batch_size
+        self.max_decoding_length = max_decoding_length
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        if not prompts:
+            return []
+        batch_tokens = [
+            self.tokenizer.convert_ids_to_tokens(self.tokenizer.encode(prompt, truncation=True))
+            for prompt in prompts
+        ]
+        results = self.translator.translate_batch(
+            batch_tokens,
+            max_batch_size=self.max_batch_size,
+            max_decoding_length=self.max_decoding_length,
+            beam_size=1
+        )
+        return [
+            self.tokenizer.decode(
+                self.tokenizer.convert_tokens_to_ids(result.hypotheses[0]),
+                skip_special_tokens=True
+            )
+            for result in results
+        ]
+
+
+class StubLLMBackend(LLMBackend):
+    """Deterministic offline backend for tests and development."""
+
+    name = "stub"
+
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        self.calls.append(list(prompts))
+        completions = []
+        for prompt in prompts:
+            digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+            completions.append(f"Stub insights ({digest}): {len(prompt.split())} words of context reviewed.")
+        return completions
+
+
+LLM_BACKENDS = {
+    HubLLMBackend.name: HubLLMBackend,
+    LocalSeq2SeqBackend.name: LocalSeq2SeqBackend,
+    StubLLMBackend.name: StubLLMBackend,
+}
+
+
+def create_llm_backend(name: str = None, **kwargs) -> LLMBackend:
+    """
+    Create an LLM backend by name.
+
+    Args:
+        name: "hub", "local" or "stub"; defaults to the RAG_LLM_BACKEND
+            environment variable, then "hub"
+        **kwargs: Passed to the backend constructor
+
+    Returns:
+        LLMBackend: The backend instance
+    """
+    name = name or os.getenv("RAG_LLM_BACKEND", "hub")
+    if name not in LLM_BACKENDS:
+        raise ValueError(f"Unknown LLM backend '{name}'. Choose from: {', '.join(LLM_BACKENDS)}")
+    logger.info(f"Using {name} LLM backend")
+    return LLM_BACKENDS[name](**kwargs)
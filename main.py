@@ -1,33 +1,33 @@
 import streamlit as st
 st.set_page_config(page_title="Smart Screen Time Tracker", page_icon="🖥️", layout="wide")
 
-import json
 import os
-import sys
-from pathlib import Path
-import time
-import socket
-from collections import defaultdict
+import io
+import getpass
 
-import psutil
 import pandas as pd
 import matplotlib.pyplot as plt
-from plyer import notification
-import win32gui
-import win32process
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import smtplib
 from dotenv import load_dotenv
 
 from ai_analyzer import AIAnalyzer
-from utils import categorize_app, get_category_emoji, APP_CATEGORIES
+from utils import (categorize_app, get_display_name, load_profiles, APP_CATEGORIES,
+                   USAGE_THRESHOLDS, CATEGORY_THRESHOLDS, session_store_dir)
+from session_store import SessionStore
+from tracker_service import TrackerService
 
 # Load environment variables
 load_dotenv(override=True)
 
 # Constants
-PROFILES_FILE = "profiles.json"
+STREAMING_BASELINE_FILE = "streaming_baseline.npz"
+LIVE_REFRESH_SECONDS = 1.0  # How often the live panel redraws while tracking
+IDLE_REFRESH_SECONDS = 5.0  # How often an idle tab checks whether another tab started or finished a session
+HISTORY_PAGE_SIZE = 20  # Sessions per page in the history browser
+CHART_DPI = 96  # Keeps the 15-inch charts under Streamlit's max image width, so st.image serves them as-is
+EVENTS_URL = os.getenv("TRACKER_EVENTS_URL")  # e.g. http://127.0.0.1:8765/api/events
 
 # Email configuration
 EMAIL_CONFIG = {
@@ -38,376 +38,31 @@ EMAIL_CONFIG = {
     "smtp_port": 587
 }
 
-# Initialize session state for AI Analyzer
-if 'ai_analyzer' not in st.session_state:
+@st.cache_resource
+def tracker_service(os_user):
+    """One TrackerService per OS user for the whole server, so every tab and viewer shares one sampler."""
+    return TrackerService(os_user, STREAMING_BASELINE_FILE, EMAIL_CONFIG, EVENTS_URL)
+
+@st.cache_resource
+def shared_ai_analyzer():
+    """One AIAnalyzer for the whole server."""
     try:
-        st.session_state.ai_analyzer = AIAnalyzer()
+        return AIAnalyzer()
     except Exception as e:
-        st.error(f"Error initializing AI Analyzer: {str(e)}")
-        st.session_state.ai_analyzer = None
+        print(f"Error initializing AI Analyzer: {str(e)}")
+        return None
 
-# Initialize other session states if not present
+# Tracking state is shared through the service; session state only keeps what is per tab
+st.session_state.service = tracker_service(getpass.getuser())
+st.session_state.ai_analyzer = shared_ai_analyzer()
 if 'parent_authenticated' not in st.session_state:
     st.session_state.parent_authenticated = False
 if 'show_password_dialog' not in st.session_state:
     st.session_state.show_password_dialog = False
 if 'password_error' not in st.session_state:
     st.session_state.password_error = False
-if 'exceeded_limits' not in st.session_state:
-    st.session_state.exceeded_limits = set()
 if 'ai_insights' not in st.session_state:
     st.session_state.ai_insights = None
-if 'history' not in st.session_state:
-    st.session_state.history = []
-if 'total_tracked_time' not in st.session_state:
-    st.session_state.total_tracked_time = 0
-if 'session_count' not in st.session_state:
-    st.session_state.session_count = 0
-
-def load_profiles():
-    """Load profiles from JSON file"""
-    if os.path.exists(PROFILES_FILE):
-        with open(PROFILES_FILE, 'r') as f:
-            return json.load(f)
-    return {
-        "kids": {
-            "name": "Kids Profile",
-            "app_limits": {
-                "whatsapp.exe": 1,
-                "chrome.exe": 1,
-                "facebook.exe": 1
-            },
-            "is_default": True
-        },
-        "parent": {
-            "name": "Parent Profile",
-            "app_limits": {},
-            "is_default": False
-        }
-    }
-
-# Constants
-NOTIFICATION_THRESHOLD = 60  # seconds
-NOTIFICATION_COOLDOWN = 60  # seconds
-
-# Usage thresholds (in minutes)
-USAGE_THRESHOLDS = {
-    'Light': 30,      # 30 minutes
-    'Moderate': 60,   # 1 hour
-    'Heavy': 120,     # 2 hours
-    'Excessive': 180  # 3 hours
-}
-
-# Category-specific thresholds (percentage of total time)
-CATEGORY_THRESHOLDS = {
-    'Entertainment': {
-        'Moderate': 20,
-        'Heavy': 40,
-        'Excessive': 60
-    },
-    'Communication': {
-        'Moderate': 20,
-        'Heavy': 30,
-        'Excessive': 50
-    },
-    'Browsers': {
-        'Moderate': 30,
-        'Heavy': 50,
-        'Excessive': 70
-    },
-    'Development': {
-        'Light': 20,
-        'Moderate': 40,
-        'Productive': 60
-    },
-    'Office': {
-        'Light': 20,
-        'Moderate': 40,
-        'Productive': 60
-    }
-}
-
-IGNORED_APPS = ['svchost.exe', 'System Idle Process', 'explorer.exe', 'Registry', 
-                'csrss.exe', 'wininit.exe', 'Conhost.exe', 'RuntimeBroker.exe',
-                'SearchHost.exe', 'ShellExperienceHost.exe', 'StartMenuExperienceHost.exe',
-                'TextInputHost.exe', 'dllhost.exe', 'sihost.exe', 'fontdrvhost.exe']
-
-# Application display names with emojis
-APP_DISPLAY_NAMES = {
-    # Browsers
-    'chrome.exe': '🌐 Google Chrome',
-    'firefox.exe': '🦊 Firefox',
-    'msedge.exe': '🌐 Microsoft Edge',
-    'opera.exe': '🌐 Opera',
-    'brave.exe': '🦁 Brave',
-    'safari.exe': '🌐 Safari',
-    
-    # Development
-    'Code.exe': '💻 Visual Studio Code',
-    'devenv.exe': '🎯 Visual Studio',
-    'pycharm64.exe': '🐍 PyCharm',
-    'idea64.exe': '🧠 IntelliJ IDEA',
-    'webstorm64.exe': '🌐 WebStorm',
-    'android studio.exe': '🤖 Android Studio',
-    'eclipse.exe': '☀️ Eclipse',
-    'sublime_text.exe': '📝 Sublime Text',
-    'atom.exe': '⚛️ Atom',
-    'GitHubDesktop.exe': '🐱 GitHub Desktop',
-    'SourceTree.exe': '🌳 SourceTree',
-    'postman.exe': '📬 Postman',
-    'docker desktop.exe': '🐳 Docker Desktop',
-    
-    # Databases
-    'postgres.exe': '🐘 PostgreSQL',
-    'pgadmin4.exe': '🐘 pgAdmin',
-    'mysql.exe': '🐬 MySQL',
-    'mongodb.exe': '🍃 MongoDB',
-    'redis-server.exe': '🔴 Redis',
-    
-    # Communication
-    'discord.exe': '💬 Discord',
-    'slack.exe': '💼 Slack',
-    'teams.exe': '👥 Microsoft Teams',
-    'zoom.exe': '🎥 Zoom',
-    'skype.exe': '💬 Skype',
-    'telegram.exe': '✈️ Telegram',
-    'whatsapp.exe': '💬 WhatsApp',
-    'signal.exe': '🔒 Signal',
-    
-    # Office
-    'WINWORD.EXE': '📄 Word',
-    'EXCEL.EXE': '📊 Excel',
-    'POWERPNT.EXE': '📊 PowerPoint',
-    'OUTLOOK.EXE': '📧 Outlook',
-    'ONENOTE.EXE': '📔 OneNote',
-    'MSACCESS.EXE': '🗄️ Access',
-    'MSPUB.EXE': '📰 Publisher',
-    'AcroRd32.exe': '📄 Adobe Reader',
-    'Acrobat.exe': '📄 Adobe Acrobat',
-    'wps.exe': '📝 WPS Office',
-    'et.exe': '📊 WPS Spreadsheet',
-    'wpp.exe': '📊 WPS Presentation',
-    
-    # Creative
-    'photoshop.exe': '🎨 Photoshop',
-    'illustrator.exe': '✒️ Illustrator',
-    'premiere.exe': '🎬 Premiere Pro',
-    'afterfx.exe': '✨ After Effects',
-    'lightroom.exe': '📸 Lightroom',
-    'figma.exe': '🎨 Figma',
-    'sketch.exe': '💎 Sketch',
-    'blender.exe': '🎮 Blender',
-    'unity.exe': '🎮 Unity',
-    'unreal.exe': '🎮 Unreal Engine',
-    
-    # Entertainment
-    'spotify.exe': '🎵 Spotify',
-    'netflix.exe': '🎬 Netflix',
-    'steam.exe': '🎮 Steam',
-    'epicgameslauncher.exe': '🎮 Epic Games',
-    'vlc.exe': '🎥 VLC',
-    'wmplayer.exe': '🎵 Windows Media Player',
-    
-    # Utilities
-    'notepad.exe': '📝 Notepad',
-    'notepad++.exe': '📝 Notepad++',
-    'winrar.exe': '📦 WinRAR',
-    '7zg.exe': '📦 7-Zip',
-    'calc.exe': '🔢 Calculator',
-    'mspaint.exe': '🎨 Paint',
-    'snippingtool.exe': '✂️ Snipping Tool',
-    
-    # System
-    'taskmgr.exe': '📊 Task Manager',
-    'control.exe': '⚙️ Control Panel',
-    'cmd.exe': '⌨️ Command Prompt',
-    'powershell.exe': '💻 PowerShell',
-    'WindowsTerminal.exe': '💻 Windows Terminal'
-}
-
-def get_display_name(app_name):
-    """Get the friendly display name for an application."""
-    if app_name in APP_DISPLAY_NAMES:
-        return APP_DISPLAY_NAMES[app_name]
-    
-    # Make unknown app names more readable
-    name = app_name.replace('.exe', '')
-    name = ' '.join(word.capitalize() for word in name.split('_'))
-    return f"📱 {name}"
-
-def get_category_emoji(category):
-    """Get the emoji for a category."""
-    return APP_CATEGORIES.get(category, {}).get('emoji', '📱')
-
-last_notification = {}
-def send_notification(app_name, usage_time, is_limit_reached=False):
-    """Send smart notifications with context-aware messages."""
-    current_time = time.time()
-    if app_name not in last_notification or \
-       (current_time - last_notification.get(app_name, 0)) > NOTIFICATION_COOLDOWN:
-        
-        if is_limit_reached:
-            message = f"⚠️ Time limit reached for {app_name}! Please close the application."
-        else:
-            message = (f"You've been using {app_name} for {usage_time:.1f} sec.\n"
-                      f"Time for a quick break! 🎯")
-        
-        notification.notify(
-            title="⏰ Smart Screen Time Alert",
-            message=message,
-            timeout=10
-        )
-        last_notification[app_name] = current_time
-
-def get_active_window_process():
-    """Get the process name and title of the currently active window."""
-    try:
-        # Get the window handle
-        window = win32gui.GetForegroundWindow()
-        # Get the window title
-        window_title = win32gui.GetWindowText(window)
-        # Get the process ID
-        _, pid = win32process.GetWindowThreadProcessId(window)
-        # Get the process
-        process = psutil.Process(pid)
-        return process.name(), window_title
-    except Exception as e:
-        st.error(f"Error getting active window: {str(e)}")
-        return None, None
-
-def send_email_notification(app_name, usage_time, profile_name):
-    """Send email notification when time limit is exceeded."""
-    try:
-        st.write("Attempting to send email notification...")  # Debug info
-        
-        # Create message
-        msg = MIMEMultipart()
-        msg['From'] = EMAIL_CONFIG['sender_email']
-        msg['To'] = EMAIL_CONFIG['recipient_email']
-        msg['Subject'] = f"⚠️ Time Limit Exceeded - {app_name}"
-
-        # Email body
-        body = f"""
-        Time Limit Alert!
-
-        App: {app_name}
-        Usage Time: {usage_time:.1f} minutes
-        Profile: {profile_name}
-        Device: {socket.gethostname()}
-        Time: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-        This is an automated notification from your Screen Time Tracker.
-        """
-        msg.attach(MIMEText(body, 'plain'))
-
-        st.write("Connecting to SMTP server...")  # Debug info
-        
-        # Connect to SMTP server with explicit timeout
-        server = smtplib.SMTP(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'], timeout=30)
-        server.set_debuglevel(1)  # Enable SMTP debug
-        
-        st.write("Starting TLS...")  # Debug info
-        server.starttls()
-        
-        st.write("Logging in to email server...")  # Debug info
-        server.login(EMAIL_CONFIG['sender_email'], EMAIL_CONFIG['sender_password'])
-        
-        st.write("Sending email...")  # Debug info
-        server.send_message(msg)
-        server.quit()
-        
-        st.success(f"✅ Email notification sent successfully to {EMAIL_CONFIG['recipient_email']}")
-    except smtplib.SMTPAuthenticationError as e:
-        st.error(f"❌ Email Authentication Failed: Please check your email credentials. Error: {str(e)}")
-    except smtplib.SMTPException as e:
-        st.error(f"❌ SMTP Error: {str(e)}")
-    except socket.timeout:
-        st.error("❌ Email server connection timed out. Please check your internet connection.")
-    except Exception as e:
-        st.error(f"❌ Failed to send email: {str(e)}")
-        st.error(f"Error type: {type(e).__name__}")
-        import traceback
-        st.error(f"Traceback: {traceback.format_exc()}")
-
-def track_screen_time(duration=60, profile=None):
-    """Track screen time usage with enhanced display names and profile limits."""
-    screen_time = defaultdict(int)
-    window_titles = defaultdict(set)
-    start_time = time.time()
-    
-    # Create placeholders for status updates
-    status_placeholder = st.empty()
-    progress_bar = st.progress(0)
-    
-    # Add a stop button
-    stop_button = st.button("⏹️ Stop Tracking")
-    
-    try:
-        while (time.time() - start_time < duration) and not stop_button:
-            # Rerun every 30 seconds to maintain connection
-            if (time.time() - start_time) % 30 == 0:
-                st.experimental_rerun()
-            
-            active_app, window_title = get_active_window_process()
-            
-            # Update progress
-            progress = int(((time.time() - start_time) / duration) * 100)
-            progress_bar.progress(min(progress, 100))
-            
-            if active_app and active_app not in IGNORED_APPS:
-                # Handle Windows Store apps (like WhatsApp)
-                if active_app == "ApplicationFrameHost.exe" and window_title == "WhatsApp":
-                    active_app = "whatsapp.exe"  # Treat it as the regular WhatsApp process
-                
-                screen_time[active_app] += 1
-                if window_title:
-                    window_titles[active_app].add(window_title)
-                
-                # Check app limits if profile is provided
-                if profile and active_app in profile["app_limits"]:
-                    limit_minutes = profile["app_limits"][active_app]
-                    current_minutes = screen_time[active_app] / 60
-                    
-                    # Check if limit is exceeded and notification hasn't been sent
-                    if current_minutes >= limit_minutes and active_app not in st.session_state.exceeded_limits:
-                        status_placeholder.warning(f"⚠️ Time limit exceeded for {get_display_name(active_app)}!")
-                        send_notification(get_display_name(active_app), current_minutes, is_limit_reached=True)
-                        
-                        # Send email notification
-                        status_placeholder.info(f"📧 Sending email notification for {get_display_name(active_app)}...")
-                        send_email_notification(get_display_name(active_app), current_minutes, profile["name"])
-                        
-                        # Add to exceeded limits
-                        st.session_state.exceeded_limits.add(active_app)
-                        status_placeholder.success(f"✅ Added {active_app} to exceeded limits. Email notification sent.")
-                
-                # Update status less frequently to reduce UI updates
-                if time.time() % 2 == 0:  # Update every 2 seconds instead of every second
-                    status_placeholder.info(f"Currently tracking: {get_display_name(active_app)} - {window_title}")
-                
-                if screen_time[active_app] >= NOTIFICATION_THRESHOLD:
-                    send_notification(get_display_name(active_app), screen_time[active_app])
-            
-            # Sleep for a shorter duration to be more responsive
-            time.sleep(0.5)
-    except Exception as e:
-        status_placeholder.error(f"Error during tracking: {str(e)}")
-    finally:
-        # Clear placeholders
-        status_placeholder.empty()
-        progress_bar.empty()
-        
-        if not screen_time:
-            return pd.DataFrame(columns=["Application", "Time_Seconds", "Display_Name", "Time_Minutes"])
-        
-        # Create DataFrame with window titles
-        df = pd.DataFrame(list(screen_time.items()), columns=["Application", "Time_Seconds"])
-        df['Display_Name'] = df['Application'].apply(get_display_name)
-        df['Window_Titles'] = df['Application'].apply(lambda x: ', '.join(window_titles[x]))
-        df['Time_Minutes'] = df['Time_Seconds'] / 60
-        df['Category'] = df['Application'].apply(categorize_app)  # Add category directly
-        
-        return df.sort_values('Time_Minutes', ascending=False).reset_index(drop=True)
 
 def plot_screen_time(data):
     """Enhanced visualization of screen time usage."""
@@ -623,11 +278,305 @@ def send_test_email():
         st.error(f"Error type: {type(e).__name__}")
         return False
 
-def main():
-    # Add session state for tracking status
-    if 'is_tracking' not in st.session_state:
-        st.session_state.is_tracking = False
+@st.cache_data(max_entries=32, show_spinner=False)
+def screen_time_chart_png(data):
+    """plot_screen_time rendered to PNG once per session, so reruns don't redraw it."""
+    fig = plot_screen_time(data)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=CHART_DPI)
+    plt.close(fig)
+    return buffer.getvalue()
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def history_trend_png(session_totals):
+    """Trend chart of total minutes per session."""
+    fig = plt.figure(figsize=(12, 6))
+    plt.plot([f"Session {i+1}" for i in range(len(session_totals))], session_totals)
+    plt.title("Usage Trend Across Sessions")
+    plt.xticks(rotation=45)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=CHART_DPI)
+    plt.close(fig)
+    return buffer.getvalue()
+
+@st.cache_resource
+def history_store(store_dir):
+    """One SessionStore per directory for the whole server, so its summary cache is shared."""
+    return SessionStore(store_dir)
+
+@st.cache_resource
+def anomaly_registry():
+    """One AnomalyModelRegistry for the whole server, so each profile's detector is loaded once."""
+    # Imported here so scikit-learn loads with the first finished session instead of with the page
+    from model_registry import AnomalyModelRegistry
+    return AnomalyModelRegistry()
+
+def finish_tracking(service):
+    """Collect the finished session; only the tab that collects it saves it and updates the analyzer."""
+    collected = service.collect()
+    if collected is None:
+        return
+    entry, df = collected
+    timeline = service.frames.timeline(entry['session'])
+    try:
+        # Compare with the profile's earlier sessions and focus timelines before this one joins them
+        is_anomaly, description, score = anomaly_registry().detect_anomaly(entry['profile'], df, timeline=timeline)
+        entry['anomaly'] = {'is_anomaly': bool(is_anomaly), 'description': description, 'score': float(score)}
+    except Exception as e:
+        print(f"Error checking the session for anomalies: {e}")
+    try:
+        # The profile's detector appends the session to the history store and learns from it
+        anomaly_registry().add_session(entry['profile'], df, entry['timestamp'], timeline=timeline)
+    except Exception as e:
+        print(f"Error saving session to the history store: {e}")
+
+    # Update the vector store once per session instead of on every rerun
+    if st.session_state.ai_analyzer is not None:
+        st.session_state.ai_analyzer.update_with_session(df)
+
+def render_live_panel(page_revision):
+    """
+    Progress of the shared tracker. Runs as a fragment that refreshes itself,
+    and redraws the whole page once any tab starts or finishes a session.
+    """
+    service = st.session_state.service
+    tracker = service.tracker
+    if tracker is not None and tracker.done:
+        finish_tracking(service)
+    if service.revision != page_revision:
+        st.rerun()  # Redraw the whole page with the new state
+    if tracker is None:
+        return
+
+    snapshot = tracker.snapshot()
+    profile_name = tracker.profile['name'] if tracker.profile else tracker.profile_key
+    st.info(f"Tracking application usage for {profile_name}... Please continue using your computer normally.")
+    st.progress(snapshot['progress'])
+    st.info(snapshot['status'])
+    for level, message in snapshot['notices'][-3:]:
+        getattr(st, level)(message)
+    if snapshot['usage']:
+        st.dataframe(
+            pd.DataFrame(snapshot['usage'][:10], columns=['Application', 'Time (Minutes)']),
+            hide_index=True
+        )
+    if st.button("⏹️ Stop Tracking"):
+        service.stop()
+
+def filter_by_categories(df, selected_categories):
+    return df[df['Category'].isin(selected_categories)]
+
+def render_session_details(df, selected_categories):
+    # Show all apps by default
+    st.subheader("All Tracked Applications")
+    st.dataframe(
+        df[['Display_Name', 'Time_Minutes', 'Window_Titles']].rename(columns={
+            'Display_Name': 'Application',
+            'Time_Minutes': 'Time (Minutes)',
+            'Window_Titles': 'Window Titles'
+        })
+    )
     
+    # Optional category filtering
+    if st.checkbox("Filter by Categories"):
+        st.subheader("Filtered by Selected Categories")
+        filtered_df = filter_by_categories(df, selected_categories)
+        st.dataframe(
+            filtered_df[['Display_Name', 'Time_Minutes', 'Window_Titles']].rename(columns={
+                'Display_Name': 'Application',
+                'Time_Minutes': 'Time (Minutes)',
+                'Window_Titles': 'Window Titles'
+            })
+        )
+
+def render_session_charts(df, selected_categories):
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("All Applications Usage")
+        st.image(screen_time_chart_png(df))
+        
+        if st.checkbox("Show Filtered View"):
+            filtered_df = filter_by_categories(df, selected_categories)
+            st.subheader("Filtered Applications Usage")
+            if filtered_df.empty:
+                st.info("No applications in the selected categories.")
+            else:
+                st.image(screen_time_chart_png(filtered_df))
+            
+    with col2:
+        # Add productivity score
+        productive_categories = ['Development', 'Office', 'Databases']
+        productivity_score = (
+            df[df['Category'].isin(productive_categories)]['Time_Minutes'].sum() /
+            df['Time_Minutes'].sum() * 100
+        )
+        st.metric("Productivity Score", f"{productivity_score:.1f}%")
+
+def render_ai_analysis(df, session_number):
+    st.subheader("🧠 AI-Powered Analysis")
+    analyzer = st.session_state.ai_analyzer
+    if analyzer is None:
+        st.warning("AI Analyzer is not available.")
+        return
+
+    # One Gemini call per session; reruns and other tabs reuse the answer
+    cache = st.session_state.service.ai_analysis
+    if cache.get('session') != session_number:
+        with st.spinner("Analyzing your usage patterns..."):
+            cache.clear()
+            cache['session'] = session_number
+            cache['analysis'] = analyzer.analyze_current_session(df)
+            cache['recommendations'] = {}
+    analysis = cache['analysis']
+        
+    if 'error' in analysis:
+        st.error(analysis['error'])
+    else:
+        st.write("Analysis timestamp:", analysis['timestamp'])
+        st.markdown(analysis['insights'])
+        
+        # Category-specific recommendations
+        st.subheader("📱 Category-Specific Insights")
+        categories = df['Category'].unique()
+        selected_category = st.selectbox(
+            "Choose a category for detailed recommendations:",
+            categories
+        )
+        
+        if selected_category:
+            if selected_category not in cache['recommendations']:
+                with st.spinner(f"Generating recommendations for {selected_category}..."):
+                    cache['recommendations'][selected_category] = analyzer.get_focused_recommendations(selected_category)
+            st.markdown(cache['recommendations'][selected_category])
+
+SORT_OPTIONS = {
+    "Newest first": ('timestamp', True),
+    "Oldest first": ('timestamp', False),
+    "Longest first": ('total_minutes', True),
+    "Most apps first": ('apps', True),
+}
+
+def render_history_browser(profile_key):
+    """
+    One page of stored sessions at a time. Sorting, filtering and paging run
+    against the session store's cached summaries, and a session's rows are
+    only read when it is selected.
+    """
+    store = history_store(session_store_dir(profile_key))
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        sort_label = st.selectbox("Sort", list(SORT_OPTIONS), key="history_sort")
+    with col2:
+        category = st.selectbox("Category", ["All"] + list(APP_CATEGORIES), key="history_category")
+    with col3:
+        application = st.text_input("Application (e.g. chrome.exe)", key="history_app").strip()
+    with col4:
+        min_minutes = st.number_input("Minimum minutes", min_value=0, value=0, step=5, key="history_min")
+
+    sort_by, descending = SORT_OPTIONS[sort_label]
+    filters = dict(sort_by=sort_by, descending=descending, application=application or None,
+                   category=None if category == "All" else category, min_minutes=min_minutes or None)
+    _, total = store.query_sessions(limit=0, **filters)
+    if not total:
+        st.info("No stored sessions match these filters.")
+        return
+
+    pages = (total + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+    page_number = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, key="history_page")
+    page, _ = store.query_sessions(offset=(page_number - 1) * HISTORY_PAGE_SIZE, limit=HISTORY_PAGE_SIZE, **filters)
+    st.caption(f"{total} sessions")
+
+    headers = pd.DataFrame({
+        'Session': page['session_id'].to_numpy(),
+        'Time': [pd.Timestamp.fromtimestamp(int(stamp)).strftime('%Y-%m-%d %H:%M:%S') for stamp in page['timestamp']],
+        'Minutes': page['total_minutes'].round(1).to_numpy(),
+        'Apps': page['apps'].to_numpy(),
+        'Most Used': [get_display_name(app) if isinstance(app, str) else "" for app in page['top_application']],
+    })
+    selection = st.dataframe(headers, hide_index=True, on_select="rerun", selection_mode="single-row",
+                             key="history_table")
+    if selection.selection.rows:
+        session_id = int(page['session_id'].iloc[selection.selection.rows[0]])
+        rows = store.load_session(session_id)
+        st.dataframe(rows[['Display_Name', 'Time_Minutes', 'Window_Titles']], hide_index=True)
+    else:
+        st.caption("Select a session to see its applications.")
+
+def show_session_history(profile_key):
+    """Trend of the sessions tracked since the server started and the stored history of the profile."""
+    st.header("📅 Session History")
+    history_tab1, history_tab2 = st.tabs(["📈 Trend", "📋 Details"])
+    
+    with history_tab1:
+        if len(st.session_state.service.history) > 1:
+            st.image(history_trend_png(st.session_state.service.session_totals()))
+        else:
+            st.info("Track at least two sessions to see a trend.")
+        
+    with history_tab2:
+        st.fragment(render_history_browser)(profile_key)
+
+def show_session_results(selected_categories, profile_key):
+    """Summary, history and analysis of the latest session."""
+    service = st.session_state.service
+    session_number = len(service.history)
+    df = service.latest()
+
+    # Summary statistics
+    st.header("📊 Usage Summary")
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Apps Tracked", len(df))
+    with col2:
+        total_time = df['Time_Minutes'].sum()
+        st.metric("Session Time (min)", f"{total_time:.1f}")
+    with col3:
+        if len(df) > 0:
+            most_used = df.iloc[0]['Display_Name']
+            st.metric("Most Used App", most_used)
+    with col4:
+        st.metric("Total Sessions", service.session_count)
+
+    # Session History
+    show_session_history(profile_key)
+
+    # Current Session Analysis
+    st.header("📊 Current Session Analysis")
+    analysis_tab1, analysis_tab2, analysis_tab3, analysis_tab4 = st.tabs(["📑 Details", "📈 Charts", "🤖 Insights", "🧠 AI Analysis"])
+    
+    # Each tab is a fragment: its checkboxes and selectboxes only rerun that tab
+    with analysis_tab1:
+        st.fragment(render_session_details)(df, selected_categories)
+
+    with analysis_tab2:
+        st.fragment(render_session_charts)(df, selected_categories)
+
+    with analysis_tab3:
+        anomaly = service.history[-1].get('anomaly')
+        if anomaly and anomaly['is_anomaly']:
+            st.warning(f"🚨 Unusual session for this profile: {anomaly['description']}")
+
+        # AI Insights
+        insights, category_usage = analyze_usage_patterns(df)  # Using full dataset for insights
+        
+        for insight in insights:
+            if insight['type'] == 'warning':
+                st.warning(insight['message'])
+            elif insight['type'] == 'info':
+                st.info(insight['message'])
+            elif insight['type'] == 'health':
+                st.success(insight['message'])
+
+        # Recommendations
+        st.subheader("💡 Recommendations")
+        recommendations = generate_ai_recommendations(df, total_time)  # Using full dataset for recommendations
+        for i, rec in enumerate(recommendations, 1):
+            st.write(f"{i}. {rec}")
+
+    with analysis_tab4:
+        st.fragment(render_ai_analysis)(df, session_number)
+
+def main():
     # Load profiles
     profiles = load_profiles()
     
@@ -736,164 +685,30 @@ def main():
             default=list(APP_CATEGORIES.keys())
         )
 
-    # Modify the tracking button behavior
-    if st.button("🎯 Start Smart Tracking", type="primary", disabled=st.session_state.is_tracking):
-        st.session_state.is_tracking = True
-        st.session_state.session_count += 1
-        st.info("Starting to track your application usage... Please continue using your computer normally.")
-        
-        # Track screen time with profile
-        df = track_screen_time(duration, selected_profile)
-        st.session_state.is_tracking = False  # Reset tracking status
-        
-        if not df.empty:
-            # Add to history
-            st.session_state.history.append({
-                'timestamp': pd.Timestamp.now(),
-                'data': df,
-                'duration': duration
-            })
-            st.session_state.total_tracked_time += duration
-
-            # Summary statistics
-            st.header("📊 Usage Summary")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.metric("Total Apps Tracked", len(df))
-            with col2:
-                total_time = df['Time_Minutes'].sum()
-                st.metric("Session Time (min)", f"{total_time:.1f}")
-            with col3:
-                if len(df) > 0:
-                    most_used = df.iloc[0]['Display_Name']
-                    st.metric("Most Used App", most_used)
-            with col4:
-                st.metric("Total Sessions", st.session_state.session_count)
-
-            # Session History
-            if len(st.session_state.history) > 1:
-                st.header("📅 Session History")
-                history_tab1, history_tab2 = st.tabs(["📈 Trend", "📋 Details"])
-                
-                with history_tab1:
-                    # Create trend chart
-                    history_data = pd.concat([h['data'] for h in st.session_state.history])
-                    history_data['Session'] = [f"Session {i+1}" for i in range(len(st.session_state.history)) for _ in range(len(st.session_state.history[i]['data']))]
-                    
-                    fig = plt.figure(figsize=(12, 6))
-                    plt.plot(history_data.groupby('Session')['Time_Minutes'].sum())
-                    plt.title("Usage Trend Across Sessions")
-                    plt.xticks(rotation=45)
-                    st.pyplot(fig)
-                    
-                with history_tab2:
-                    for i, session in enumerate(st.session_state.history):
-                        with st.expander(f"Session {i+1} - {session['timestamp'].strftime('%Y-%m-%d %H:%M:%S')}"):
-                            st.dataframe(session['data'][['Display_Name', 'Time_Minutes', 'Window_Titles']])
-
-            # Current Session Analysis
-            st.header("📊 Current Session Analysis")
-            analysis_tab1, analysis_tab2, analysis_tab3, analysis_tab4 = st.tabs(["📑 Details", "📈 Charts", "🤖 Insights", "🧠 AI Analysis"])
-            
-            with analysis_tab1:
-                # Show all apps by default
-                st.subheader("All Tracked Applications")
-                st.dataframe(
-                    df[['Display_Name', 'Time_Minutes', 'Window_Titles']].rename(columns={
-                        'Display_Name': 'Application',
-                        'Time_Minutes': 'Time (Minutes)',
-                        'Window_Titles': 'Window Titles'
-                    })
-                )
-                
-                # Optional category filtering
-                if st.checkbox("Filter by Categories"):
-                    st.subheader("Filtered by Selected Categories")
-                    filtered_df = df[df['Application'].apply(lambda x: categorize_app(x) in selected_categories)]
-                    st.dataframe(
-                        filtered_df[['Display_Name', 'Time_Minutes', 'Window_Titles']].rename(columns={
-                            'Display_Name': 'Application',
-                            'Time_Minutes': 'Time (Minutes)',
-                            'Window_Titles': 'Window Titles'
-                        })
-                    )
-
-            with analysis_tab2:
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.subheader("All Applications Usage")
-                    fig = plot_screen_time(df)
-                    st.pyplot(fig)
-                    
-                    if st.checkbox("Show Filtered View"):
-                        filtered_df = df[df['Application'].apply(lambda x: categorize_app(x) in selected_categories)]
-                        st.subheader("Filtered Applications Usage")
-                        fig_filtered = plot_screen_time(filtered_df)
-                        st.pyplot(fig_filtered)
-                        
-                with col2:
-                    # Add productivity score
-                    productivity_data = df.copy()
-                    productivity_data['Category'] = productivity_data['Application'].apply(categorize_app)
-                    productive_categories = ['Development', 'Office', 'Databases']
-                    productivity_score = (
-                        productivity_data[productivity_data['Category'].isin(productive_categories)]['Time_Minutes'].sum() /
-                        productivity_data['Time_Minutes'].sum() * 100
-                    )
-                    st.metric("Productivity Score", f"{productivity_score:.1f}%")
-
-            with analysis_tab3:
-                # AI Insights
-                insights, category_usage = analyze_usage_patterns(df)  # Using full dataset for insights
-                
-                for insight in insights:
-                    if insight['type'] == 'warning':
-                        st.warning(insight['message'])
-                    elif insight['type'] == 'info':
-                        st.info(insight['message'])
-                    elif insight['type'] == 'health':
-                        st.success(insight['message'])
-
-                # Recommendations
-                st.subheader("💡 Recommendations")
-                recommendations = generate_ai_recommendations(df, total_time)  # Using full dataset for recommendations
-                for i, rec in enumerate(recommendations, 1):
-                    st.write(f"{i}. {rec}")
-
-            with analysis_tab4:
-                st.subheader("🧠 AI-Powered Analysis")
-                
-                # Get static analysis for the current session
-                with st.spinner("Analyzing your usage patterns..."):
-                    analysis = st.session_state.ai_analyzer.analyze_current_session(df.to_dict('records'))
-                    
-                if 'error' in analysis:
-                    st.error(analysis['error'])
-                else:
-                    st.write("Analysis timestamp:", analysis['timestamp'])
-                    st.markdown(analysis['insights'])
-                    
-                    # Category-specific recommendations
-                    st.subheader("📱 Category-Specific Insights")
-                    categories = df['Category'].unique()
-                    selected_category = st.selectbox(
-                        "Choose a category for detailed recommendations:",
-                        categories
-                    )
-                    
-                    if selected_category:
-                        with st.spinner(f"Generating recommendations for {selected_category}..."):
-                            recommendations = st.session_state.ai_analyzer.get_focused_recommendations(selected_category)
-                            st.markdown(recommendations)
-                
-                # Update vector store with current session
-                st.session_state.ai_analyzer.update_with_session(df.to_dict('records'))
-        else:
-            st.warning("No application usage was detected during the tracking period. Try increasing the duration or ensure you're actively using applications.")
+    # Tracking runs in the shared service's background thread; this button only starts it
+    service = st.session_state.service
+    is_tracking = service.is_tracking
+    if st.button("🎯 Start Smart Tracking", type="primary", disabled=is_tracking):
+        service.start(duration, selected_profile, selected_profile_key)
+        st.rerun()
+
+    # The live panel redraws itself every second while tracking, without rerunning the page;
+    # idle tabs poll slowly so they notice sessions started from another tab
+    st.fragment(render_live_panel, run_every=LIVE_REFRESH_SECONDS if is_tracking else IDLE_REFRESH_SECONDS)(service.revision)
+
+    if service.last_empty and not is_tracking:
+        st.warning("No application usage was detected during the tracking period. Try increasing the duration or ensure you're actively using applications.")
+    if service.history and not is_tracking:
+        show_session_results(selected_categories, selected_profile_key)
+    else:
+        store = history_store(session_store_dir(selected_profile_key))
+        store.refresh()  # The tracker daemon may have stored sessions meanwhile
+        if len(store):
+            show_session_history(selected_profile_key)
 
     # Add a note about connection stability
-    if st.session_state.is_tracking:
-        st.warning("⚠️ Tracking in progress. Please keep this browser tab open. If the connection drops, the data will be saved automatically.")
+    if is_tracking:
+        st.warning("⚠️ Tracking in progress. It keeps running if this tab is closed, and every open tab shows the same session.")
 
     # Help section
     with st.sidebar.expander("ℹ️ Help"):
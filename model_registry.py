@@ -0,0 +1,129 @@
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from anomaly_detector import AnomalyDetector, session_features
+from session_store import SessionStore
+from sketches import SketchStore
+from utils import DEFAULT_DEVICE, MODELS_DIR, session_store_dir, shard_dir
+
+class AnomalyModelRegistry:
+    """
+    One AnomalyDetector per (profile, device), so each profile is compared
+    against its own baseline instead of a household-wide one.
+
+    Each shard keeps its feature cache and model bundle under
+    ``<base_dir>/<device>/<profile>/`` and reads and appends sessions through
+    the shard's session store, the one the app's history browser, the tracker
+    daemon and the API server use. Detectors are loaded on demand and the
+    least recently used ones are closed once more than ``max_loaded`` are in
+    memory; their saved model bundles make reloading cheap. A loaded detector
+    checks the store's revision whenever it is handed out, so sessions the
+    daemon or the ingest server appended meanwhile join its history.
+    """
+
+    def __init__(self, base_dir=MODELS_DIR, max_loaded=32, **detector_kwargs):
+        self.base_dir = base_dir
+        self.max_loaded = max_loaded
+        self.detector_kwargs = detector_kwargs
+        self._detectors = OrderedDict()
+        self._lock = threading.Lock()
+        # Sessions saved through the registry update the fleet usage sketches too
+        self.sketches = SketchStore(base_dir)
+
+    def _shard_dir(self, profile, device):
+        return shard_dir(profile, device, self.base_dir)
+
+    def get(self, profile, device=None):
+        """Return the detector for a profile on a device, loading it if needed"""
+        key = (profile, device or DEFAULT_DEVICE)
+        with self._lock:
+            detector = self._detectors.get(key)
+            if detector is not None:
+                self._detectors.move_to_end(key)
+        if detector is not None:
+            detector.refresh()
+            return detector
+
+        shard_dir = self._shard_dir(*key)
+        os.makedirs(shard_dir, exist_ok=True)
+        detector = AnomalyDetector(
+            history_file=os.path.join(shard_dir, "tracking_history.json"),
+            store=SessionStore(session_store_dir(*key, self.base_dir), on_append=self.sketches.recorder(*key)),
+            **self.detector_kwargs
+        )
+
+        evicted = []
+        with self._lock:
+            if key in self._detectors:
+                # Another thread loaded the same shard meanwhile; keep theirs
+                evicted.append(detector)
+                detector = self._detectors[key]
+                self._detectors.move_to_end(key)
+            else:
+                self._detectors[key] = detector
+                while len(self._detectors) > self.max_loaded:
+                    evicted.append(self._detectors.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return detector
+
+    def loaded(self):
+        """Keys of the detectors currently in memory, least recently used first"""
+        with self._lock:
+            return list(self._detectors)
+
+    def add_session(self, profile, session_data, timestamp, device=None, timeline=None):
+        """Add a finished session (and optionally its focus timeline) to its profile's history"""
+        self.get(profile, device).update_history(session_data, timestamp, timeline=timeline)
+
+    def detect_anomaly(self, profile, session_data, device=None, timeline=None):
+        """Check one session against its own profile's model and timeline baseline"""
+        return self.get(profile, device).detect_anomaly(session_data, timeline=timeline)
+
+    def score_many(self, sessions):
+        """
+        Score many sessions, grouping them by model.
+
+        Args:
+            sessions: Iterable of dicts with 'profile', 'data' (a session DataFrame
+                or its records) and optionally 'device'
+
+        Returns:
+            list: (is_anomaly, anomaly_score) per session in input order;
+                sessions whose model has too little history score (False, 0.0)
+        """
+        sessions = list(sessions)
+        results = [(False, 0.0)] * len(sessions)
+
+        groups = OrderedDict()
+        for i, session in enumerate(sessions):
+            key = (session['profile'], session.get('device') or DEFAULT_DEVICE)
+            groups.setdefault(key, []).append(i)
+
+        for (profile, device), indices in groups.items():
+            detector = self.get(profile, device)
+            # One long frame of the group's rows, keyed by position in the group
+            frames = []
+            for j, i in enumerate(indices):
+                data = sessions[i]['data']
+                if not isinstance(data, pd.DataFrame):
+                    data = pd.DataFrame(data, columns=['Category', 'Time_Minutes'])
+                frames.append(data[['Category', 'Time_Minutes']].assign(session_id=j))
+            X = session_features(pd.concat(frames, ignore_index=True), np.arange(len(indices)))
+
+            scored = detector.score_features(X)
+            if scored is None:
+                continue
+            for i, is_anomaly, score in zip(indices, *scored):
+                results[i] = (bool(is_anomaly), float(score))
+        return results
+
+    def close(self):
+        """Stop background retraining for every loaded detector"""
+        with self._lock:
+            detectors = list(self._detectors.values())
+            self._detectors.clear()
+        for detector in detectors:
+            detector.close()
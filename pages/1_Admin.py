@@ -6,17 +6,13 @@ import os
 import sys
 from pathlib import Path
 
-# Add the parent directory to the Python path so we can import from main.py
+# Add the parent directory to the Python path so we can import utils.py
 parent_dir = str(Path(__file__).parent.parent)
 if parent_dir not in sys.path:
     sys.path.append(parent_dir)
 
-from main import get_display_name, load_profiles, PROFILES_FILE
-
-def save_profiles(profiles):
-    """Save profiles to JSON file"""
-    with open(PROFILES_FILE, 'w') as f:
-        json.dump(profiles, f, indent=4)
+# utils has no UI or network side effects; importing main would start the whole tracker app
+from utils import get_display_name, load_profiles, save_profiles
 
 st.title("⚙️ Screen Time Tracker Admin")
 
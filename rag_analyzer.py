@@ -3,36 +3,72 @@ import json
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
-import numpy as np
-from sentence_transformers import SentenceTransformer
-import faiss
-import chromadb
-from chromadb.config import Settings
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.embeddings import HuggingFaceEmbeddings
-from langchain.vectorstores import Chroma
-from langchain.chains import RetrievalQA
-from langchain.llms import HuggingFaceHub
+from lazy_imports import lazy_import
 import logging
 
+# The ML stack costs seconds of import time, so it is loaded on first use
+embedding_runtimes = lazy_import("embedding_runtime")
+langchain_vectorstores = lazy_import("langchain.vectorstores")
+langchain_chains = lazy_import("langchain.chains")
+llm_backends = lazy_import("llm_backends")
+faiss_store = lazy_import("faiss_store")
+time_aware_retriever = lazy_import("time_aware_retriever")
+
+INSIGHTS_PROMPT = """
+            Based on the following usage data, provide personalized insights and recommendations:
+            
+            {context}
+            
+            Please include:
+            1. Overall usage patterns and trends
+            2. Productivity vs. distraction analysis
+            3. Specific recommendations for better time management
+            4. Health and wellness suggestions based on usage patterns
+            5. Tips for maintaining focus and reducing distractions
+            
+            Keep the response concise, friendly, and actionable.
+            """
+
+# Same layout as the "stuff" RetrievalQA prompt, for the batched path
+STUFF_PROMPT = """Use the following pieces of context to answer the question at the end. If you don't know the answer, just say that you don't know, don't try to make up an answer.
+
+{documents}
+
+Question: {question}
+Helpful Answer:"""
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class RAGAnalyzer:
-    def __init__(self, data_dir: str = "data", db_dir: str = "chroma_db"):
+    def __init__(self, data_dir: str = "data", db_dir: str = "chroma_db",
+                 vector_backend: str = "chroma", llm_backend=None, embedding_runtime: str = None):
         """
         Initialize the RAG analyzer with data and database directories.
         
         Args:
             data_dir: Directory to store usage data
             db_dir: Directory to store the vector database
+            vector_backend: Vector store implementation, "chroma" or "faiss"
+            llm_backend: LLMBackend instance or backend name ("hub", "local",
+                "stub"); defaults to the RAG_LLM_BACKEND environment variable
+            embedding_runtime: "torch", "int8", "onnx" or "onnx-int8"; defaults
+                to the RAG_EMBEDDING_RUNTIME environment variable, then "torch"
         """
+        if vector_backend not in ("chroma", "faiss"):
+            raise ValueError(f"Unsupported vector backend: {vector_backend}")
+
         self.data_dir = data_dir
         self.db_dir = db_dir
+        self.vector_backend = vector_backend
+        self.llm_backend = llm_backend
+        self.embedding_runtime = embedding_runtime
         self.usage_history = []
         self.vector_store = None
         self.llm = None
+        self.retriever = None
+        self._qa_chain = None
         
         # Create directories if they don't exist
         os.makedirs(data_dir, exist_ok=True)
@@ -45,21 +81,27 @@ class RAGAnalyzer:
         """Initialize the RAG components (embeddings, vector store, LLM)."""
         try:
             # Initialize embeddings
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2"
-            )
+            self.embeddings = embedding_runtimes.create_embeddings(self.embedding_runtime)
             
             # Initialize vector store
-            self.vector_store = Chroma(
-                persist_directory=self.db_dir,
-                embedding_function=self.embeddings
-            )
+            if self.vector_backend == "faiss":
+                self.vector_store = faiss_store.FaissVectorStore(
+                    persist_directory=self.db_dir,
+                    embedding_function=self.embeddings
+                )
+            else:
+                self.vector_store = langchain_vectorstores.Chroma(
+                    persist_directory=self.db_dir,
+                    embedding_function=self.embeddings
+                )
             
             # Initialize LLM
-            self.llm = HuggingFaceHub(
-                repo_id="google/flan-t5-large",
-                model_kwargs={"temperature": 0.7, "max_length": 512}
-            )
+            if not isinstance(self.llm_backend, llm_backends.LLMBackend):
+                self.llm_backend = llm_backends.create_llm_backend(self.llm_backend)
+            self.llm = self.llm_backend.as_langchain_llm()
+            
+            # Summaries are prefiltered by period/profile and reranked by recency
+            self.retriever = time_aware_retriever.TimeWindowRetriever(vectorstore=self.vector_store)
             
             logger.info("RAG components initialized successfully")
         except Exception as e:
@@ -113,71 +155,145 @@ class RAGAnalyzer:
         except Exception as e:
             logger.error(f"Error loading usage data: {str(e)}")
     
-    def generate_weekly_insights(self) -> str:
+    def _get_qa_chain(self):
+        """Build the RetrievalQA chain once and reuse it for every insight request."""
+        if self._qa_chain is None:
+            self._qa_chain = langchain_chains.RetrievalQA.from_chain_type(
+                llm=self.llm,
+                chain_type="stuff",
+                retriever=self.retriever
+            )
+        return self._qa_chain
+    
+    def _weekly_context(self, df: pd.DataFrame, profile: str, now: datetime) -> str:
+        """Summarize the last week of usage for a profile (None if there was none)."""
+        last_week = now - timedelta(days=7)
+        weekly_data = df[df['timestamp'] >= last_week]
+        if profile is not None:
+            weekly_data = weekly_data[weekly_data['metadata'].apply(
+                lambda metadata: (metadata or {}).get('profile') == profile
+            )]
+        
+        if weekly_data.empty:
+            return None
+        
+        # Generate summary statistics
+        total_time = weekly_data['duration'].sum()
+        category_time = weekly_data.groupby('category')['duration'].sum()
+        top_apps = weekly_data.groupby('app_name')['duration'].sum().nlargest(5)
+        
+        return f"""
+            Weekly Usage Summary:
+            - Total Usage Time: {total_time:.1f} minutes
+            - Category Distribution: {category_time.to_dict()}
+            - Top Applications: {top_apps.to_dict()}
+            """
+    
+    def _store_summaries(self, contexts: List[str], profiles: List[str], now: datetime):
+        """Add weekly summaries to the vector store, tagged with their period and profile."""
+        last_week = now - timedelta(days=7)
+        self.vector_store.add_texts(contexts, metadatas=[{
+            "period_start": last_week.timestamp(),
+            "period_end": now.timestamp(),
+            "profile": profile or "all"
+        } for profile in profiles])
+    
+    def _usage_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.usage_history)
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        if 'metadata' not in df.columns:
+            df['metadata'] = None
+        return df
+    
+    def generate_weekly_insights(self, profile: str = None, lookback_days: int = 28) -> str:
         """
         Generate weekly insights using RAG.
         
+        Args:
+            profile: Only use usage logged for this profile (metadata["profile"])
+            lookback_days: How far back stored summaries are retrieved for context
+        
         Returns:
             str: Generated insights
         """
         try:
-            # Prepare data for analysis
-            df = pd.DataFrame(self.usage_history)
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            
-            # Filter for last week
-            last_week = datetime.now() - timedelta(days=7)
-            weekly_data = df[df['timestamp'] >= last_week]
-            
-            if weekly_data.empty:
+            now = datetime.now()
+            context = self._weekly_context(self._usage_frame(), profile, now)
+            if context is None:
                 return "No usage data available for the past week."
             
-            # Generate summary statistics
-            total_time = weekly_data['duration'].sum()
-            category_time = weekly_data.groupby('category')['duration'].sum()
-            top_apps = weekly_data.groupby('app_name')['duration'].sum().nlargest(5)
-            
-            # Create context for RAG
-            context = f"""
-            Weekly Usage Summary:
-            - Total Usage Time: {total_time:.1f} minutes
-            - Category Distribution: {category_time.to_dict()}
-            - Top Applications: {top_apps.to_dict()}
-            """
-            
-            # Add context to vector store
-            self.vector_store.add_texts([context])
-            
-            # Create prompt template
-            prompt = """
-            Based on the following usage data, provide personalized insights and recommendations:
-            
-            {context}
+            self._store_summaries([context], [profile], now)
             
-            Please include:
-            1. Overall usage patterns and trends
-            2. Productivity vs. distraction analysis
-            3. Specific recommendations for better time management
-            4. Health and wellness suggestions based on usage patterns
-            5. Tips for maintaining focus and reducing distractions
-            
-            Keep the response concise, friendly, and actionable.
-            """
-            
-            # Generate insights using RAG
-            qa_chain = RetrievalQA.from_chain_type(
-                llm=self.llm,
-                chain_type="stuff",
-                retriever=self.vector_store.as_retriever()
+            # Generate insights using RAG over this profile's recent summaries only
+            # The window travels with this request, so concurrent requests share the chain safely
+            config = time_aware_retriever.window_config(
+                (now - timedelta(days=lookback_days)).timestamp(),
+                now.timestamp(),
+                profile or "all"
             )
-            
-            response = qa_chain.run(prompt.format(context=context))
-            return response
+            response = self._get_qa_chain().invoke({"query": INSIGHTS_PROMPT.format(context=context)}, config=config)
+            return response["result"]
             
         except Exception as e:
             logger.error(f"Error generating insights: {str(e)}")
             return "Unable to generate insights at this time."
     
+    def generate_insights_batch(self, profiles: List[str], lookback_days: int = 28) -> Dict[str, str]:
+        """
+        Generate weekly insights for many profiles with one batched LLM call.
+        
+        Retrieval runs per profile, then every prompt is handed to the LLM
+        backend together so a local backend can decode them in shared batches.
+        
+        Args:
+            profiles: Profiles to generate insights for
+            lookback_days: How far back stored summaries are retrieved for context
+            
+        Returns:
+            Dict[str, str]: Insights keyed by profile
+        """
+        insights = {}
+        try:
+            now = datetime.now()
+            df = self._usage_frame()
+            contexts = {}
+            for profile in profiles:
+                context = self._weekly_context(df, profile, now)
+                if context is None:
+                    insights[profile] = "No usage data available for the past week."
+                else:
+                    contexts[profile] = context
+            
+            if not contexts:
+                return insights
+            
+            # One embedding batch for every new summary
+            self._store_summaries(list(contexts.values()), list(contexts.keys()), now)
+            
+            prompts = []
+            for profile, context in contexts.items():
+                question = INSIGHTS_PROMPT.format(context=context)
+                documents = self.retriever.invoke(
+                    question,
+                    start=(now - timedelta(days=lookback_days)).timestamp(),
+                    end=now.timestamp(),
+                    profile=profile or "all"
+                )
+                prompts.append(STUFF_PROMPT.format(
+                    documents="\n\n".join(doc.page_content for doc in documents),
+                    question=question
+                ))
+            
+            for profile, response in zip(contexts.keys(), self.llm_backend.generate(prompts)):
+                insights[profile] = response
+            return insights
+            
+        except Exception as e:
+            logger.error(f"Error generating batch insights: {str(e)}")
+            for profile in profiles:
+                insights.setdefault(profile, "Unable to generate insights at this time.")
+            return insights
+    
     def get_daily_summary(self) -> str:
         """
         Generate a daily summary of usage patterns.
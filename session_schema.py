@@ -0,0 +1,170 @@
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from utils import APP_CATEGORIES, get_display_name, categorize_app
+
+# Every value categorize_app can return, so all sessions share one category dtype
+CATEGORIES = list(APP_CATEGORIES) + ['Productivity', 'Other']
+CATEGORY_DTYPE = pd.CategoricalDtype(CATEGORIES)
+_CATEGORY_CODES = {category: code for code, category in enumerate(CATEGORIES)}
+
+# Column order of a session frame, as track_screen_time produced it
+SESSION_COLUMNS = ['Application', 'Time_Seconds', 'Display_Name', 'Window_Titles', 'Time_Minutes', 'Category']
+
+class Vocabulary:
+    """Interns strings to dense integer ids shared by every session."""
+
+    def __init__(self):
+        self.ids = {}
+        self.values = []
+        self._dtype = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+            self._dtype = None
+        return value_id
+
+    def dtype(self):
+        """Categorical dtype over the interned values (rebuilt only after new values arrive)"""
+        if self._dtype is None:
+            self._dtype = pd.CategoricalDtype(self.values)
+        return self._dtype
+
+class SessionFrames:
+    """
+    Tracked sessions kept column-wise instead of one DataFrame each.
+
+    Every session's rows are appended to shared compact arrays: application
+    and category codes, int32 seconds, and window titles as interned ids
+    (a flat id array plus per-row offsets). Applications and titles are
+    interned once for all sessions, so a repeated browser tab title costs
+    four bytes per occurrence rather than a new string.
+
+    ``frame(i)`` materializes one session with the usual session columns,
+    using categorical dtypes shared by all sessions, when a view or an
+    analyzer needs it.
+    """
+
+    def __init__(self):
+        self.applications = Vocabulary()
+        self.display_names = Vocabulary()
+        self.titles = Vocabulary()
+        self._display_codes = array('i')  # Display name id of each application id
+        self._app_codes = array('i')
+        self._category_codes = array('b')
+        self._seconds = array('i')
+        self._title_starts = array('i', [0])  # Row r's titles are _title_ids[_title_starts[r]:_title_starts[r + 1]]
+        self._title_ids = array('i')
+        self._row_starts = array('i', [0])  # Session i's rows are _row_starts[i]:_row_starts[i + 1]
+        # Focus timeline as parallel arrays of (application id, start, end)
+        self._timeline_apps = array('i')
+        self._timeline_bounds = array('d')
+        self._timeline_starts = array('i', [0])
+
+    def __len__(self):
+        return len(self._row_starts) - 1
+
+    def _app_id(self, app_name):
+        app_id = self.applications.intern(app_name)
+        if app_id == len(self._display_codes):
+            self._display_codes.append(self.display_names.intern(get_display_name(app_name)))
+        return app_id
+
+    def add(self, usage_seconds, window_titles=None, timeline=None):
+        """
+        Append one session.
+
+        Args:
+            usage_seconds: Mapping of application to tracked seconds
+            window_titles: Mapping of application to the window titles seen
+            timeline: Focus intervals as [app, start, end]
+
+        Returns:
+            int: The session's index
+        """
+        window_titles = window_titles or {}
+        for app_name, seconds in sorted(usage_seconds.items(), key=lambda item: item[1], reverse=True):
+            self._app_codes.append(self._app_id(app_name))
+            self._category_codes.append(_CATEGORY_CODES.get(categorize_app(app_name), _CATEGORY_CODES['Other']))
+            self._seconds.append(int(round(seconds)))
+            self._title_ids.extend(self.titles.intern(title) for title in window_titles.get(app_name, ()))
+            self._title_starts.append(len(self._title_ids))
+        self._row_starts.append(len(self._seconds))
+
+        for app_name, start, end in timeline or ():
+            self._timeline_apps.append(self._app_id(app_name))
+            self._timeline_bounds.extend((start, end))
+        self._timeline_starts.append(len(self._timeline_apps))
+        return len(self) - 1
+
+    def add_frame(self, df, timeline=None):
+        """Append a session frame or its records (Window_Titles as a comma-joined string)"""
+        df = df if isinstance(df, pd.DataFrame) else pd.DataFrame(df)
+        titles = df['Window_Titles'] if 'Window_Titles' in df else [''] * len(df)
+        usage = dict(zip(df['Application'], df['Time_Seconds']))
+        window_titles = {app: [title for title in str(joined).split(', ') if title]
+                         for app, joined in zip(df['Application'], titles) if isinstance(joined, str)}
+        return self.add(usage, window_titles, timeline)
+
+    def frame(self, index, window_titles=True):
+        """
+        One session as a DataFrame sorted by time.
+
+        Application, Display_Name and Category are categoricals shared by all
+        sessions, Time_Seconds is int32 and Time_Minutes float32. Window titles
+        are joined into the usual comma-separated strings only if requested.
+        """
+        start, end = self._row_starts[index], self._row_starts[index + 1]
+        # Slicing copies, so no numpy view pins the arrays' buffers (which would block appends)
+        app_codes = np.frombuffer(self._app_codes[start:end], dtype=np.int32)
+        seconds = np.frombuffer(self._seconds[start:end], dtype=np.int32)
+        category_codes = np.frombuffer(self._category_codes[start:end], dtype=np.int8)
+        display_codes = np.frombuffer(self._display_codes, dtype=np.int32)[app_codes]
+
+        data = {
+            'Application': pd.Categorical.from_codes(app_codes, dtype=self.applications.dtype()),
+            'Time_Seconds': seconds,
+            'Display_Name': pd.Categorical.from_codes(display_codes, dtype=self.display_names.dtype()),
+        }
+        if window_titles:
+            data['Window_Titles'] = [', '.join(self.window_titles(row)) for row in range(start, end)]
+        data['Time_Minutes'] = (seconds / 60).astype(np.float32)
+        data['Category'] = pd.Categorical.from_codes(category_codes, dtype=CATEGORY_DTYPE)
+        return pd.DataFrame(data)
+
+    def window_titles(self, row):
+        """The window titles of one row (global row number)"""
+        ids = self._title_ids[self._title_starts[row]:self._title_starts[row + 1]]
+        return [self.titles.values[title_id] for title_id in ids]
+
+    def timeline(self, index):
+        """The focus intervals of one session as [app, start, end] lists"""
+        start, end = self._timeline_starts[index], self._timeline_starts[index + 1]
+        bounds = self._timeline_bounds[2 * start:2 * end]
+        return [[self.applications.values[app_id], bounds[2 * i], bounds[2 * i + 1]]
+                for i, app_id in enumerate(self._timeline_apps[start:end])]
+
+    def total_minutes(self):
+        """Tracked minutes of every session, in session order"""
+        seconds = np.array(self._seconds, dtype=np.int64)
+        starts = np.array(self._row_starts, dtype=np.int64)
+        if not len(self):
+            return np.zeros(0)
+        totals = np.add.reduceat(np.append(seconds, 0), starts[:-1])
+        # reduceat returns the next session's first element for empty sessions; zero those
+        totals[np.diff(starts) == 0] = 0
+        return totals / 60
+
+    def nbytes(self):
+        """Bytes held by the compact arrays (excluding the shared vocabularies)"""
+        arrays = (self._app_codes, self._display_codes, self._category_codes, self._seconds, self._title_starts, self._title_ids,
+                  self._row_starts, self._timeline_apps, self._timeline_bounds, self._timeline_starts)
+        return sum(a.itemsize * len(a) for a in arrays)
@@ -0,0 +1,564 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "store.lock"
+STORE_VERSION = 1
+
+# One row per application in a session, as produced by track_screen_time
+ROW_SCHEMA = pa.schema([
+    ('session_id', pa.int64()),
+    ('Application', pa.string()),
+    ('Time_Seconds', pa.int64()),
+    ('Display_Name', pa.string()),
+    ('Window_Titles', pa.string()),
+    ('Time_Minutes', pa.float64()),
+    ('Category', pa.string()),
+])
+RECORD_COLUMNS = [field.name for field in ROW_SCHEMA if field.name != 'session_id']
+
+# One row per session; sessions with no applications only appear here
+SESSION_SCHEMA = pa.schema([
+    ('session_id', pa.int64()),
+    ('timestamp', pa.int64()),  # epoch seconds
+    ('row_count', pa.int32()),
+])
+
+def _to_epoch(timestamp):
+    if isinstance(timestamp, str):
+        timestamp = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+    if isinstance(timestamp, datetime):
+        return int(timestamp.timestamp())
+    return int(timestamp)
+
+def _read_table(path):
+    """Read an Arrow IPC file through a memory map, without copying the buffers"""
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
+
+def _write_table(path, table):
+    temp_path = path + ".tmp"
+    with pa.OSFile(temp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(temp_path, path)
+
+class SessionStore:
+    """
+    Append-only store for tracked sessions.
+
+    Every append writes one small pair of Arrow IPC segment files (the
+    application rows and a one-row session index) and rewrites the small
+    JSON manifest listing the segments, so saving costs O(session size)
+    instead of rewriting the whole history. Compaction is size-tiered: once
+    ``compact_after`` neighbouring segments of similar size pile up they are
+    merged into one, so a session is rewritten O(log n) times over its life.
+    Compaction also physically drops sessions outside the retention window,
+    which readers already hide.
+
+    Segments are read through memory maps, and ``load_frame`` returns every
+    session's rows as one long DataFrame without per-row Python objects.
+    """
+
+    def __init__(self, directory, max_sessions=None, max_age_days=None,
+                 compact_after=32, segment_sessions=10000, on_append=None):
+        """
+        Open (or create) a store.
+
+        Args:
+            directory: Directory holding the manifest and segment files
+            max_sessions: Keep only the most recent N sessions (None keeps all)
+            max_age_days: Drop sessions older than this many days (None keeps all)
+            compact_after: Merge this many neighbouring segments of the same size tier
+            segment_sessions: Segments with at least this many sessions are only
+                rewritten to drop expired sessions
+            on_append: Called with the list of (timestamp, data) pairs after they
+                are stored, e.g. SketchStore.recorder to keep the usage sketches current.
+                It runs while the writer lock is held, so every process's updates to
+                the shard's derived files (read, modify, write) happen one at a time
+        """
+        self.directory = directory
+        self.max_sessions = max_sessions
+        self.max_age_days = max_age_days
+        self.compact_after = compact_after
+        self.segment_sessions = segment_sessions
+        self.on_append = on_append
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = self._load_manifest()
+        self._summaries = {}  # segment name -> per-session summary (segments never change once written)
+
+    @contextmanager
+    def _lock(self, timeout=30.0, stale_after=120.0):
+        """Cross-process writer lock: a lock file created exclusively in the store directory"""
+        path = os.path.join(self.directory, LOCK_FILE)
+        deadline = time.time() + timeout
+        while True:
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    # A writer that crashed leaves its lock behind
+                    if time.time() - os.path.getmtime(path) > stale_after:
+                        os.remove(path)
+                        continue
+                except OSError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"Session store {self.directory} is locked")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def refresh(self):
+        """Reload the manifest to see sessions appended by other processes"""
+        self.manifest = self._load_manifest()
+
+    def revision(self):
+        """
+        (next_session_id, min_session_id) from the current manifest: it changes
+        whenever any process appends sessions or retention drops some.
+        """
+        self.refresh()
+        return self.manifest['next_session_id'], self.manifest['min_session_id']
+
+    def _manifest_path(self):
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    def _load_manifest(self):
+        try:
+            if os.path.exists(self._manifest_path()):
+                with open(self._manifest_path(), 'r') as f:
+                    return json.load(f)
+        except Exception as e:
+            print(f"Error loading session store manifest: {e}")
+        return {'version': STORE_VERSION, 'next_session_id': 0, 'next_segment': 0,
+                'min_session_id': 0, 'segments': []}
+
+    def _save_manifest(self):
+        temp_path = self._manifest_path() + ".tmp"
+        with open(temp_path, 'w') as f:
+            json.dump(self.manifest, f)
+        os.replace(temp_path, self._manifest_path())
+
+    def _segment_paths(self, name):
+        return (os.path.join(self.directory, f"{name}.rows.arrow"),
+                os.path.join(self.directory, f"{name}.sessions.arrow"))
+
+    def __len__(self):
+        return sum(segment['sessions'] for segment in self.manifest['segments']) - self._hidden_sessions()
+
+    def _hidden_sessions(self):
+        """Sessions still on disk but below the retention cut-off"""
+        cutoff = self.manifest['min_session_id']
+        hidden = 0
+        for segment in self.manifest['segments']:
+            if segment['last_id'] < cutoff:
+                hidden += segment['sessions']
+            elif segment['first_id'] < cutoff:
+                hidden += cutoff - segment['first_id']
+        return hidden
+
+    def _write_segment(self, rows, sessions):
+        name = f"seg-{self.manifest['next_segment']:06d}"
+        self.manifest['next_segment'] += 1
+        rows_path, sessions_path = self._segment_paths(name)
+        _write_table(rows_path, rows)
+        _write_table(sessions_path, sessions)
+        ids = sessions.column('session_id')
+        timestamps = sessions.column('timestamp')
+        return {'name': name, 'sessions': len(sessions), 'rows': len(rows),
+                'first_id': ids[0].as_py(), 'last_id': ids[-1].as_py(),
+                'first_ts': pc.min(timestamps).as_py(), 'last_ts': pc.max(timestamps).as_py()}
+
+    def append_many(self, sessions):
+        """
+        Append sessions as one segment.
+
+        Args:
+            sessions: Iterable of (timestamp, data) pairs, where data is a session
+                DataFrame or its records and timestamp a datetime, a
+                '%Y-%m-%d %H:%M:%S' string or epoch seconds
+
+        Returns:
+            list: The new session ids
+        """
+        sessions = list(sessions)
+        with self._lock():
+            # Another process (e.g. the tracker daemon) may have appended since we loaded
+            self.manifest = self._load_manifest()
+            ids = self._append_many(sessions)
+            self._notify_append(sessions)
+        return ids
+
+    def _notify_append(self, sessions):
+        if self.on_append is None or not sessions:
+            return
+        try:
+            self.on_append(sessions)
+        except Exception as e:
+            # The sessions are stored; a failing hook must not make the caller retry them
+            print(f"Error in session store append hook: {e}")
+
+    def _append_many(self, sessions):
+        frames, records, record_ids, ids, timestamps, counts = [], [], [], [], [], []
+        for timestamp, data in sessions:
+            session_id = self.manifest['next_session_id']
+            self.manifest['next_session_id'] += 1
+            if isinstance(data, pd.DataFrame):
+                frames.append(data.assign(session_id=session_id))
+            else:
+                # Plain records are batched into a single DataFrame below
+                data = list(data)
+                records.extend(data)
+                record_ids.extend([session_id] * len(data))
+            ids.append(session_id)
+            timestamps.append(_to_epoch(timestamp))
+            counts.append(len(data))
+        if not ids:
+            return []
+
+        if not frames:
+            # Only records (the tracker's flush, the ingest server): build the Arrow columns
+            # directly, skipping pandas; the rows are already in session id order
+            columns = {name: [record.get(name) for record in records] for name in RECORD_COLUMNS}
+            columns['Time_Seconds'] = [None if seconds is None else int(round(float(seconds)))
+                                       for seconds in columns['Time_Seconds']]
+            rows = pa.table({'session_id': record_ids, **columns}, schema=ROW_SCHEMA)
+        else:
+            if records:
+                frames.append(pd.DataFrame(records).assign(session_id=record_ids))
+            frame = pd.concat(frames, ignore_index=True)
+            frame = frame.reindex(columns=ROW_SCHEMA.names)
+            frame['Time_Seconds'] = pd.to_numeric(frame['Time_Seconds']).round().astype('Int64')
+            # Keep rows grouped by session in id order whichever input type they came from
+            frame = frame.sort_values('session_id', kind='stable')
+            rows = pa.Table.from_pandas(frame, schema=ROW_SCHEMA, preserve_index=False)
+        index = pa.table({'session_id': ids, 'timestamp': timestamps, 'row_count': counts},
+                         schema=SESSION_SCHEMA)
+        self.manifest['segments'].append(self._write_segment(rows, index))
+        self._apply_retention(max(timestamps))
+        self._save_manifest()
+        self._maybe_compact()
+        return ids
+
+    def append(self, data, timestamp):
+        """Append one session and return its id"""
+        return self.append_many([(timestamp, data)])[0]
+
+    def _apply_retention(self, newest_timestamp):
+        """Move the logical cut-off so old sessions disappear from reads"""
+        cutoff = self.manifest['min_session_id']
+        if self.max_sessions is not None:
+            cutoff = max(cutoff, self.manifest['next_session_id'] - self.max_sessions)
+        if self.max_age_days is not None:
+            oldest_allowed = newest_timestamp - self.max_age_days * 86400
+            # Only the leading segments that start before the limit can hold expired sessions
+            aging = []
+            for segment in self.manifest['segments']:
+                if segment['last_id'] < cutoff:
+                    continue
+                if segment['first_ts'] >= oldest_allowed:
+                    break
+                aging.append(segment)
+            if aging:
+                sessions = self._read_segments(aging, 1)
+                ids = sessions.column('session_id').to_numpy()
+                timestamps = sessions.column('timestamp').to_numpy()[ids >= cutoff]
+                ids = ids[ids >= cutoff]
+                # Sessions can be appended late (e.g. the daemon's spool after direct saves), so
+                # timestamps don't grow with the id: only the leading run of expired sessions is
+                # cut, and a late old session never hides the newer ones stored before it
+                fresh = np.flatnonzero(timestamps >= oldest_allowed)
+                if len(ids):
+                    cutoff = max(cutoff, int(ids[fresh[0]]) if len(fresh) else int(ids[-1]) + 1)
+        self.manifest['min_session_id'] = cutoff
+
+        # Segments entirely below the cut-off can go right away
+        expired = [s for s in self.manifest['segments'] if s['last_id'] < cutoff]
+        if expired:
+            self.manifest['segments'] = [s for s in self.manifest['segments'] if s['last_id'] >= cutoff]
+            self._save_manifest()
+            for segment in expired:
+                self._remove_segment(segment)
+
+    def _remove_segment(self, segment):
+        for path in self._segment_paths(segment['name']):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _tier(self, segment):
+        """Size tier of a segment: each tier holds compact_after times more sessions than the one below"""
+        tier, size = 0, segment['sessions']
+        while size >= self.compact_after:
+            size //= self.compact_after
+            tier += 1
+        return tier
+
+    def _maybe_compact(self):
+        """
+        Size-tiered compaction: merge a run of ``compact_after`` neighbouring
+        small segments of the same tier, so each session is rewritten once per
+        tier (O(log n) times in total) rather than on every compaction.
+        """
+        while True:
+            run = []
+            for segment in self.manifest['segments']:
+                if segment['sessions'] >= self.segment_sessions:
+                    run = []
+                elif run and self._tier(run[-1]) != self._tier(segment):
+                    run = [segment]
+                else:
+                    run.append(segment)
+                if len(run) >= self.compact_after:
+                    break
+            else:
+                break
+            self._merge(run)
+        # Rewrite the segment holding the retention cut-off once most of it is hidden,
+        # not on every append that moves the cut-off
+        cutoff = self.manifest['min_session_id']
+        for segment in self.manifest['segments']:
+            if segment['first_id'] < cutoff and cutoff - segment['first_id'] > segment['sessions'] // 2:
+                self._merge([segment])
+
+    def compact(self):
+        """Merge neighbouring small segments and drop sessions outside the retention window"""
+        with self._lock():
+            self.manifest = self._load_manifest()
+            self._compact()
+
+    def _compact(self):
+        cutoff = self.manifest['min_session_id']
+        runs, run = [], []
+        for segment in self.manifest['segments']:
+            if segment['sessions'] < self.segment_sessions:
+                run.append(segment)
+                continue
+            runs.append(run)
+            runs.append([segment])
+            run = []
+        runs.append(run)
+        for run in runs:
+            if len(run) > 1 or any(segment['first_id'] < cutoff for segment in run):
+                self._merge(run)
+
+    def _merge(self, segments):
+        """
+        Replace neighbouring segments by one, dropping sessions below the cut-off.
+
+        Only neighbours are merged, so segments keep disjoint session id ranges
+        in manifest order.
+        """
+        cutoff = self.manifest['min_session_id']
+        rows = self._read_segments(segments, 0)
+        sessions = self._read_segments(segments, 1)
+        rows = rows.filter(pc.greater_equal(rows.column('session_id'), cutoff))
+        sessions = sessions.filter(pc.greater_equal(sessions.column('session_id'), cutoff))
+
+        merged = []
+        if len(sessions):
+            merged.append(self._write_segment(rows.combine_chunks(), sessions.combine_chunks()))
+        names = {segment['name'] for segment in segments}
+        position = next(i for i, s in enumerate(self.manifest['segments']) if s['name'] in names)
+        remaining = [s for s in self.manifest['segments'] if s['name'] not in names]
+        self.manifest['segments'] = remaining[:position] + merged + remaining[position:]
+        self._save_manifest()
+        for segment in segments:
+            self._remove_segment(segment)
+
+    def _read_segments(self, segments, part):
+        tables = [_read_table(self._segment_paths(segment['name'])[part]) for segment in segments]
+        if not tables:
+            return (ROW_SCHEMA, SESSION_SCHEMA)[part].empty_table()
+        return pa.concat_tables(tables)
+
+    def load_table(self, min_session_id=None):
+        """
+        All retained application rows as one Arrow table (memory-mapped).
+
+        Args:
+            min_session_id: Only rows of this session and later ones (None for all)
+        """
+        self.refresh()
+        cutoff = max(self.manifest['min_session_id'], min_session_id or 0)
+        segments = [segment for segment in self.manifest['segments'] if segment['last_id'] >= cutoff]
+        rows = self._read_segments(segments, 0)
+        if any(segment['first_id'] < cutoff for segment in segments):
+            rows = rows.filter(pc.greater_equal(rows.column('session_id'), cutoff))
+        return rows
+
+    def session_index(self):
+        """session_id, timestamp (epoch seconds) and row_count arrays of the retained sessions"""
+        self.refresh()
+        sessions = self._read_segments(self.manifest['segments'], 1)
+        ids = sessions.column('session_id').to_numpy()
+        keep = ids >= self.manifest['min_session_id']
+        return {
+            'session_id': ids[keep],
+            'timestamp': sessions.column('timestamp').to_numpy()[keep],
+            'row_count': sessions.column('row_count').to_numpy()[keep],
+        }
+
+    def load_frame(self, min_session_id=None):
+        """All retained application rows as one long DataFrame, keyed by session_id"""
+        return self.load_table(min_session_id).to_pandas()
+
+    def load_sessions(self):
+        """
+        Retained sessions in the legacy format: dicts with a datetime
+        'timestamp' and 'data' as a list of row dicts.
+
+        Builds a Python object per row; analysis code should use load_frame.
+        """
+        index = self.session_index()
+        frame = self.load_frame()
+        records = frame[RECORD_COLUMNS].to_dict('records')
+        sessions, position = [], 0
+        for timestamp, row_count in zip(index['timestamp'], index['row_count']):
+            sessions.append({
+                'timestamp': datetime.fromtimestamp(int(timestamp)),
+                'data': records[position:position + row_count]
+            })
+            position += row_count
+        return sessions
+
+    def _segment_summary(self, segment):
+        """Per-session totals of one segment, computed once and kept in memory"""
+        summary = self._summaries.get(segment['name'])
+        if summary is not None:
+            return summary
+
+        rows_path, sessions_path = self._segment_paths(segment['name'])
+        rows = _read_table(rows_path)
+        sessions = _read_table(sessions_path)
+        session_ids = rows.column('session_id').to_numpy()
+        seconds = rows.column('Time_Seconds').fill_null(0).to_numpy()
+        applications = rows.column('Application').to_numpy(zero_copy_only=False)
+
+        summary = pd.DataFrame({
+            'session_id': sessions.column('session_id').to_numpy(),
+            'timestamp': sessions.column('timestamp').to_numpy(),
+            'apps': sessions.column('row_count').to_numpy(),
+        })
+        totals = pd.Series(seconds).groupby(session_ids).sum()
+        # The most used application of each session: longest row first within each session
+        order = np.lexsort((-seconds, session_ids))
+        firsts = order[np.unique(session_ids[order], return_index=True)[1]]
+        top = pd.Series(applications[firsts], index=session_ids[firsts])
+        summary['total_minutes'] = summary['session_id'].map(totals).fillna(0).to_numpy() / 60
+        summary['top_application'] = summary['session_id'].map(top)
+        self._summaries[segment['name']] = summary
+        return summary
+
+    def session_summaries(self):
+        """
+        One row per retained session: session_id, timestamp (epoch seconds),
+        apps, total_minutes and top_application.
+
+        Summaries are cached per segment, so after the first call only newly
+        written segments are read.
+        """
+        self.refresh()
+        segments = self.manifest['segments']
+        live = {segment['name'] for segment in segments}
+        for name in list(self._summaries):
+            if name not in live:
+                del self._summaries[name]
+        if not segments:
+            return pd.DataFrame(columns=['session_id', 'timestamp', 'apps', 'total_minutes', 'top_application'])
+        summaries = pd.concat([self._segment_summary(segment) for segment in segments], ignore_index=True)
+        if self._hidden_sessions():
+            summaries = summaries[summaries['session_id'] >= self.manifest['min_session_id']]
+        return summaries
+
+    def sessions_matching(self, application=None, category=None):
+        """Ids of retained sessions with a row for ``application`` and/or in ``category``"""
+        rows = self.load_table()
+        mask = None
+        if application:
+            mask = pc.equal(rows.column('Application'), application)
+        if category:
+            in_category = pc.equal(rows.column('Category'), category)
+            mask = in_category if mask is None else pc.and_(mask, in_category)
+        if mask is not None:
+            rows = rows.filter(mask)
+        return np.unique(rows.column('session_id').to_numpy())
+
+    def query_sessions(self, sort_by='timestamp', descending=True, since=None, until=None,
+                       application=None, category=None, min_minutes=None, offset=0, limit=20):
+        """
+        Filter, sort and page the session summaries.
+
+        Args:
+            sort_by: 'timestamp', 'total_minutes' or 'apps'
+            descending: Sort order
+            since, until: Optional datetime (or epoch) bounds on the session timestamp
+            application: Only sessions that used this application
+            category: Only sessions with time in this category
+            min_minutes: Only sessions at least this long
+            offset, limit: The page to return
+
+        Returns:
+            tuple: (DataFrame with one page of summaries, number of matching sessions)
+        """
+        summaries = self.session_summaries()
+        mask = np.ones(len(summaries), dtype=bool)
+        if since is not None:
+            mask &= summaries['timestamp'].to_numpy() >= _to_epoch(since)
+        if until is not None:
+            mask &= summaries['timestamp'].to_numpy() < _to_epoch(until)
+        if min_minutes is not None:
+            mask &= summaries['total_minutes'].to_numpy() >= min_minutes
+        if application or category:
+            mask &= np.isin(summaries['session_id'].to_numpy(), self.sessions_matching(application, category))
+
+        matching = summaries[mask]
+        # Session id breaks ties so pages stay stable between calls
+        matching = matching.sort_values([sort_by, 'session_id'], ascending=not descending, kind='stable')
+        return matching.iloc[offset:offset + limit], len(matching)
+
+    def load_session(self, session_id):
+        """Application rows of one session, reading only the segment that holds it"""
+        self.refresh()
+        if session_id < self.manifest['min_session_id']:
+            # Dropped by retention, even if compaction hasn't removed it from its segment yet
+            return pd.DataFrame(columns=RECORD_COLUMNS)
+        # Only the segment whose id range holds the session is read; the manifest is small,
+        # so the ranges are scanned rather than assumed sorted and disjoint
+        for segment in self.manifest['segments']:
+            if segment['first_id'] <= session_id <= segment['last_id']:
+                rows = _read_table(self._segment_paths(segment['name'])[0])
+                rows = rows.filter(pc.equal(rows.column('session_id'), session_id))
+                if len(rows):
+                    return rows.select(RECORD_COLUMNS).to_pandas()
+        return pd.DataFrame(columns=RECORD_COLUMNS)
+
+    def import_json(self, json_file):
+        """Import a legacy tracking_history.json file into the store"""
+        with open(json_file, 'r') as f:
+            history = json.load(f)
+        sessions = [(session['timestamp'], session['data']) for session in history]
+        with self._lock():
+            self.manifest = self._load_manifest()
+            ids = self._append_many(sessions)
+            self.manifest['migrated_from'] = os.path.abspath(json_file)
+            self.manifest['migrated_at'] = int(time.time())
+            self._save_manifest()
+            self._notify_append(sessions)
+        return len(ids)
@@ -0,0 +1,424 @@
+import base64
+import glob
+import hashlib
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from utils import MODELS_DIR, SKETCH_DIR, sketch_dir
+
+logger = logging.getLogger(__name__)
+
+class SpaceSaving:
+    """
+    Weighted Space-Saving summary of the heaviest items.
+
+    Keeps at most ``k`` counters. An item's count overestimates its true
+    weight by at most its error, and every item heavier than total / k is
+    guaranteed to be kept. Two summaries merge into one with the same bound
+    (Agarwal et al., "Mergeable Summaries").
+    """
+
+    def __init__(self, k=50):
+        self.k = k
+        self.counters = {}  # item -> [count, error]
+
+    def add(self, item, weight=1.0):
+        counter = self.counters.get(item)
+        if counter is not None:
+            counter[0] += weight
+        elif len(self.counters) < self.k:
+            self.counters[item] = [weight, 0.0]
+        else:
+            # Evict the smallest counter; the newcomer inherits its count as error
+            smallest = min(self.counters, key=lambda key: self.counters[key][0])
+            floor = self.counters.pop(smallest)[0]
+            self.counters[item] = [floor + weight, floor]
+
+    def _floor(self):
+        """Upper bound of the weight of any item without a counter"""
+        if len(self.counters) < self.k:
+            return 0.0
+        return min(counter[0] for counter in self.counters.values())
+
+    def merge(self, other):
+        floor, other_floor = self._floor(), other._floor()
+        merged = {}
+        for item in self.counters.keys() | other.counters.keys():
+            count, error = self.counters.get(item, (floor, floor))
+            other_count, other_error = other.counters.get(item, (other_floor, other_floor))
+            merged[item] = [count + other_count, error + other_error]
+        if len(merged) > self.k:
+            merged = dict(heapq.nlargest(self.k, merged.items(), key=lambda entry: entry[1][0]))
+        self.counters = merged
+        return self
+
+    def top(self, n=10):
+        """The ``n`` heaviest items as (item, count, error), heaviest first"""
+        ranked = sorted(self.counters.items(), key=lambda entry: entry[1][0], reverse=True)
+        return [(item, count, error) for item, (count, error) in ranked[:n]]
+
+    def to_dict(self):
+        return {'k': self.k, 'counters': [[item, count, error] for item, (count, error) in self.counters.items()]}
+
+    @classmethod
+    def from_dict(cls, data):
+        summary = cls(data['k'])
+        summary.counters = {item: [count, error] for item, count, error in data['counters']}
+        return summary
+
+class HyperLogLog:
+    """
+    Distinct-count estimate in 2 ** ``precision`` one-byte registers.
+
+    The relative error is about 1.04 / sqrt(2 ** precision), i.e. 2.3% with
+    the default 2048 registers. Merging takes the register-wise maximum, so
+    merged sketches estimate the size of the union.
+    """
+
+    def __init__(self, precision=11):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, value):
+        digest = hashlib.blake2b(str(value).encode(), digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+        rest_bits = 64 - self.precision
+        index = hashed >> rest_bits
+        rest = hashed & ((1 << rest_bits) - 1)
+        rank = rest_bits - rest.bit_length() + 1  # Position of the first 1 bit
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLogs of different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_dict(self):
+        return {'precision': self.precision, 'registers': base64.b64encode(self.registers.tobytes()).decode()}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['precision'])
+        sketch.registers = np.frombuffer(base64.b64decode(data['registers']), dtype=np.uint8).copy()
+        return sketch
+
+class TDigest:
+    """
+    Merging t-digest for quantiles of a stream of values.
+
+    Values are buffered and merged into at most about ``compression``
+    weighted centroids, which are smaller near the tails so extreme
+    quantiles stay accurate. Digests merge by re-clustering their combined
+    centroids.
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.means = []
+        self.weights = []
+        self.buffer = []
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, weight=1.0):
+        self.buffer.append((value, weight))
+        self.total += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _k(self, q):
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k):
+        k = min(k, self.compression / 4)  # k(1); past it the sine would wrap around
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def _compress(self):
+        if not self.buffer:
+            return
+        items = sorted(list(zip(self.means, self.weights)) + self.buffer)
+        self.buffer = []
+        means, weights = [], []
+        done = 0.0  # Weight of the centroids already emitted
+        limit = self._k_inverse(self._k(0.0) + 1) * self.total
+        mean, weight = items[0]
+        for value, value_weight in items[1:]:
+            if done + weight + value_weight <= limit:
+                weight += value_weight
+                mean += (value - mean) * value_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                done += weight
+                limit = self._k_inverse(self._k(min(done / self.total, 1.0)) + 1) * self.total
+                mean, weight = value, value_weight
+        means.append(mean)
+        weights.append(weight)
+        self.means, self.weights = means, weights
+
+    def merge(self, other):
+        other._compress()
+        self.buffer.extend(zip(other.means, other.weights))
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        # Like add, re-cluster only once enough centroids are buffered
+        if len(self.buffer) >= 5 * self.compression:
+            self._compress()
+        return self
+
+    def quantile(self, q):
+        """Estimated ``q`` quantile (0 <= q <= 1); None for an empty digest"""
+        self._compress()
+        if not self.means:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+        target = q * self.total
+        # Interpolate between centroid centres, with the exact min and max at the ends
+        previous_center, previous_mean = 0.0, self.min
+        cumulative = 0.0
+        for mean, weight in zip(self.means, self.weights):
+            center = cumulative + weight / 2
+            if target < center:
+                span = center - previous_center
+                fraction = (target - previous_center) / span if span > 0 else 0.0
+                return previous_mean + fraction * (mean - previous_mean)
+            previous_center, previous_mean = center, mean
+            cumulative += weight
+        span = self.total - previous_center
+        fraction = (target - previous_center) / span if span > 0 else 1.0
+        return previous_mean + min(fraction, 1.0) * (self.max - previous_mean)
+
+    def to_dict(self):
+        self._compress()
+        return {'compression': self.compression, 'means': self.means, 'weights': self.weights,
+                'min': self.min if self.means else None, 'max': self.max if self.means else None}
+
+    @classmethod
+    def from_dict(cls, data):
+        digest = cls(data['compression'])
+        digest.means, digest.weights = list(data['means']), list(data['weights'])
+        digest.total = float(sum(digest.weights))
+        if digest.means:
+            digest.min, digest.max = data['min'], data['max']
+        return digest
+
+class UsageSketch:
+    """
+    Mergeable summary of tracked sessions, kept per device, profile and day.
+
+    Built from the rows track_screen_time produces: Space-Saving top-k of
+    applications (by minutes) and of window titles (by sessions they
+    appeared in), a HyperLogLog of distinct applications and a t-digest of
+    session lengths in minutes. Its size is bounded by the parameters, not
+    by the number of sessions, and any number of sketches merge into one of
+    the same size.
+    """
+
+    def __init__(self, top_k=50, precision=11, compression=100):
+        self.apps = SpaceSaving(top_k)
+        self.titles = SpaceSaving(top_k)
+        self.distinct_apps = HyperLogLog(precision)
+        self.session_minutes = TDigest(compression)
+        self.sessions = 0
+        self.minutes = 0.0
+
+    def add_session(self, data):
+        """
+        Add one session.
+
+        Args:
+            data: Session DataFrame or its records (Application, Time_Seconds, Window_Titles)
+        """
+        if hasattr(data, 'columns'):
+            titles = data['Window_Titles'] if 'Window_Titles' in data.columns else [None] * len(data)
+            rows = zip(data['Application'], data['Time_Seconds'], titles)
+        else:
+            rows = ((row['Application'], row['Time_Seconds'], row.get('Window_Titles')) for row in data)
+        total_minutes = 0.0
+        for application, seconds, titles in rows:
+            minutes = float(seconds) / 60
+            total_minutes += minutes
+            self.apps.add(application, minutes)
+            self.distinct_apps.add(application)
+            if isinstance(titles, str):
+                for title in titles.split(', '):
+                    if title:
+                        self.titles.add(title)
+        self.session_minutes.add(total_minutes)
+        self.sessions += 1
+        self.minutes += total_minutes
+
+    def merge(self, other):
+        self.apps.merge(other.apps)
+        self.titles.merge(other.titles)
+        self.distinct_apps.merge(other.distinct_apps)
+        self.session_minutes.merge(other.session_minutes)
+        self.sessions += other.sessions
+        self.minutes += other.minutes
+        return self
+
+    def summary(self, top=10):
+        return {
+            'sessions': self.sessions,
+            'minutes': round(self.minutes, 2),
+            'distinct_apps': self.distinct_apps.count(),
+            'top_apps': [{'application': app, 'minutes': round(count, 2), 'error': round(error, 2)}
+                         for app, count, error in self.apps.top(top)],
+            'top_titles': [{'title': title, 'sessions': int(count), 'error': int(error)}
+                           for title, count, error in self.titles.top(top)],
+            'session_minutes': {f"p{int(q * 100)}": self.session_minutes.quantile(q) for q in (0.5, 0.9, 0.99)},
+        }
+
+    def to_dict(self):
+        return {'apps': self.apps.to_dict(), 'titles': self.titles.to_dict(),
+                'distinct_apps': self.distinct_apps.to_dict(), 'session_minutes': self.session_minutes.to_dict(),
+                'sessions': self.sessions, 'minutes': self.minutes}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls()
+        sketch.apps = SpaceSaving.from_dict(data['apps'])
+        sketch.titles = SpaceSaving.from_dict(data['titles'])
+        sketch.distinct_apps = HyperLogLog.from_dict(data['distinct_apps'])
+        sketch.session_minutes = TDigest.from_dict(data['session_minutes'])
+        sketch.sessions = data['sessions']
+        sketch.minutes = data['minutes']
+        return sketch
+
+def _day(timestamp):
+    if isinstance(timestamp, str):
+        return timestamp[:10]
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromtimestamp(timestamp)
+    return timestamp.strftime('%Y-%m-%d')
+
+class SketchStore:
+    """
+    UsageSketches on disk, one JSON file per (device, profile, day) next to
+    that shard's session store.
+
+    ``add_sessions`` updates the sketches and writes the changed ones, so a
+    bulk writer pays one file per touched day. ``recorder`` wraps it as a
+    SessionStore on_append hook, which keeps every write path covered; the
+    store runs it under its cross-process writer lock, so the app, the
+    tracker daemon's flush and the ingest server (each with its own
+    SketchStore) never overwrite each other's updates to a day's file. Fleet
+    queries merge the matching files one at a time, so their memory stays
+    constant however many devices and days there are.
+    """
+
+    def __init__(self, base_dir=MODELS_DIR, **sketch_options):
+        self.base_dir = base_dir
+        self.sketch_options = sketch_options
+        self.dirty = {}  # (profile, device, day) -> UsageSketch
+        self._lock = threading.Lock()
+
+    def _path(self, profile, device, day):
+        return os.path.join(sketch_dir(profile, device, self.base_dir), f"{day}.json")
+
+    def load(self, profile, device, day):
+        """The stored sketch of one shard and day (a new one if there is none)"""
+        path = self._path(profile, device, day)
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    return UsageSketch.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Error loading usage sketch {path}: {e}")
+        return UsageSketch(**self.sketch_options)
+
+    def add_session(self, profile, device, timestamp, data):
+        key = (profile, device, _day(timestamp))
+        sketch = self.dirty.get(key)
+        if sketch is None:
+            sketch = self.dirty[key] = self.load(*key)
+        sketch.add_session(data)
+
+    def flush(self):
+        """Write the sketches changed since the last flush"""
+        for key, sketch in self.dirty.items():
+            path = self._path(*key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(sketch.to_dict(), f)
+            os.replace(path + ".tmp", path)
+        self.dirty.clear()
+
+    def add_sessions(self, profile, device, sessions):
+        """
+        Add stored sessions of one shard and write the days they touched.
+
+        Args:
+            sessions: (timestamp, data) pairs as passed to SessionStore.append_many
+        """
+        with self._lock:
+            for timestamp, data in sessions:
+                self.add_session(profile, device, timestamp, data)
+            try:
+                self.flush()
+            except OSError as e:
+                # The sessions are stored; only the fleet summary misses them
+                logger.error(f"Could not write usage sketches: {e}")
+                self.dirty.clear()
+
+    def recorder(self, profile, device=None):
+        """SessionStore on_append hook that adds the shard's new sessions to its sketches"""
+        return lambda sessions: self.add_sessions(profile, device, sessions)
+
+    def fleet_summary(self, since=None, until=None, profile=None, device=None, top=10):
+        """
+        Merge the sketches of every matching shard and day.
+
+        Args:
+            since, until: First and last day ('YYYY-MM-DD', inclusive; None for no bound)
+            profile, device: Only this profile / device (None for all)
+            top: Length of the top application and title lists
+
+        Returns:
+            dict: UsageSketch.summary of the merge, plus the devices and
+            device-days it covers
+        """
+        # Shard directory names as sketch_dir spells them, to filter the glob below
+        device_name, profile_name = os.path.relpath(
+            sketch_dir(profile or '_', device or '_', self.base_dir), self.base_dir).split(os.sep)[:2]
+        merged = UsageSketch(**self.sketch_options)
+        devices, device_days = set(), 0
+        for path in glob.glob(os.path.join(self.base_dir, '*', '*', SKETCH_DIR, "*.json")):
+            parts = os.path.relpath(path, self.base_dir).split(os.sep)
+            day = parts[-1][:-len(".json")]
+            if ((device and parts[0] != device_name) or (profile and parts[1] != profile_name)
+                    or (since and day < since) or (until and day > until)):
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    merged.merge(UsageSketch.from_dict(json.load(f)))
+            except (OSError, ValueError, KeyError) as e:
+                logger.error(f"Error loading usage sketch {path}: {e}")
+                continue
+            devices.add(parts[0])
+            device_days += 1
+        return {**merged.summary(top), 'devices': len(devices), 'device_days': device_days}
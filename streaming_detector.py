@@ -0,0 +1,113 @@
+import math
+import os
+import time
+import numpy as np
+from utils import APP_CATEGORIES
+
+# Every category categorize_app can return
+CATEGORIES = list(APP_CATEGORIES.keys()) + ['Productivity', 'Other']
+
+class StreamingAnomalyDetector:
+    """
+    Online anomaly detector fed with focus samples while tracking is running.
+
+    For each category it keeps an exponentially decayed share of the last
+    ``window_seconds`` of focus time, and for each hour of the day a slowly
+    adapting mean and variance of those shares. A sample raises an alert when
+    its category's share is far above what is normal for the current hour
+    (e.g. gaming at 3 AM). Memory is fixed (24 x categories) and each sample
+    costs O(1) work, so it can run on every sample the tracker produces.
+    """
+
+    def __init__(self, categories=None, window_seconds=300.0, baseline_seconds=4 * 3600.0,
+                 z_threshold=3.0, min_share=0.5, prior_std=0.15, min_std=0.02,
+                 min_alert_interval=300.0, max_sample_seconds=5.0):
+        self.categories = list(categories or CATEGORIES)
+        self._index = {category: i for i, category in enumerate(self.categories)}
+        self.window_seconds = window_seconds
+        self.baseline_seconds = baseline_seconds
+        self.z_threshold = z_threshold
+        self.min_share = min_share
+        self.min_var = min_std ** 2
+        self.min_alert_interval = min_alert_interval
+        self.max_sample_seconds = max_sample_seconds
+
+        # Baseline per hour of day; unseen hours start from a prior of "no usage"
+        self.mean = np.zeros((24, len(self.categories)))
+        self.var = np.full((24, len(self.categories)), prior_std ** 2)
+
+        self.shares = np.zeros(len(self.categories))
+        self.last_timestamp = None
+        self.last_alert = np.full(len(self.categories), -np.inf)
+
+    def update(self, category, timestamp=None):
+        """
+        Consume one focus sample and return any alerts it triggers.
+
+        Args:
+            category: Category of the focused application
+            timestamp: Sample time in epoch seconds (defaults to now)
+
+        Returns:
+            list: Alert dicts with type, category, share, zscore and message
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        i = self._index.get(category, self._index.get('Other', 0))
+
+        # Gaps (idle time, tracker paused) decay the shares but only count as
+        # focus time up to max_sample_seconds
+        if self.last_timestamp is None:
+            elapsed, sample_seconds = 0.0, 0.5  # the tracker samples every 0.5 s
+        else:
+            elapsed = max(timestamp - self.last_timestamp, 0.0)
+            sample_seconds = min(elapsed, self.max_sample_seconds)
+        self.last_timestamp = timestamp
+
+        self.shares *= math.exp(-elapsed / self.window_seconds)
+        self.shares[i] += 1.0 - math.exp(-sample_seconds / self.window_seconds)
+
+        hour = time.localtime(timestamp).tm_hour
+        share = self.shares[i]
+        zscore = (share - self.mean[hour, i]) / math.sqrt(self.var[hour, i])
+
+        alerts = []
+        if (zscore > self.z_threshold and share >= self.min_share
+                and timestamp - self.last_alert[i] >= self.min_alert_interval):
+            self.last_alert[i] = timestamp
+            alerts.append({
+                'type': 'warning',
+                'category': self.categories[i],
+                'share': share,
+                'zscore': zscore,
+                'timestamp': timestamp,
+                'message': (f"Unusual {self.categories[i]} activity for {hour:02d}:00: "
+                            f"{share:.0%} of the last {self.window_seconds / 60:.0f} minutes "
+                            f"(z={zscore:.1f})")
+            })
+
+        # Fold the current shares into this hour's baseline (exponentially weighted)
+        alpha = 1.0 - math.exp(-sample_seconds / self.baseline_seconds)
+        delta = self.shares - self.mean[hour]
+        self.mean[hour] += alpha * delta
+        self.var[hour] = np.maximum((1.0 - alpha) * (self.var[hour] + alpha * delta ** 2), self.min_var)
+
+        return alerts
+
+    def save(self, path):
+        """Persist the hourly baselines"""
+        np.savez(path, mean=self.mean, var=self.var, categories=np.array(self.categories, dtype=str))
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """Create a detector, restoring saved baselines when they match the categories"""
+        detector = cls(**kwargs)
+        try:
+            if os.path.exists(path):
+                with np.load(path) as saved:
+                    if saved['categories'].tolist() == detector.categories:
+                        detector.mean = saved['mean']
+                        detector.var = saved['var']
+        except Exception as e:
+            print(f"Error loading streaming baseline: {e}")
+        return detector
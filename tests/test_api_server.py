@@ -0,0 +1,35 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("aiohttp")
+
+from api_server import UsageAPI
+from session_store import SessionStore
+from utils import DEFAULT_DEVICE, session_store_dir
+
+
+def records(minutes, application):
+    return [{'Application': application, 'Time_Seconds': minutes * 60, 'Display_Name': application,
+             'Window_Titles': '', 'Time_Minutes': float(minutes), 'Category': 'Other'}]
+
+
+def test_usage_since_selects_by_timestamp_not_session_order(tmp_path):
+    now = datetime(2026, 3, 10, 12, 0)
+    store = SessionStore(session_store_dir('kids', None, str(tmp_path)))
+    store.append(records(5, 'old.exe'), now - timedelta(days=3))
+    store.append(records(10, 'today.exe'), now - timedelta(hours=2))
+    # Flushed late from the daemon's spool: stored after today's session but recorded days earlier
+    store.append(records(20, 'late.exe'), now - timedelta(days=2))
+    store.append(records(30, 'today.exe'), now - timedelta(hours=1))
+
+    usage = UsageAPI(base_dir=str(tmp_path), spool_dir=str(tmp_path / "spool"))._usage(
+        'kids', DEFAULT_DEVICE, since=now - timedelta(days=1))
+
+    assert sorted(usage['session_id']) == [1, 3]
+    assert usage['Time_Seconds'].sum() == 40 * 60
+    assert (usage['timestamp'] >= (now - timedelta(days=1)).timestamp()).all()
@@ -0,0 +1,42 @@
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from event_bus import EventBus
+
+
+def test_slow_subscriber_drops_the_oldest_events():
+    async def scenario():
+        bus = EventBus(max_buffer=3)
+        slow = bus.subscribe()
+        kids_only = bus.subscribe(predicate=lambda event: event['profile'] == 'kids')
+        for i in range(5):
+            bus.publish({'type': 'focus_change', 'profile': 'kids' if i % 2 else 'parent', 'n': i})
+
+        received = [(await slow.get(timeout=0.1))['n'] for _ in range(3)]
+        assert received == [2, 3, 4]
+        assert slow.take_dropped() == 2
+        assert slow.take_dropped() == 0
+        assert await slow.get(timeout=0.05) is None
+
+        # The filtered subscriber only buffered its two events, so it lost none
+        assert [(await kids_only.get(timeout=0.1))['n'] for _ in range(2)] == [1, 3]
+        assert kids_only.take_dropped() == 0
+
+    asyncio.run(scenario())
+
+
+def test_event_ids_increase_and_unsubscribed_buffers_stop_filling():
+    async def scenario():
+        bus = EventBus()
+        subscription = bus.subscribe()
+        first = bus.publish({'type': 'session_end'})
+        subscription.close()
+        second = bus.publish({'type': 'session_end'})
+        assert second == first + 1
+        assert (await subscription.get(timeout=0.1))['id'] == first
+        assert await subscription.get(timeout=0.05) is None
+
+    asyncio.run(scenario())
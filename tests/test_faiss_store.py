@@ -0,0 +1,67 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain")
+
+from faiss_store import FaissVectorStore
+
+DAY = 86400.0
+
+
+def build_store(directory, count=40, dim=8):
+    """A store of ``count`` one-day summaries alternating between two profiles"""
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(count, dim)).astype(np.float32)
+    metadatas = [{'period_start': i * DAY, 'period_end': (i + 1) * DAY, 'profile': 'kids' if i % 2 else 'parent'}
+                 for i in range(count)]
+    store = FaissVectorStore(str(directory), flat_threshold=1000)
+    store.add_embeddings([f"summary {i}" for i in range(count)], vectors, metadatas)
+    return store, vectors
+
+
+def test_reload_maps_the_persisted_documents(tmp_path):
+    store, vectors = build_store(tmp_path)
+    reloaded = FaissVectorStore(str(tmp_path), flat_threshold=1000)
+
+    assert reloaded.count == store.count == len(vectors)
+    doc, distance = reloaded.similarity_search_by_vector_with_score(vectors[7], k=1)[0]
+    assert doc.page_content == "summary 7"
+    assert doc.metadata['profile'] == 'kids'
+    assert distance == pytest.approx(0.0, abs=1e-5)
+
+
+def test_appending_after_reload_keeps_earlier_documents(tmp_path):
+    build_store(tmp_path, count=10)
+    store = FaissVectorStore(str(tmp_path), flat_threshold=1000)
+    extra = np.ones((1, 8), dtype=np.float32) * 5
+    store.add_embeddings(["late summary"], extra, [{'period_start': 50 * DAY, 'period_end': 51 * DAY}])
+
+    reloaded = FaissVectorStore(str(tmp_path), flat_threshold=1000)
+    assert reloaded.count == 11
+    assert reloaded.similarity_search_by_vector_with_score(extra[0], k=1)[0][0].page_content == "late summary"
+
+
+def test_search_is_restricted_to_the_window_and_profile(tmp_path):
+    store, vectors = build_store(tmp_path)
+    # The nearest document overall (summary 3) is outside the window
+    results = store.similarity_search_by_vector_with_score(
+        vectors[3], k=5, filter={'profile': 'kids'}, start=10 * DAY, end=20 * DAY
+    )
+
+    assert results
+    for doc, _ in results:
+        assert doc.metadata['profile'] == 'kids'
+        assert doc.metadata['period_end'] >= 10 * DAY and doc.metadata['period_start'] <= 20 * DAY
+    distances = [distance for _, distance in results]
+    assert distances == sorted(distances)
+
+
+def test_unknown_profile_matches_nothing(tmp_path):
+    store, vectors = build_store(tmp_path)
+    assert store.similarity_search_by_vector_with_score(vectors[0], k=3, filter={'profile': 'guest'}) == []
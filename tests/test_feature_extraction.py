@@ -0,0 +1,72 @@
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from anomaly_detector import AnomalyDetector, extract_features_batch, session_features
+
+APPS = [('chrome.exe', 'Browsers'), ('code.exe', 'Development'), ('discord.exe', 'Communication'),
+        ('steam.exe', 'Entertainment'), ('WINWORD.EXE', 'Office'), ('notepad.exe', 'Utilities')]
+
+
+def make_sessions(count, seed=0):
+    """Sessions with one to six apps and minute values that stress float summation"""
+    rng = random.Random(seed)
+    sessions = []
+    for _ in range(count):
+        apps = rng.sample(APPS, rng.randint(1, len(APPS)))
+        sessions.append(pd.DataFrame({
+            'Application': [app for app, _ in apps],
+            'Category': [category for _, category in apps],
+            'Time_Minutes': [rng.uniform(0.01, 300) / 3 for _ in apps],
+        }))
+    return sessions
+
+
+def long_frame(sessions, session_ids):
+    return pd.concat([session.assign(session_id=session_id) for session, session_id in zip(sessions, session_ids)],
+                     ignore_index=True)
+
+
+def per_session(detector, sessions):
+    return np.array([detector._extract_features(session) for session in sessions], dtype=np.float64)
+
+
+def test_batch_matches_per_session_extraction(tmp_path):
+    detector = AnomalyDetector(str(tmp_path / "history.json"), background_training=False)
+    sessions = make_sessions(300)
+    assert {len(session) for session in sessions} == set(range(1, len(APPS) + 1))
+
+    session_ids, batch = extract_features_batch(long_frame(sessions, range(len(sessions))))
+
+    np.testing.assert_array_equal(session_ids, np.arange(len(sessions)))
+    # Identical, not just close: cached and freshly extracted features must hash the same
+    np.testing.assert_array_equal(batch, per_session(detector, sessions))
+
+
+def test_single_app_sessions_have_nan_spread(tmp_path):
+    detector = AnomalyDetector(str(tmp_path / "history.json"), background_training=False)
+    sessions = [session.iloc[:1] for session in make_sessions(20, seed=1)]
+
+    _, batch = extract_features_batch(long_frame(sessions, range(len(sessions))))
+
+    assert np.isnan(batch[:, 3]).all()
+    np.testing.assert_array_equal(batch, per_session(detector, sessions))
+
+
+def test_empty_sessions_get_the_per_session_features(tmp_path):
+    detector = AnomalyDetector(str(tmp_path / "history.json"), background_training=False)
+    sessions = make_sessions(10, seed=2)
+    empty = pd.DataFrame({'Application': [], 'Category': [], 'Time_Minutes': []})
+    # Store ids are not contiguous and empty sessions have no rows in the long frame
+    session_ids = np.array([3, 4, 7, 8, 9, 12, 13, 20, 21, 22, 30, 31])
+    with_empty = sessions[:2] + [empty] + sessions[2:8] + [empty] + sessions[8:]
+    frame = long_frame([s for s in with_empty if len(s)], [i for i, s in zip(session_ids, with_empty) if len(s)])
+
+    features = session_features(frame, session_ids)
+
+    np.testing.assert_array_equal(features, per_session(detector, with_empty))
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'benchmarks'))
+
+from import_time import DEFAULT_BUDGET_MS, MODULES, check
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_analyzer_import_stays_lazy_and_within_budget(module):
+    total_us, _, failures = check(module, DEFAULT_BUDGET_MS)
+    assert not failures, f"{failures} ({total_us / 1000:.0f} ms)"
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip("aiohttp")
+
+from ingest_server import LEDGER_FILE, BatchLedger, IngestWriter
+from session_store import SessionStore
+from utils import session_store_dir
+
+
+def make_batch(batch_id, profiles=('kids',), sessions_per_profile=2):
+    return {
+        'batch_id': batch_id,
+        'device': 'laptop',
+        'sessions': [
+            {'timestamp': f"2026-03-0{i + 1} 10:00:00", 'profile': profile,
+             'apps': [['code.exe', 600 + i, ['main.py']], ['chrome.exe', 120, []]]}
+            for profile in profiles for i in range(sessions_per_profile)
+        ],
+    }
+
+
+def stored_sessions(base_dir, profile):
+    return len(SessionStore(session_store_dir(profile, 'laptop', str(base_dir))))
+
+
+def run(writer, *batches, concurrently=False):
+    """Submit batches through a started writer and return their results"""
+    async def scenario():
+        await writer.start()
+        try:
+            if concurrently:
+                return await asyncio.gather(*(writer.submit(batch) for batch in batches))
+            return [await writer.submit(batch) for batch in batches]
+        finally:
+            await writer.stop()
+
+    return asyncio.run(scenario())
+
+
+def test_retried_batch_is_stored_once(tmp_path):
+    first, retry = run(IngestWriter(str(tmp_path)), make_batch('b1'), make_batch('b1'))
+
+    assert first == {'batch_id': 'b1', 'stored': 2, 'duplicate': False}
+    assert retry == {'batch_id': 'b1', 'stored': 0, 'duplicate': True}
+    assert stored_sessions(tmp_path, 'kids') == 2
+
+
+def test_retry_while_the_first_upload_is_in_flight(tmp_path):
+    results = run(IngestWriter(str(tmp_path)), make_batch('b1'), make_batch('b1'), make_batch('b2'), concurrently=True)
+
+    assert [result['duplicate'] for result in results] == [False, True, False]
+    assert stored_sessions(tmp_path, 'kids') == 4
+
+
+def test_ledger_survives_a_restart(tmp_path):
+    run(IngestWriter(str(tmp_path)), make_batch('b1', profiles=('kids', 'parent')))
+
+    retry, = run(IngestWriter(str(tmp_path)), make_batch('b1', profiles=('kids', 'parent')))
+
+    assert retry['duplicate']
+    assert stored_sessions(tmp_path, 'kids') == stored_sessions(tmp_path, 'parent') == 2
+
+
+def test_retry_stores_only_the_profiles_that_failed(tmp_path):
+    # A file where the parent shard's directory should be makes its append fail
+    blocked = session_store_dir('parent', 'laptop', str(tmp_path))
+    os.makedirs(os.path.dirname(blocked))
+    open(blocked, 'w').close()
+    writer = IngestWriter(str(tmp_path))
+    with pytest.raises(OSError):
+        run(writer, make_batch('b1', profiles=('kids', 'parent')))
+    assert writer.stats['errors'] == 1
+    assert stored_sessions(tmp_path, 'kids') == 2
+
+    os.remove(blocked)
+    retry, = run(IngestWriter(str(tmp_path)), make_batch('b1', profiles=('kids', 'parent')))
+
+    assert retry == {'batch_id': 'b1', 'stored': 2, 'duplicate': False}
+    assert stored_sessions(tmp_path, 'kids') == stored_sessions(tmp_path, 'parent') == 2
+
+
+def test_ledger_log_is_rewritten_with_the_newest_keys(tmp_path):
+    path = str(tmp_path / LEDGER_FILE)
+    ledger = BatchLedger(path, max_ids=3)
+    for i in range(7):
+        ledger.add_many([f"b{i} kids"])
+    ledger.add_many(["b6 kids"])
+
+    reloaded = BatchLedger(path, max_ids=3)
+    assert list(reloaded.keys) == ["b4 kids", "b5 kids", "b6 kids"]
+    assert "b1 kids" not in reloaded
+    with open(path) as f:
+        assert len(f.read().splitlines()) <= 6
@@ -0,0 +1,51 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from anomaly_detector import extract_features_batch
+from model_registry import AnomalyModelRegistry
+from session_store import SessionStore
+from utils import session_store_dir
+
+START = datetime(2026, 1, 5, 9, 0)
+
+
+def session(minutes):
+    return pd.DataFrame({
+        'Application': ['code.exe', 'chrome.exe'],
+        'Time_Seconds': [minutes * 60, 600],
+        'Display_Name': ['Code', 'Chrome'],
+        'Window_Titles': ['', ''],
+        'Time_Minutes': [float(minutes), 10.0],
+        'Category': ['Development', 'Browsers'],
+    })
+
+
+def test_cached_detector_sees_sessions_appended_by_another_writer(tmp_path):
+    registry = AnomalyModelRegistry(str(tmp_path), background_training=False)
+    try:
+        for i in range(5):
+            registry.add_session('kids', session(30 + i), START + timedelta(hours=i))
+        detector = registry.get('kids')
+        assert len(detector.features) == 5
+
+        # The tracker daemon writes to the same shard through its own store
+        daemon_store = SessionStore(session_store_dir('kids', None, str(tmp_path)))
+        daemon_store.append_many([(START + timedelta(days=1, hours=i), session(90 + i)) for i in range(3)])
+
+        assert registry.get('kids') is detector
+        assert len(detector.features) == 8
+        _, expected = extract_features_batch(daemon_store.load_frame())
+        np.testing.assert_array_equal(detector.features, expected)
+
+        # Saving through the registry again keeps both writers' sessions
+        registry.add_session('kids', session(45), START + timedelta(days=2))
+        assert not detector.refresh()
+        assert list(detector.session_ids) == list(range(9))
+    finally:
+        registry.close()
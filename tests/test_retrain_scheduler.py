@@ -0,0 +1,45 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from anomaly_detector import RetrainScheduler
+
+
+class CountingDetector:
+    """Stand-in for AnomalyDetector that records train() calls"""
+
+    def __init__(self):
+        self.trained = threading.Event()
+        self.calls = 0
+
+    def train(self):
+        self.calls += 1
+        self.trained.set()
+
+
+def test_single_notify_retrains_after_max_interval():
+    detector = CountingDetector()
+    scheduler = RetrainScheduler(detector, min_new_sessions=10, max_interval=0.5)
+    try:
+        started = time.monotonic()
+        scheduler.notify()
+        assert detector.trained.wait(3.0)
+        assert time.monotonic() - started >= 0.5
+        assert detector.calls == 1
+        assert scheduler.pending == 0
+    finally:
+        scheduler.stop(timeout=2.0)
+
+
+def test_min_new_sessions_retrains_before_max_interval():
+    detector = CountingDetector()
+    scheduler = RetrainScheduler(detector, min_new_sessions=3, max_interval=60.0)
+    try:
+        scheduler.notify(3)
+        assert detector.trained.wait(2.0)
+        assert detector.calls == 1
+    finally:
+        scheduler.stop(timeout=2.0)
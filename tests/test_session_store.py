@@ -0,0 +1,78 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import session_store
+from session_store import SessionStore
+
+DAY = 86400
+START = 1_767_600_000  # epoch seconds
+
+
+def records(minutes, application='code.exe'):
+    return [{'Application': application, 'Time_Seconds': minutes * 60, 'Display_Name': application,
+             'Window_Titles': '', 'Time_Minutes': float(minutes), 'Category': 'Development'}]
+
+
+def assert_disjoint_in_order(store):
+    segments = store.manifest['segments']
+    for before, after in zip(segments, segments[1:]):
+        assert before['last_id'] < after['first_id']
+
+
+def test_compaction_merges_only_segments_of_similar_size(tmp_path, monkeypatch):
+    rewritten = []
+    write_table = session_store._write_table
+
+    def counting_write(path, table):
+        if path.endswith('.sessions.arrow'):
+            rewritten.append(len(table))
+        write_table(path, table)
+
+    monkeypatch.setattr(session_store, '_write_table', counting_write)
+    store = SessionStore(str(tmp_path), compact_after=4)
+    for i in range(300):
+        store.append(records(i % 60 + 1), START + i * 60)
+
+    sizes = [segment['sessions'] for segment in store.manifest['segments']]
+    # 300 = 4**4 + 2 * 4**2 + 3 * 4, each tier holding fewer than compact_after segments
+    assert sizes == [256, 16, 16, 4, 4, 4]
+    assert_disjoint_in_order(store)
+    # Every session is written once on append and once per tier it is merged into
+    assert sum(rewritten) <= 300 * 5
+    assert len(store) == 300
+    assert list(store.session_index()['session_id']) == list(range(300))
+    assert store.load_session(123)['Time_Minutes'].tolist() == [float(123 % 60 + 1)]
+
+
+def test_max_sessions_retention_hides_then_drops_old_sessions(tmp_path):
+    store = SessionStore(str(tmp_path), max_sessions=10, compact_after=4)
+    for i in range(50):
+        store.append(records(i + 1), START + i * 60)
+
+    assert len(store) == 10
+    assert list(store.session_index()['session_id']) == list(range(40, 50))
+    assert store.load_session(5).empty
+    assert store.load_session(45)['Time_Minutes'].tolist() == [46.0]
+    # Hidden sessions are physically removed once they make up most of their segment
+    assert sum(segment['sessions'] for segment in store.manifest['segments']) < 20
+    assert_disjoint_in_order(store)
+
+    store.compact()
+    assert sum(segment['sessions'] for segment in store.manifest['segments']) == 10
+    assert SessionStore(str(tmp_path)).load_frame()['Time_Minutes'].tolist() == [float(i + 1) for i in range(40, 50)]
+
+
+def test_age_retention_keeps_sessions_stored_before_a_late_old_one(tmp_path):
+    store = SessionStore(str(tmp_path), max_age_days=30)
+    store.append(records(10), START - 40 * DAY)
+    for i in range(5):
+        store.append(records(20 + i), START + i * DAY)
+    # The daemon's spool is flushed late and adds a session from before the limit
+    store.append(records(99), START - 35 * DAY)
+    store.append(records(30), START + 6 * DAY)
+
+    ids = list(store.session_index()['session_id'])
+    assert 0 not in ids
+    assert ids[:5] == [1, 2, 3, 4, 5]
@@ -0,0 +1,81 @@
+import multiprocessing
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from session_store import SessionStore
+from sketches import SketchStore, UsageSketch
+from utils import session_store_dir
+
+APPS = [f"app{i}.exe" for i in range(40)]
+
+
+def make_session(rng):
+    apps = [APPS[0]] + rng.sample(APPS[1:8], 2) + rng.sample(APPS, 2)
+    return [{'Application': app, 'Time_Seconds': rng.randint(1, 3600), 'Window_Titles': f"{app} window"}
+            for app in dict.fromkeys(apps)]
+
+
+def test_merged_sketches_match_one_sketch_of_all_sessions():
+    rng = random.Random(0)
+    sessions = [make_session(rng) for _ in range(400)]
+    whole = UsageSketch(top_k=10)
+    parts = [UsageSketch(top_k=10) for _ in range(4)]
+    for i, session in enumerate(sessions):
+        whole.add_session(session)
+        parts[i % 4].add_session(session)
+
+    merged = UsageSketch(top_k=10)
+    for part in parts:
+        # Sketches travel through the JSON files between merges
+        merged.merge(UsageSketch.from_dict(part.to_dict()))
+
+    exact_minutes = {}
+    for session in sessions:
+        for row in session:
+            exact_minutes[row['Application']] = exact_minutes.get(row['Application'], 0) + row['Time_Seconds'] / 60
+    summary, expected = merged.summary(top=10), whole.summary(top=10)
+    assert summary['sessions'] == expected['sessions'] == 400
+    assert summary['minutes'] == pytest.approx(sum(exact_minutes.values()))
+    assert summary['distinct_apps'] == pytest.approx(len(exact_minutes), rel=0.05)
+    # Every app above total / top_k is kept, and each count is within its error bound
+    heavy = {app for app, minutes in exact_minutes.items() if minutes > sum(exact_minutes.values()) / 10}
+    assert APPS[0] in heavy
+    assert heavy <= {entry['application'] for entry in summary['top_apps']}
+    assert summary['top_apps'][0]['application'] == APPS[0]
+    for entry in summary['top_apps']:
+        true_minutes = exact_minutes[entry['application']]
+        assert true_minutes - 0.01 <= entry['minutes'] <= true_minutes + entry['error'] + 0.01
+    for name, value in expected['session_minutes'].items():
+        assert summary['session_minutes'][name] == pytest.approx(value, rel=0.05)
+
+
+def write_sessions(base_dir, seed, count):
+    """One writer process, e.g. the daemon's flush or the ingest server, with its own SketchStore"""
+    rng = random.Random(seed)
+    sketches = SketchStore(base_dir)
+    store = SessionStore(session_store_dir('kids', 'laptop', base_dir), on_append=sketches.recorder('kids', 'laptop'))
+    for i in range(count):
+        store.append(make_session(rng), f"2026-03-02 {10 + i % 10:02d}:00:00")
+
+
+def test_concurrent_writers_do_not_lose_sketch_updates(tmp_path):
+    base_dir = str(tmp_path)
+    context = multiprocessing.get_context('spawn')
+    writers = [context.Process(target=write_sessions, args=(base_dir, seed, 25)) for seed in range(3)]
+    for writer in writers:
+        writer.start()
+    for writer in writers:
+        writer.join(60)
+        assert writer.exitcode == 0
+
+    summary = SketchStore(base_dir).fleet_summary(since='2026-03-02', until='2026-03-02')
+    store = SessionStore(session_store_dir('kids', 'laptop', base_dir))
+    stored_minutes = store.load_frame()['Time_Seconds'].sum() / 60
+    assert len(store) == 75
+    assert summary['sessions'] == 75
+    assert summary['minutes'] == pytest.approx(stored_minutes, abs=0.01)
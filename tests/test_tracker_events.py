@@ -0,0 +1,62 @@
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from tracker.events import FOCUS_CHANGE, EventPublisher
+
+
+def unreachable_url():
+    """An endpoint on a local port nothing listens on"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}/api/events"
+
+
+def hanging_server():
+    """A socket that accepts connections but never answers, so each POST times out"""
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(8)
+    return sock, f"http://127.0.0.1:{sock.getsockname()[1]}/api/events"
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_failed_batches_keep_only_the_newest_events():
+    server, url = hanging_server()
+    publisher = EventPublisher(url, 'kids', 'laptop', max_pending=5, timeout=1.0)
+    try:
+        for i in range(3):
+            publisher.publish(FOCUS_CHANGE, n=i)
+        # The batch is in flight; these arrive while its POST times out
+        wait_until(lambda: not publisher.pending)
+        for i in range(3, 7):
+            publisher.publish(FOCUS_CHANGE, n=i, profile='parent')
+        wait_until(lambda: len(publisher.pending) == 5)
+
+        assert [event['n'] for event in publisher.pending] == [2, 3, 4, 5, 6]
+        assert [event['profile'] for event in publisher.pending] == ['kids'] + ['parent'] * 4
+    finally:
+        publisher.close(timeout=5.0)
+        server.close()
+
+
+def test_close_stops_retrying_after_one_final_attempt():
+    publisher = EventPublisher(unreachable_url(), 'kids', 'laptop', timeout=0.5)
+    publisher.publish(FOCUS_CHANGE)
+    wait_until(lambda: len(publisher.pending) == 1)
+
+    started = time.monotonic()
+    publisher.close(timeout=5.0)
+
+    assert not publisher.thread.is_alive()
+    assert time.monotonic() - started < 2.0
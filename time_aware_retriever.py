@@ -0,0 +1,94 @@
+import math
+import sys
+import time
+from typing import List, Optional, Tuple
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
+from langchain.schema import BaseRetriever, Document
+
+# Key of the window in the invoke config's metadata when the retriever runs inside a chain
+WINDOW_METADATA_KEY = "time_window"
+
+
+def window_config(start: Optional[float], end: Optional[float], profile: Optional[str] = None) -> dict:
+    """
+    Invoke config that restricts a TimeWindowRetriever inside a chain to one window.
+
+    Args:
+        start: Window start as epoch seconds (None for unbounded)
+        end: Window end as epoch seconds (None for unbounded)
+        profile: Profile whose summaries to retrieve (None for all)
+    """
+    return {"metadata": {WINDOW_METADATA_KEY: {"start": start, "end": end, "profile": profile}}}
+
+
+class TimeWindowRetriever(BaseRetriever):
+    """
+    Retriever that prefilters stored summaries on their period and profile
+    metadata, then reranks the vector-search hits by recency.
+
+    The window comes with each query: as ``start``/``end``/``profile``
+    keyword arguments to ``invoke``, or, inside a chain, through the invoke
+    config built by ``window_config``. The retriever keeps no per-query
+    state, so one instance (and the chain built on it) can serve concurrent
+    requests for different profiles and periods.
+    """
+
+    vectorstore: object
+    k: int = 4
+    fetch_k: int = 16
+    half_life_days: float = 14.0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @staticmethod
+    def _chroma_filter(start: Optional[float], end: Optional[float], profile: Optional[str]) -> Optional[dict]:
+        clauses = []
+        if start is not None:
+            clauses.append({"period_end": {"$gte": start}})
+        if end is not None:
+            clauses.append({"period_start": {"$lte": end}})
+        if profile is not None:
+            clauses.append({"profile": profile})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+    def _search(self, query: str, start: Optional[float], end: Optional[float],
+                profile: Optional[str]) -> List[Tuple[Document, float]]:
+        """Vector search restricted to the window, as (document, distance) pairs."""
+        # faiss_store is only imported when the FAISS backend is used, so a Chroma-only setup needs no faiss
+        faiss_store = sys.modules.get("faiss_store")
+        if faiss_store is not None and isinstance(self.vectorstore, faiss_store.FaissVectorStore):
+            return self.vectorstore.similarity_search_with_score(
+                query,
+                k=self.fetch_k,
+                start=start,
+                end=end,
+                filter={"profile": profile} if profile is not None else None,
+            )
+        return self.vectorstore.similarity_search_with_score(
+            query, k=self.fetch_k, filter=self._chroma_filter(start, end, profile)
+        )
+
+    def _rerank(self, results: List[Tuple[Document, float]], end: Optional[float]) -> List[Document]:
+        """Order hits by similarity decayed with the age of the period they cover."""
+        now = end if end is not None else time.time()
+        scored = []
+        for doc, distance in results:
+            period_end = doc.metadata.get("period_end")
+            age_days = max(0.0, (now - float(period_end)) / 86400) if period_end is not None else 0.0
+            recency = math.pow(0.5, age_days / self.half_life_days)
+            scored.append((recency / (1.0 + distance), doc))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [doc for _, doc in scored[:self.k]]
+
+    def _get_relevant_documents(self, query: str, *,
+                                run_manager: Optional[CallbackManagerForRetrieverRun] = None,
+                                start: Optional[float] = None, end: Optional[float] = None,
+                                profile: Optional[str] = None) -> List[Document]:
+        if start is None and end is None and profile is None and run_manager is not None:
+            # Called from a chain: the window travels in the config metadata
+            window = (run_manager.metadata or {}).get(WINDOW_METADATA_KEY) or {}
+            start, end, profile = window.get("start"), window.get("end"), window.get("profile")
+        return self._rerank(self._search(query, start, end, profile), end)
@@ -0,0 +1,137 @@
+import os
+import time
+import numpy as np
+
+# Hour-of-day histogram in 4-hour bins: 00-04, 04-08, ..., 20-24
+HOUR_BINS = 6
+NIGHT_HOURS = (22, 6)  # 22:00 to 06:00
+
+TIMELINE_FEATURE_NAMES = [
+    f'hours_{i * 24 // HOUR_BINS:02d}_{(i + 1) * 24 // HOUR_BINS:02d}' for i in range(HOUR_BINS)
+] + ['switches_per_hour', 'longest_stretch_minutes', 'night_share']
+
+def add_focus_sample(intervals, app, timestamp, max_gap=5.0):
+    """
+    Extend a focus timeline with one sample from the tracker.
+
+    The timeline is a list of [app, start, end] intervals (epoch seconds). A
+    sample for the app already in focus extends the last interval; a new app,
+    or a gap longer than ``max_gap`` seconds, starts a new one.
+    """
+    if intervals and intervals[-1][0] == app and timestamp - intervals[-1][2] <= max_gap:
+        intervals[-1][2] = timestamp
+    else:
+        intervals.append([app, timestamp, timestamp])
+    return intervals
+
+def _hours_of_day(start, end):
+    """Seconds of [start, end) falling in each hour of the local day"""
+    seconds = np.zeros(24)
+    while start < end:
+        local = time.localtime(start)
+        hour_end = start + 3600 - (local.tm_min * 60 + local.tm_sec)
+        chunk_end = min(hour_end, end)
+        seconds[local.tm_hour] += chunk_end - start
+        start = chunk_end
+    return seconds
+
+def extract_timeline_features(intervals):
+    """
+    Features of one session's focus timeline, ordered as TIMELINE_FEATURE_NAMES.
+
+    Hour bins and the night share are fractions of the focused time; the
+    switch rate counts app changes per focused hour; the longest stretch is
+    the longest single interval in minutes.
+    """
+    features = np.zeros(len(TIMELINE_FEATURE_NAMES))
+    if not intervals:
+        return features
+
+    hours = np.zeros(24)
+    longest = 0.0
+    switches = 0
+    previous_app = None
+    for app, start, end in intervals:
+        hours += _hours_of_day(start, end)
+        longest = max(longest, end - start)
+        if previous_app is not None and app != previous_app:
+            switches += 1
+        previous_app = app
+
+    total = hours.sum()
+    if total > 0:
+        features[:HOUR_BINS] = hours.reshape(HOUR_BINS, -1).sum(axis=1) / total
+        night_start, night_end = NIGHT_HOURS
+        features[HOUR_BINS + 2] = (hours[night_start:].sum() + hours[:night_end].sum()) / total
+    features[HOUR_BINS] = switches / max(total / 3600, 1 / 60)
+    features[HOUR_BINS + 1] = longest / 60
+    return features
+
+class RollingBaseline:
+    """
+    Mean and spread of the last ``capacity`` feature vectors for one profile.
+
+    Vectors live in a fixed-size ring buffer and running sums are updated as
+    vectors enter and leave it, so both updating and scoring cost
+    O(features) no matter how long the history is.
+    """
+
+    def __init__(self, n_features=len(TIMELINE_FEATURE_NAMES), capacity=50):
+        self.buffer = np.zeros((capacity, n_features))
+        self.count = 0
+        self.position = 0
+        self.total = np.zeros(n_features)
+        self.total_squares = np.zeros(n_features)
+
+    @property
+    def capacity(self):
+        return len(self.buffer)
+
+    def update(self, features):
+        """Add one session's feature vector, evicting the oldest once full"""
+        features = np.asarray(features, dtype=np.float64)
+        if self.count == self.capacity:
+            outgoing = self.buffer[self.position]
+            self.total -= outgoing
+            self.total_squares -= outgoing ** 2
+        else:
+            self.count += 1
+        self.buffer[self.position] = features
+        self.total += features
+        self.total_squares += features ** 2
+        self.position = (self.position + 1) % self.capacity
+
+    def mean(self):
+        return self.total / max(self.count, 1)
+
+    def std(self):
+        if self.count < 2:
+            return np.zeros_like(self.total)
+        variance = (self.total_squares - self.total ** 2 / self.count) / (self.count - 1)
+        return np.sqrt(np.maximum(variance, 0.0))
+
+    def zscores(self, features, min_std=0.05):
+        """Standardized distance of a feature vector from the baseline"""
+        return (np.asarray(features, dtype=np.float64) - self.mean()) / np.maximum(self.std(), min_std)
+
+    def save(self, path):
+        """Persist the ring buffer (running sums are rebuilt on load)"""
+        np.savez(path, buffer=self.buffer, count=self.count, position=self.position)
+
+    @classmethod
+    def load(cls, path, n_features=len(TIMELINE_FEATURE_NAMES), capacity=50):
+        """Restore a saved baseline, or start an empty one if the file is missing or incompatible"""
+        baseline = cls(n_features, capacity)
+        try:
+            if os.path.exists(path):
+                with np.load(path) as saved:
+                    if saved['buffer'].shape == baseline.buffer.shape:
+                        baseline.buffer = saved['buffer'].copy()
+                        baseline.count = int(saved['count'])
+                        baseline.position = int(saved['position'])
+                        filled = baseline.buffer[:baseline.count]
+                        baseline.total = filled.sum(axis=0)
+                        baseline.total_squares = (filled ** 2).sum(axis=0)
+        except Exception as e:
+            print(f"Error loading timeline baseline: {e}")
+        return baseline
@@ -0,0 +1,8 @@
+"""
+Headless screen time tracker.
+
+Runs the same sampling, categorization and limit logic as the Streamlit
+app without loading Streamlit, pandas or matplotlib:
+
+    python -m tracker run --profile kids
+"""
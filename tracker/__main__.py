@@ -0,0 +1,60 @@
+import argparse
+import logging
+import signal
+import sys
+
+from utils import load_profiles
+from tracker.daemon import TrackerDaemon, flush_spool
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tracker", description="Headless screen time tracker")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Track a profile until stopped")
+    run.add_argument("--profile", help="Profile key from profiles.json (defaults to the default profile)")
+    run.add_argument("--interval", type=float, default=0.5, help="Seconds between samples")
+    run.add_argument("--session-minutes", type=float, default=15.0, help="Length of each stored session")
+    run.add_argument("--idle-gap", type=float, default=60.0, help="Close the session after this many idle seconds")
+    run.add_argument("--spool-dir", default="tracker_spool")
+    run.add_argument("--store-dir", help="Session store directory (defaults to the profile's model shard)")
+    run.add_argument("--device", help="Device name (defaults to the hostname)")
+    run.add_argument("--max-seconds", type=float, help="Stop after this many seconds")
+    run.add_argument("--events-url", help="Push live events to this API server endpoint, "
+                                          "e.g. http://127.0.0.1:8765/api/events")
+    run.add_argument("--ingest-url", help="Upload sessions to this ingest server endpoint instead of storing them "
+                                          "locally, e.g. http://ingest.local:8766/ingest/batches")
+    run.add_argument("--upload-interval", type=float, default=60.0, help="Seconds between uploads")
+
+    flush = commands.add_parser("flush", help="Move spooled sessions into the session store")
+    flush.add_argument("--spool-dir", default="tracker_spool")
+    flush.add_argument("--profile", required=True)
+    flush.add_argument("--device", required=True)
+    flush.add_argument("--store-dir")
+
+    for command in (run, flush):
+        command.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    if args.command == "flush":
+        flush_spool(args.spool_dir, args.profile, args.device, args.store_dir)
+        return 0
+
+    profiles = load_profiles()
+    profile_key = args.profile or next((key for key, profile in profiles.items() if profile.get("is_default")), "kids")
+    if profile_key not in profiles:
+        parser.error(f"Unknown profile '{profile_key}'. Choose from: {', '.join(profiles)}")
+
+    daemon = TrackerDaemon(
+        profile_key, profiles[profile_key],
+        spool_dir=args.spool_dir, store_dir=args.store_dir, device=args.device,
+        interval=args.interval, session_minutes=args.session_minutes, idle_gap=args.idle_gap,
+        events_url=args.events_url, ingest_url=args.ingest_url, upload_interval=args.upload_interval
+    )
+    # Stop cleanly (flushing the open session) when the service manager asks
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    daemon.run(max_seconds=args.max_seconds)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
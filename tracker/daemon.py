@@ -0,0 +1,278 @@
+import glob
+import json
+import logging
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from utils import categorize_app, get_display_name, session_store_dir
+from tracker.events import FOCUS_CHANGE, LIMIT_EXCEEDED, LIMIT_WARNING, SESSION_END, EventPublisher
+from tracker.limits import LimitChecker
+from tracker.notify import email_config_from_env, send_desktop_notification, send_limit_email
+from tracker.sampler import sample_focus
+
+logger = logging.getLogger(__name__)
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+SPOOL_FILE = "sessions.jsonl"
+CURRENT_FILE = "current.json"  # Snapshot of the open session for the API server
+MAX_TITLES_PER_APP = 20
+
+class TrackerDaemon:
+    """
+    Long-running tracker for one profile.
+
+    Samples the foreground window every ``interval`` seconds, enforces the
+    profile's daily app limits, and closes a session every
+    ``session_minutes`` (or after ``idle_gap`` seconds without a tracked app).
+    Closed sessions are appended to a JSON-lines spool; a short-lived
+    ``python -m tracker flush`` child moves them into the session store, so
+    pandas and pyarrow never load in the daemon itself. The open session is
+    also written to ``current.json`` every ``snapshot_interval`` seconds, and
+    focus, limit and session events are pushed to ``events_url`` if given.
+
+    With ``ingest_url`` the spool is uploaded in batches to a central ingest
+    server instead of being flushed into a local store.
+    """
+
+    def __init__(self, profile_key, profile, spool_dir="tracker_spool", store_dir=None, device=None,
+                 interval=0.5, session_minutes=15.0, idle_gap=60.0, snapshot_interval=5.0,
+                 events_url=None, ingest_url=None, upload_interval=60.0, sampler=sample_focus):
+        """
+        Args:
+            profile_key: Key of the profile in profiles.json (e.g. "kids")
+            profile: The profile dict with "name" and "app_limits"
+            spool_dir: Directory for closed sessions waiting to be stored
+            store_dir: Session store to flush into (defaults to the profile's
+                anomaly model shard)
+            device: Device name recorded with the sessions (defaults to the hostname)
+            interval: Seconds between samples
+            session_minutes: Length of a stored session
+            idle_gap: Close the session after this long without a tracked app
+            snapshot_interval: Seconds between snapshots of the open session
+            events_url: API server endpoint for live events (None disables them)
+            ingest_url: Ingest server endpoint to upload sessions to (None stores them locally)
+            upload_interval: Seconds between uploads to ``ingest_url``
+            sampler: Callable returning the (application, window title) in focus
+        """
+        self.profile_key = profile_key
+        self.profile = profile
+        self.spool_dir = spool_dir
+        self.store_dir = store_dir
+        self.device = device or socket.gethostname()
+        self.interval = interval
+        self.session_seconds = session_minutes * 60
+        self.idle_gap = idle_gap
+        self.snapshot_interval = snapshot_interval
+        self.last_snapshot = 0.0
+        self.sampler = sampler
+
+        self.limits = LimitChecker(profile.get("app_limits", {}))
+        self.email_config = email_config_from_env()
+        self.categories = {}  # categorize_app cache, one lookup per new app
+        self.events = EventPublisher(events_url, profile_key, self.device) if events_url else None
+        self.focused_app = None
+        self.flush_process = None
+        self.running = False
+        os.makedirs(spool_dir, exist_ok=True)
+        self.uploader = None
+        if ingest_url:
+            # Imported here since the uploader itself imports this module
+            from tracker.upload import BatchUploader
+            self.uploader = BatchUploader(ingest_url, spool_dir, self.device, interval=upload_interval)
+        self._reset_session(time.time())
+
+    def _reset_session(self, now):
+        self.session_start = now
+        self.last_active = now
+        self.usage_seconds = {}
+        self.window_titles = {}
+
+    def _category(self, app_name):
+        category = self.categories.get(app_name)
+        if category is None:
+            category = self.categories[app_name] = categorize_app(app_name)
+        return category
+
+    def step(self, now, elapsed):
+        """Take one sample and account ``elapsed`` seconds of focus to it."""
+        app_name, window_title = self.sampler()
+        if app_name != self.focused_app:
+            self.focused_app = app_name
+            self._event(FOCUS_CHANGE, application=app_name, display_name=get_display_name(app_name) if app_name else None,
+                        category=self._category(app_name) if app_name else None, window_title=window_title)
+        if app_name:
+            self.last_active = now
+            self.usage_seconds[app_name] = self.usage_seconds.get(app_name, 0.0) + elapsed
+            titles = self.window_titles.setdefault(app_name, [])
+            if window_title and window_title not in titles and len(titles) < MAX_TITLES_PER_APP:
+                titles.append(window_title)
+
+            reached = self.limits.add(app_name, elapsed, now)
+            if reached is not None:
+                kind, minutes = reached
+                if kind == "exceeded":
+                    self._limit_reached(app_name, minutes)
+                else:
+                    self._event(LIMIT_WARNING, application=app_name, display_name=get_display_name(app_name),
+                                used_minutes=minutes, limit_minutes=self.limits.app_limits[app_name])
+
+        if (now - self.session_start >= self.session_seconds
+                or (self.usage_seconds and now - self.last_active >= self.idle_gap)):
+            self.end_session(now)
+        elif now - self.last_snapshot >= self.snapshot_interval:
+            self.write_snapshot(now)
+
+    def _event(self, event_type, **fields):
+        if self.events is not None:
+            self.events.publish(event_type, **fields)
+
+    def _limit_reached(self, app_name, minutes):
+        display_name = get_display_name(app_name)
+        self._event(LIMIT_EXCEEDED, application=app_name, display_name=display_name,
+                    used_minutes=minutes, limit_minutes=self.limits.app_limits[app_name])
+        logger.info(f"Time limit reached for {display_name} ({minutes:.1f} min)")
+        send_desktop_notification(
+            "⏰ Smart Screen Time Alert",
+            f"⚠️ Time limit reached for {display_name}! Please close the application."
+        )
+        if self.email_config:
+            # SMTP can take seconds; keep sampling meanwhile
+            threading.Thread(target=send_limit_email, daemon=True, args=(
+                display_name, minutes, self.profile.get("name", self.profile_key), self.email_config
+            )).start()
+
+    def session_rows(self):
+        """The current session in track_screen_time's row format."""
+        rows = [
+            {
+                'Application': app_name,
+                'Time_Seconds': int(round(seconds)),
+                'Display_Name': get_display_name(app_name),
+                'Window_Titles': ', '.join(self.window_titles.get(app_name, [])),
+                'Time_Minutes': seconds / 60,
+                'Category': self._category(app_name),
+            }
+            for app_name, seconds in self.usage_seconds.items()
+        ]
+        rows.sort(key=lambda row: row['Time_Seconds'], reverse=True)
+        return rows
+
+    def end_session(self, now):
+        """Spool the current session (if anything was tracked) and start a new one."""
+        rows = self.session_rows()
+        if rows:
+            record = {
+                'timestamp': time.strftime(TIMESTAMP_FORMAT, time.localtime(now)),
+                'profile': self.profile_key,
+                'device': self.device,
+                'data': rows,
+            }
+            with open(os.path.join(self.spool_dir, SPOOL_FILE), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record) + "\n")
+            self._event(SESSION_END, started=self.session_start,
+                        total_minutes=sum(row['Time_Minutes'] for row in rows),
+                        top_apps=[row['Display_Name'] for row in rows[:3]])
+        self.flush()
+        self._reset_session(now)
+        self.write_snapshot(now)
+
+    def write_snapshot(self, now):
+        """Atomically replace current.json with the open session"""
+        self.last_snapshot = now
+        snapshot = {
+            'profile': self.profile_key,
+            'device': self.device,
+            'started': self.session_start,
+            'updated': now,
+            'data': self.session_rows(),
+        }
+        path = os.path.join(self.spool_dir, CURRENT_FILE)
+        try:
+            with open(path + ".tmp", 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            logger.warning(f"Could not write session snapshot: {e}")
+
+    def flush(self):
+        """Move spooled sessions into the session store in a child process."""
+        if self.uploader is not None:
+            return  # The uploader sends the spool to the ingest server instead
+        if self.flush_process is not None and self.flush_process.poll() is None:
+            return  # The previous flush is still running; it will be retried next session
+        if not (os.path.exists(os.path.join(self.spool_dir, SPOOL_FILE))
+                or glob.glob(os.path.join(self.spool_dir, "sessions.*.flushing"))):
+            return
+        command = [sys.executable, "-m", "tracker", "flush", "--spool-dir", self.spool_dir,
+                   "--profile", self.profile_key, "--device", self.device]
+        if self.store_dir:
+            command += ["--store-dir", self.store_dir]
+        project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.flush_process = subprocess.Popen(command, cwd=os.getcwd(),
+                                              env={**os.environ, "PYTHONPATH": project_dir})
+
+    def run(self, max_seconds=None):
+        """Sample until stopped (Ctrl+C / SIGTERM) or for ``max_seconds``."""
+        self.running = True
+        started = last = time.time()
+        logger.info(f"Tracking profile '{self.profile_key}' on {self.device}")
+        try:
+            while self.running and (max_seconds is None or last - started < max_seconds):
+                time.sleep(self.interval)
+                now = time.time()
+                # Count at most a few intervals if the machine slept or the loop stalled
+                self.step(now, min(now - last, 4 * self.interval))
+                last = now
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Let a running flush finish so the final one picks up everything left
+            if self.flush_process is not None:
+                self.flush_process.wait()
+            self.end_session(time.time())
+            if self.flush_process is not None:
+                self.flush_process.wait()
+            if self.events is not None:
+                self.events.close()
+            if self.uploader is not None:
+                self.uploader.close()
+            logger.info("Tracker stopped")
+
+    def stop(self):
+        self.running = False
+
+
+def flush_spool(spool_dir, profile_key, device, store_dir=None):
+    """
+    Append spooled sessions to the session store and remove them from the spool.
+
+    Runs in the short-lived flush process, so importing the store here keeps
+    pandas and pyarrow out of the daemon.
+    """
+    pending = os.path.join(spool_dir, SPOOL_FILE)
+    if os.path.exists(pending):
+        # Claim the spool; the daemon starts a fresh file with its next session
+        os.replace(pending, os.path.join(spool_dir, f"sessions.{int(time.time() * 1000)}.flushing"))
+
+    claimed = sorted(glob.glob(os.path.join(spool_dir, "sessions.*.flushing")))
+    if not claimed:
+        return 0
+
+    from session_store import SessionStore
+    from sketches import SketchStore
+    store_dir = store_dir or session_store_dir(profile_key, device)
+
+    store = SessionStore(store_dir, on_append=SketchStore().recorder(profile_key, device))
+    count = 0
+    for path in claimed:
+        with open(path, 'r', encoding='utf-8') as f:
+            sessions = [json.loads(line) for line in f if line.strip()]
+        store.append_many((session['timestamp'], session['data']) for session in sessions)
+        os.remove(path)
+        count += len(sessions)
+    logger.info(f"Stored {count} sessions in {store_dir}")
+    return count
@@ -0,0 +1,91 @@
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+FOCUS_CHANGE = "focus_change"
+LIMIT_WARNING = "limit_warning"
+LIMIT_EXCEEDED = "limit_exceeded"
+SESSION_END = "session_end"
+
+class EventPublisher:
+    """
+    Pushes tracker events to the API server's ``/api/events`` endpoint.
+
+    ``publish`` only appends to a bounded buffer, so sampling never waits on
+    the network; a background thread posts whatever has accumulated as one
+    JSON batch. If the server is unreachable the oldest events are dropped
+    once ``max_pending`` are waiting, and posting is retried with backoff
+    until ``close``, after which one final attempt is made. Events carry the
+    publisher's profile unless ``publish`` is given another one.
+    """
+
+    def __init__(self, url, profile, device, max_pending=1000, timeout=2.0):
+        """
+        Args:
+            url: The server's event endpoint, e.g. http://127.0.0.1:8765/api/events
+            profile: Profile key added to every event (None if given per event)
+            device: Device name added to every event
+            max_pending: Events kept while the server is unreachable
+            timeout: Seconds to wait for one POST
+        """
+        self.url = url
+        self.profile = profile
+        self.device = device
+        self.timeout = timeout
+        self.pending = deque(maxlen=max_pending)
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="event-publisher", daemon=True)
+        self.thread.start()
+
+    def publish(self, event_type, **fields):
+        """Queue one event; returns immediately. ``fields`` may override the profile."""
+        event = {'type': event_type, 'profile': self.profile, 'device': self.device, 'time': time.time(), **fields}
+        with self.condition:
+            self.pending.append(event)
+            self.condition.notify()
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self.condition:
+                while self.running and not self.pending:
+                    self.condition.wait()
+                if not self.pending:
+                    return
+                batch = list(self.pending)
+                self.pending.clear()
+            try:
+                request = urllib.request.Request(
+                    self.url, data=json.dumps(batch).encode(), method="POST",
+                    headers={'Content-Type': 'application/json'}
+                )
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+                backoff = 0.0
+            except Exception as e:
+                if not backoff:
+                    logger.warning(f"Could not publish events to {self.url}: {e}")
+                with self.condition:
+                    if not self.running:
+                        # That was the final attempt after close(); give up on the rest
+                        return
+                    # Oldest first, then keep only the newest max_pending of the batch and of
+                    # the events published meanwhile
+                    events = batch + list(self.pending)
+                    self.pending.clear()
+                    self.pending.extend(events)
+                    backoff = min(max(backoff * 2, 1.0), 30.0)
+                    # close() cuts the wait short; new events don't
+                    self.condition.wait_for(lambda: not self.running, backoff)
+
+    def close(self, timeout=2.0):
+        """Stop the thread after sending what is queued (waits at most ``timeout`` seconds)"""
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+        self.thread.join(timeout)
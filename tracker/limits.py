@@ -0,0 +1,54 @@
+import time
+
+class LimitChecker:
+    """
+    Per-day usage totals for a profile's app limits.
+
+    ``add`` is called with each sample's focus time and reports the moment an
+    app first crosses ``warn_fraction`` of its limit and the limit itself on a
+    given day; totals reset at local midnight.
+    """
+
+    def __init__(self, app_limits, warn_fraction=0.8):
+        """
+        Args:
+            app_limits: Mapping of application to its daily limit in minutes
+            warn_fraction: Fraction of the limit that triggers a warning
+        """
+        self.app_limits = dict(app_limits)
+        self.warn_fraction = warn_fraction
+        self.usage_seconds = {}
+        self.warned = set()
+        self.exceeded = set()
+        self.day = None
+
+    def add(self, app_name, seconds, now=None):
+        """
+        Add focus time for an app.
+
+        Returns:
+            tuple or None: ("warning" or "exceeded", usage in minutes) when the app
+            just crossed the warning level or its limit
+        """
+        day = time.localtime(now).tm_yday if now is not None else time.localtime().tm_yday
+        if day != self.day:
+            self.day = day
+            self.usage_seconds.clear()
+            self.warned.clear()
+            self.exceeded.clear()
+
+        if app_name not in self.app_limits:
+            return None
+        total = self.usage_seconds.get(app_name, 0.0) + seconds
+        self.usage_seconds[app_name] = total
+
+        minutes = total / 60
+        limit = self.app_limits[app_name]
+        if minutes >= limit and app_name not in self.exceeded:
+            self.exceeded.add(app_name)
+            self.warned.add(app_name)
+            return "exceeded", minutes
+        if minutes >= limit * self.warn_fraction and app_name not in self.warned:
+            self.warned.add(app_name)
+            return "warning", minutes
+        return None
@@ -0,0 +1,60 @@
+import logging
+import os
+import socket
+import time
+
+logger = logging.getLogger(__name__)
+
+def send_desktop_notification(title, message):
+    """Show a desktop notification (plyer is only imported when one is sent)"""
+    try:
+        from plyer import notification
+        notification.notify(title=title, message=message, timeout=10)
+    except Exception as e:
+        logger.warning(f"Desktop notification failed: {e}")
+
+def email_config_from_env():
+    """
+    SMTP settings from TRACKER_SMTP_* environment variables.
+
+    Returns None unless server, sender, password and recipient are all set.
+    """
+    config = {
+        "smtp_server": os.getenv("TRACKER_SMTP_SERVER"),
+        "smtp_port": int(os.getenv("TRACKER_SMTP_PORT", "587")),
+        "sender_email": os.getenv("TRACKER_SMTP_SENDER"),
+        "sender_password": os.getenv("TRACKER_SMTP_PASSWORD"),
+        "recipient_email": os.getenv("TRACKER_SMTP_RECIPIENT"),
+    }
+    if not all(config[key] for key in ("smtp_server", "sender_email", "sender_password", "recipient_email")):
+        return None
+    return config
+
+def send_limit_email(app_name, usage_minutes, profile_name, config):
+    """Email the parent that a time limit was exceeded."""
+    import smtplib
+    from email.mime.text import MIMEText
+
+    body = f"""
+    Time Limit Alert!
+
+    App: {app_name}
+    Usage Time: {usage_minutes:.1f} minutes
+    Profile: {profile_name}
+    Device: {socket.gethostname()}
+    Time: {time.strftime('%Y-%m-%d %H:%M:%S')}
+
+    This is an automated notification from your Screen Time Tracker.
+    """
+    msg = MIMEText(body, 'plain')
+    msg['From'] = config['sender_email']
+    msg['To'] = config['recipient_email']
+    msg['Subject'] = f"⚠️ Time Limit Exceeded - {app_name}"
+    try:
+        with smtplib.SMTP(config['smtp_server'], config['smtp_port'], timeout=30) as server:
+            server.starttls()
+            server.login(config['sender_email'], config['sender_password'])
+            server.send_message(msg)
+        logger.info(f"Limit email sent for {app_name}")
+    except Exception as e:
+        logger.warning(f"Failed to send limit email: {e}")
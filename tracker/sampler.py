@@ -0,0 +1,48 @@
+import logging
+import psutil
+
+from utils import IGNORED_APPS
+
+try:
+    import win32gui
+    import win32process
+except ImportError:  # Not on Windows
+    win32gui = win32process = None
+
+logger = logging.getLogger(__name__)
+
+def get_active_window_process():
+    """Get the process name and title of the currently active window."""
+    if win32gui is None:
+        return None, None
+    try:
+        # Get the window handle
+        window = win32gui.GetForegroundWindow()
+        # Get the window title
+        window_title = win32gui.GetWindowText(window)
+        # Get the process ID
+        _, pid = win32process.GetWindowThreadProcessId(window)
+        # Get the process
+        process = psutil.Process(pid)
+        return process.name(), window_title
+    except Exception as e:
+        logger.debug(f"Error getting active window: {e}")
+        return None, None
+
+def normalize_app(app_name, window_title):
+    """
+    Map a foreground process to the application it is tracked as.
+
+    Returns None for processes that should not be tracked.
+    """
+    if not app_name or app_name in IGNORED_APPS:
+        return None
+    # Handle Windows Store apps (like WhatsApp)
+    if app_name == "ApplicationFrameHost.exe" and window_title == "WhatsApp":
+        return "whatsapp.exe"  # Treat it as the regular WhatsApp process
+    return app_name
+
+def sample_focus():
+    """Return the (application, window title) in focus, or (None, None)"""
+    app_name, window_title = get_active_window_process()
+    return normalize_app(app_name, window_title), window_title
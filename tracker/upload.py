@@ -0,0 +1,179 @@
+import functools
+import glob
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+from tracker.daemon import SPOOL_FILE
+from utils import categorize_app, get_display_name
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DIR = "outbox"
+BATCH_SUFFIX = ".json.gz"
+MAX_SESSIONS_PER_BATCH = 500
+
+# The ingest server unpacks sessions from the whole fleet; most apps repeat
+_category = functools.lru_cache(maxsize=4096)(categorize_app)
+_display_name = functools.lru_cache(maxsize=4096)(get_display_name)
+
+def pack_session(record):
+    """
+    A spooled session in the upload format: only what the server can't derive.
+
+        {'timestamp', 'profile', 'apps': [[application, seconds, [window titles]], ...]}
+    """
+    apps = []
+    for row in record['data']:
+        titles = row.get('Window_Titles') or ''
+        apps.append([row['Application'], row['Time_Seconds'], [title for title in titles.split(', ') if title]])
+    return {'timestamp': record['timestamp'], 'profile': record['profile'], 'apps': apps}
+
+def unpack_session(session):
+    """The rows of an uploaded session, in track_screen_time's row format"""
+    rows = [
+        {
+            'Application': app_name,
+            'Time_Seconds': int(round(seconds)),
+            'Display_Name': _display_name(app_name),
+            'Window_Titles': ', '.join(titles),
+            'Time_Minutes': seconds / 60,
+            'Category': _category(app_name),
+        }
+        for app_name, seconds, titles in session['apps']
+    ]
+    rows.sort(key=lambda row: row['Time_Seconds'], reverse=True)
+    return rows
+
+def encode_batch(batch_id, device, records):
+    """Gzip'd JSON body of one upload"""
+    batch = {'batch_id': batch_id, 'device': device, 'sessions': [pack_session(record) for record in records]}
+    return gzip.compress(json.dumps(batch, separators=(',', ':')).encode(), compresslevel=6)
+
+def seal_batches(spool_dir, device, max_sessions=MAX_SESSIONS_PER_BATCH):
+    """
+    Move spooled sessions into gzip'd batch files in the outbox.
+
+    Batch ids are derived from the device, the claimed spool file and the
+    position in it, so if sealing is interrupted and repeated the same
+    sessions get the same id and the server stores them only once.
+
+    Returns:
+        int: Number of batches written
+    """
+    pending = os.path.join(spool_dir, SPOOL_FILE)
+    if os.path.exists(pending):
+        # Claim the spool; the daemon starts a fresh file with its next session
+        os.replace(pending, os.path.join(spool_dir, f"sessions.{int(time.time() * 1000)}.sealing"))
+
+    outbox = os.path.join(spool_dir, OUTBOX_DIR)
+    os.makedirs(outbox, exist_ok=True)
+    written = 0
+    for path in sorted(glob.glob(os.path.join(spool_dir, "sessions.*.sealing"))):
+        name = os.path.basename(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        for start in range(0, len(records), max_sessions):
+            batch_id = str(uuid.uuid5(uuid.NAMESPACE_URL, f"{device}/{name}/{start}"))
+            # Named so that sorting the outbox uploads batches in the order they were sealed
+            target = os.path.join(outbox, f"{name.split('.')[1]}-{start:06d}-{batch_id}{BATCH_SUFFIX}")
+            if os.path.exists(target):
+                continue
+            with open(target + ".tmp", 'wb') as f:
+                f.write(encode_batch(batch_id, device, records[start:start + max_sessions]))
+            os.replace(target + ".tmp", target)
+            written += 1
+        os.remove(path)
+    return written
+
+class BatchUploader:
+    """
+    Uploads spooled sessions to a central ingest server.
+
+    Sessions are sealed into gzip'd batches in ``<spool_dir>/outbox`` and
+    posted oldest first every ``interval`` seconds (with jitter, so a fleet
+    of agents doesn't upload in lockstep) or when ``wake`` is called. A
+    batch file is only deleted once the server acknowledged it; failures
+    are retried with exponential backoff, and since every batch keeps its id
+    across retries the server can drop repeats. Batches the server rejects
+    as malformed are renamed to ``.rejected`` instead of being retried.
+    """
+
+    def __init__(self, url, spool_dir, device, interval=60.0, timeout=10.0, max_sessions=MAX_SESSIONS_PER_BATCH):
+        """
+        Args:
+            url: The server's batch endpoint, e.g. http://ingest.local:8766/ingest/batches
+            spool_dir: The tracker's spool directory
+            device: Device name sent with every batch
+            interval: Seconds between uploads
+            timeout: Seconds to wait for one POST
+            max_sessions: Sessions per batch
+        """
+        self.url = url
+        self.spool_dir = spool_dir
+        self.device = device
+        self.interval = interval
+        self.timeout = timeout
+        self.max_sessions = max_sessions
+        self.outbox = os.path.join(spool_dir, OUTBOX_DIR)
+        self.running = True
+        self._wake = threading.Event()
+        self.thread = threading.Thread(target=self._run, name="batch-uploader", daemon=True)
+        self.thread.start()
+
+    def wake(self):
+        """Upload now instead of at the next interval"""
+        self._wake.set()
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            self._wake.wait(backoff or self.interval * random.uniform(0.8, 1.2))
+            self._wake.clear()
+            try:
+                seal_batches(self.spool_dir, self.device, self.max_sessions)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not seal spooled sessions: {e}")
+            if self.upload_pending():
+                backoff = 0.0
+            else:
+                backoff = min(max(backoff * 2, 5.0), 300.0)
+            if not self.running:
+                return
+
+    def upload_pending(self):
+        """Post the outbox oldest first; returns False if the server couldn't be reached"""
+        for path in sorted(glob.glob(os.path.join(self.outbox, "*" + BATCH_SUFFIX))):
+            batch_id = os.path.basename(path)[:-len(BATCH_SUFFIX)].split('-', 2)[2]
+            with open(path, 'rb') as f:
+                body = f.read()
+            request = urllib.request.Request(self.url, data=body, method="POST", headers={
+                'Content-Type': 'application/json', 'Content-Encoding': 'gzip', 'X-Batch-Id': batch_id
+            })
+            try:
+                urllib.request.urlopen(request, timeout=self.timeout).close()
+            except urllib.error.HTTPError as e:
+                if 400 <= e.code < 500 and e.code not in (408, 429):
+                    logger.error(f"Ingest server rejected batch {batch_id}: HTTP {e.code}")
+                    os.replace(path, path[:-len(BATCH_SUFFIX)] + ".rejected")
+                    continue
+                logger.warning(f"Could not upload batch {batch_id}: HTTP {e.code}")
+                return False
+            except (OSError, urllib.error.URLError) as e:
+                logger.warning(f"Could not upload batch {batch_id} to {self.url}: {e}")
+                return False
+            os.remove(path)
+        return True
+
+    def close(self, timeout=10.0):
+        """Seal and upload what is left, waiting at most ``timeout`` seconds"""
+        self.running = False
+        self._wake.set()
+        self.thread.join(timeout)
@@ -0,0 +1,127 @@
+import socket
+import threading
+
+import pandas as pd
+
+from live_tracker import LiveTracker
+from session_schema import SessionFrames
+from streaming_detector import StreamingAnomalyDetector
+from tracker.events import EventPublisher
+
+class TrackerService:
+    """
+    The tracking state of one OS user, shared by every browser tab.
+
+    The Streamlit app keeps one service per OS user (via st.cache_resource),
+    so all tabs and viewers attach to the same LiveTracker, history, limit
+    state and streaming baseline instead of each running its own sampler.
+    Tabs only read from it, apart from starting and stopping tracking, which
+    goes through ``start``/``stop`` so at most one tracker runs at a time.
+
+    ``revision`` increases whenever a session starts or is collected, so a
+    tab can tell that another tab changed the state and redraw.
+    """
+
+    def __init__(self, os_user, baseline_file, email_config=None, events_url=None):
+        """
+        Args:
+            os_user: Name of the OS user whose usage is tracked
+            baseline_file: Where the streaming detector's baseline is kept
+            email_config: SMTP settings for limit emails (None disables them)
+            events_url: API server endpoint for live events (None disables them)
+        """
+        self.os_user = os_user
+        self.baseline_file = baseline_file
+        self.email_config = email_config
+        # One publisher for every session, so its thread and buffer outlive an unreachable server
+        self.events = EventPublisher(events_url, None, socket.gethostname()) if events_url else None
+
+        self.streaming_detector = StreamingAnomalyDetector.load(baseline_file)
+        self.exceeded_limits = set()
+        self.frames = SessionFrames()
+        self.history = []  # {'timestamp', 'session' (index into frames), 'duration', 'profile'}
+        self.alerts = []
+        self.ai_analysis = {}  # Gemini answers for the latest session, shared by all tabs
+        self.session_count = 0
+        self.total_tracked_time = 0
+        self.last_empty = False
+        self.tracker = None
+        self.revision = 0
+        self._lock = threading.RLock()
+
+    @property
+    def is_tracking(self):
+        return self.tracker is not None
+
+    def start(self, duration, profile, profile_key):
+        """
+        Start tracking unless a session is already running.
+
+        Returns:
+            bool: Whether a new tracker was started
+        """
+        with self._lock:
+            if self.tracker is not None:
+                return False
+            self.tracker = LiveTracker(
+                duration, profile, profile_key,
+                streaming_detector=self.streaming_detector,
+                baseline_file=self.baseline_file,
+                exceeded_limits=self.exceeded_limits,
+                email_config=self.email_config,
+                events=self.events
+            ).start()
+            self.session_count += 1
+            self.revision += 1
+            return True
+
+    def stop(self):
+        """Finish the running session early"""
+        tracker = self.tracker
+        if tracker is not None:
+            tracker.stop()
+
+    def collect(self):
+        """
+        Move a finished tracker's session into the history.
+
+        Several tabs may notice the same finished tracker; only the first call
+        collects it.
+
+        Returns:
+            tuple: (history entry, session DataFrame) for the caller that
+            collected a non-empty session, otherwise None
+        """
+        with self._lock:
+            tracker = self.tracker
+            if tracker is None or not tracker.done:
+                return None
+            self.tracker = None
+            self.revision += 1
+            self.alerts.extend(tracker.alerts)
+            usage, window_titles = tracker.usage()
+            self.last_empty = not usage
+            if not usage:
+                return None
+
+            index = self.frames.add(usage, window_titles, tracker.timeline)
+            entry = {
+                'timestamp': pd.Timestamp.now(),
+                'session': index,
+                'duration': tracker.duration,
+                'profile': tracker.profile_key
+            }
+            self.history.append(entry)
+            self.total_tracked_time += tracker.duration
+            return entry, self.frames.frame(index)
+
+    def latest(self):
+        """The latest session as a DataFrame (None before the first one)"""
+        if not self.history:
+            return None
+        return self.frames.frame(self.history[-1]['session'])
+
+    def session_totals(self):
+        """Total minutes of each session in the history"""
+        totals = self.frames.total_minutes()
+        return tuple(float(totals[entry['session']]) for entry in self.history)
@@ -1,3 +1,10 @@
+# Shared constants and helpers for the app, the Admin page and the headless tracker.
+# Keep this module free of UI, network and heavy imports so it stays cheap to load.
+import json
+import os
+import re
+import socket
+
 # Application categories with more detailed classification
 APP_CATEGORIES = {
     'Development': {
@@ -84,4 +91,204 @@ def categorize_app(app_name):
 
 def get_category_emoji(category):
     """Get the emoji for a category."""
-    return APP_CATEGORIES.get(category, {}).get('emoji', '📱') 
\ No newline at end of file
+    return APP_CATEGORIES.get(category, {}).get('emoji', '📱') 
+
+IGNORED_APPS = ['svchost.exe', 'System Idle Process', 'explorer.exe', 'Registry', 
+                'csrss.exe', 'wininit.exe', 'Conhost.exe', 'RuntimeBroker.exe',
+                'SearchHost.exe', 'ShellExperienceHost.exe', 'StartMenuExperienceHost.exe',
+                'TextInputHost.exe', 'dllhost.exe', 'sihost.exe', 'fontdrvhost.exe']
+
+# Application display names with emojis
+APP_DISPLAY_NAMES = {
+    # Browsers
+    'chrome.exe': '🌐 Google Chrome',
+    'firefox.exe': '🦊 Firefox',
+    'msedge.exe': '🌐 Microsoft Edge',
+    'opera.exe': '🌐 Opera',
+    'brave.exe': '🦁 Brave',
+    'safari.exe': '🌐 Safari',
+    
+    # Development
+    'Code.exe': '💻 Visual Studio Code',
+    'devenv.exe': '🎯 Visual Studio',
+    'pycharm64.exe': '🐍 PyCharm',
+    'idea64.exe': '🧠 IntelliJ IDEA',
+    'webstorm64.exe': '🌐 WebStorm',
+    'android studio.exe': '🤖 Android Studio',
+    'eclipse.exe': '☀️ Eclipse',
+    'sublime_text.exe': '📝 Sublime Text',
+    'atom.exe': '⚛️ Atom',
+    'GitHubDesktop.exe': '🐱 GitHub Desktop',
+    'SourceTree.exe': '🌳 SourceTree',
+    'postman.exe': '📬 Postman',
+    'docker desktop.exe': '🐳 Docker Desktop',
+    
+    # Databases
+    'postgres.exe': '🐘 PostgreSQL',
+    'pgadmin4.exe': '🐘 pgAdmin',
+    'mysql.exe': '🐬 MySQL',
+    'mongodb.exe': '🍃 MongoDB',
+    'redis-server.exe': '🔴 Redis',
+    
+    # Communication
+    'discord.exe': '💬 Discord',
+    'slack.exe': '💼 Slack',
+    'teams.exe': '👥 Microsoft Teams',
+    'zoom.exe': '🎥 Zoom',
+    'skype.exe': '💬 Skype',
+    'telegram.exe': '✈️ Telegram',
+    'whatsapp.exe': '💬 WhatsApp',
+    'signal.exe': '🔒 Signal',
+    
+    # Office
+    'WINWORD.EXE': '📄 Word',
+    'EXCEL.EXE': '📊 Excel',
+    'POWERPNT.EXE': '📊 PowerPoint',
+    'OUTLOOK.EXE': '📧 Outlook',
+    'ONENOTE.EXE': '📔 OneNote',
+    'MSACCESS.EXE': '🗄️ Access',
+    'MSPUB.EXE': '📰 Publisher',
+    'AcroRd32.exe': '📄 Adobe Reader',
+    'Acrobat.exe': '📄 Adobe Acrobat',
+    'wps.exe': '📝 WPS Office',
+    'et.exe': '📊 WPS Spreadsheet',
+    'wpp.exe': '📊 WPS Presentation',
+    
+    # Creative
+    'photoshop.exe': '🎨 Photoshop',
+    'illustrator.exe': '✒️ Illustrator',
+    'premiere.exe': '🎬 Premiere Pro',
+    'afterfx.exe': '✨ After Effects',
+    'lightroom.exe': '📸 Lightroom',
+    'figma.exe': '🎨 Figma',
+    'sketch.exe': '💎 Sketch',
+    'blender.exe': '🎮 Blender',
+    'unity.exe': '🎮 Unity',
+    'unreal.exe': '🎮 Unreal Engine',
+    
+    # Entertainment
+    'spotify.exe': '🎵 Spotify',
+    'netflix.exe': '🎬 Netflix',
+    'steam.exe': '🎮 Steam',
+    'epicgameslauncher.exe': '🎮 Epic Games',
+    'vlc.exe': '🎥 VLC',
+    'wmplayer.exe': '🎵 Windows Media Player',
+    
+    # Utilities
+    'notepad.exe': '📝 Notepad',
+    'notepad++.exe': '📝 Notepad++',
+    'winrar.exe': '📦 WinRAR',
+    '7zg.exe': '📦 7-Zip',
+    'calc.exe': '🔢 Calculator',
+    'mspaint.exe': '🎨 Paint',
+    'snippingtool.exe': '✂️ Snipping Tool',
+    
+    # System
+    'taskmgr.exe': '📊 Task Manager',
+    'control.exe': '⚙️ Control Panel',
+    'cmd.exe': '⌨️ Command Prompt',
+    'powershell.exe': '💻 PowerShell',
+    'WindowsTerminal.exe': '💻 Windows Terminal'
+}
+
+def get_display_name(app_name):
+    """Get the friendly display name for an application."""
+    if app_name in APP_DISPLAY_NAMES:
+        return APP_DISPLAY_NAMES[app_name]
+    
+    # Make unknown app names more readable
+    name = app_name.replace('.exe', '')
+    name = ' '.join(word.capitalize() for word in name.split('_'))
+    return f"📱 {name}"
+
+PROFILES_FILE = "profiles.json"
+
+def load_profiles():
+    """Load profiles from JSON file"""
+    if os.path.exists(PROFILES_FILE):
+        with open(PROFILES_FILE, 'r') as f:
+            return json.load(f)
+    return {
+        "kids": {
+            "name": "Kids Profile",
+            "app_limits": {
+                "whatsapp.exe": 1,
+                "chrome.exe": 1,
+                "facebook.exe": 1
+            },
+            "is_default": True
+        },
+        "parent": {
+            "name": "Parent Profile",
+            "app_limits": {},
+            "is_default": False
+        }
+    }
+
+# Per-device, per-profile data (anomaly models and the session store) lives under
+# <MODELS_DIR>/<device>/<profile>/
+MODELS_DIR = "anomaly_models"
+DEFAULT_DEVICE = socket.gethostname()
+
+def _safe_name(name):
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', str(name)) or '_'
+
+def shard_dir(profile, device=None, base_dir=MODELS_DIR):
+    """Directory holding one profile's data on one device"""
+    return os.path.join(base_dir, _safe_name(device or DEFAULT_DEVICE), _safe_name(profile))
+
+def session_store_dir(profile, device=None, base_dir=MODELS_DIR):
+    """Session store shared by the app, the tracker daemon and the API server"""
+    return os.path.join(shard_dir(profile, device, base_dir), "tracking_history_sessions")
+
+SKETCH_DIR = "usage_sketches"
+
+def sketch_dir(profile, device=None, base_dir=MODELS_DIR):
+    """Per-day usage sketches of one shard, merged by fleet-wide queries"""
+    return os.path.join(shard_dir(profile, device, base_dir), SKETCH_DIR)
+
+def save_profiles(profiles):
+    """Save profiles to JSON file"""
+    with open(PROFILES_FILE, 'w') as f:
+        json.dump(profiles, f, indent=4)
+
+# Constants
+NOTIFICATION_THRESHOLD = 60  # seconds
+NOTIFICATION_COOLDOWN = 60  # seconds
+
+# Usage thresholds (in minutes)
+USAGE_THRESHOLDS = {
+    'Light': 30,      # 30 minutes
+    'Moderate': 60,   # 1 hour
+    'Heavy': 120,     # 2 hours
+    'Excessive': 180  # 3 hours
+}
+
+# Category-specific thresholds (percentage of total time)
+CATEGORY_THRESHOLDS = {
+    'Entertainment': {
+        'Moderate': 20,
+        'Heavy': 40,
+        'Excessive': 60
+    },
+    'Communication': {
+        'Moderate': 20,
+        'Heavy': 30,
+        'Excessive': 50
+    },
+    'Browsers': {
+        'Moderate': 30,
+        'Heavy': 50,
+        'Excessive': 70
+    },
+    'Development': {
+        'Light': 20,
+        'Moderate': 40,
+        'Productive': 60
+    },
+    'Office': {
+        'Light': 20,
+        'Moderate': 40,
+        'Productive': 60
+    }
+}